@@ -0,0 +1,41 @@
+"""
+Compare the validated and the trusted (Asset.construct_trusted) decode paths of asset list responses.
+
+Usage:
+    python -m benchmarks.asset_parsing --sizes 10000 100000
+"""
+import argparse
+import json
+import time
+from typing import Callable, List
+
+from benchmarks.payloads import generate_asset_payloads
+from src.asset_service.models import Asset
+
+
+def measure(parse: Callable[[str], List[Asset]], body: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(body)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'assets':>8} {'json.loads':>12} {'validated':>12} {'trusted':>12} {'speedup':>8}")
+    for size in args.sizes:
+        body = json.dumps(generate_asset_payloads(size))
+        loads_only = measure(json.loads, body, args.repeat)
+        validated = measure(lambda raw: [Asset(**asset) for asset in json.loads(raw)], body, args.repeat)
+        trusted = measure(lambda raw: [Asset.construct_trusted(asset) for asset in json.loads(raw)], body, args.repeat)
+        print(f"{size:>8} {loads_only:>11.3f}s {validated:>11.3f}s {trusted:>11.3f}s {validated / trusted:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Run AssetService in-process against the mock service (service_mocks/app/main.py, no network) and measure
+the throughput, latency percentiles and peak memory of the client and the models, at several tenant sizes.
+
+The results can be stored as a baseline and later runs compared with it, a case that is slower (or uses more memory)
+than the baseline by more than --tolerance fails the run. benchmarks/baseline.json holds the results of a reference
+machine, results of different machines are not comparable, so record it again with --update-baseline on the machine
+that runs the comparison.
+
+Usage:
+    python -m benchmarks.client_suite --sizes 100 10000 100000
+    python -m benchmarks.client_suite --update-baseline
+    python -m benchmarks.client_suite --compare --tolerance 0.2
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from fastapi.testclient import TestClient
+
+from benchmarks.payloads import generate_asset_payloads
+from service_mocks.app.main import app, store
+from src.asset_service.cache import ResponseCache
+from src.asset_service.client import AssetService
+from src.asset_service.constants import ASSET_SERVICE_NAME
+from src.asset_service.discovery import service_url_cache
+from src.asset_service.models import Asset, CreateAssetRequest, UpdateAsset
+
+TENANT_ID = "benchmark-tenant"
+API_TOKEN = "benchmark-token"
+MOCK_URL = "http://testserver"
+DEFAULT_BASELINE_PATH = Path(__file__).parent / "baseline.json"
+SINGLE_GET_REQUESTS = 200
+MIN_PERCENTILE_SAMPLES = 100  # Fewer durations than this report no p95 / p99 (with 5 runs both are just the max)
+
+
+class MockSession(TestClient):
+    """
+    Sends the requests of the client straight to the mock app, following the trailing slash redirects of its routes
+    """
+
+    def request(self, *args: Any, allow_redirects: bool = True, **kwargs: Any) -> Any:  # type: ignore
+        return super().request(*args, allow_redirects=allow_redirects, **kwargs)
+
+
+class CaseResult(NamedTuple):
+    items: int
+    throughput: float  # Items per second, of the median run
+    p50_ms: float
+    p95_ms: Optional[float]  # None when there are too few runs for the percentile to mean anything
+    p99_ms: Optional[float]
+    max_ms: float
+    peak_mb: float
+
+
+def percentile(durations: List[float], fraction: float) -> Optional[float]:
+    if len(durations) < MIN_PERCENTILE_SAMPLES:
+        return None
+    ordered = sorted(durations)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+
+def format_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}ms"
+
+
+def measure(operation: Callable[[], Any], items: int, repeat: int) -> CaseResult:
+    """
+    The latencies are of whole operations (each processes items items), the peak memory of a separate traced run.
+    The p95 and p99 are only reported for the cases of many short operations (the single gets), the bulk, list and
+    parse cases run a few times and report their median and max.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return CaseResult(items=items, throughput=items / statistics.median(durations),
+                      p50_ms=statistics.median(durations) * 1000, p95_ms=percentile(durations, 0.95),
+                      p99_ms=percentile(durations, 0.99), max_ms=max(durations) * 1000, peak_mb=peak / 2 ** 20)
+
+
+def get_create_requests(payloads: List[Dict[str, Any]]) -> List[CreateAssetRequest]:
+    fields = CreateAssetRequest.__fields__
+    return [CreateAssetRequest(**{name: value for name, value in payload.items() if name in fields})
+            for payload in payloads]
+
+
+def get_cases(service: AssetService, conditional_service: AssetService,
+              payloads: List[Dict[str, Any]]) -> Dict[str, Callable[[], Any]]:
+    """
+    In the order they run: the updates and deletes target the assets the mock was seeded with,
+    then creating them again reactivates them.
+    list_not_modified is the list of conditional_service, whose response cache holds the list, so it measures the 304
+    path (compare it with list, the full fetch)
+    """
+    assets = [Asset(**payload) for payload in payloads]
+    create_requests = get_create_requests(payloads)
+    updates = [UpdateAsset(asset_id=asset.asset_id, risk_score=asset.risk_score, tags=asset.tags) for asset in assets]
+    asset_ids = [asset.asset_id for asset in assets]
+
+    return {
+        "list": lambda: service.get_all_assets(TENANT_ID, API_TOKEN),
+        "list_not_modified": lambda: conditional_service.get_all_assets(TENANT_ID, API_TOKEN),
+        "export": lambda: sum(1 for _ in service.iter_export_assets(TENANT_ID, API_TOKEN)),
+        "bulk_update": lambda: service.bulk_update_assets(TENANT_ID, updates, API_TOKEN),
+        "bulk_delete": lambda: service.bulk_delete_assets(TENANT_ID, asset_ids, API_TOKEN),
+        "bulk_create": lambda: service.bulk_create_assets(TENANT_ID, create_requests, API_TOKEN),
+        "parse": lambda: [Asset(**payload) for payload in payloads],
+        "parse_trusted": lambda: [Asset.construct_trusted(payload) for payload in payloads],
+        "dict": lambda: [asset.dict() for asset in assets],
+    }
+
+
+def run_suite(sizes: List[int], repeat: int) -> Dict[str, CaseResult]:
+    """
+    The mock store is seeded with the assets of each size before its cases, so the list and write cases scale with it
+    """
+    service_url_cache.set(ASSET_SERVICE_NAME, MOCK_URL)
+    service = AssetService(session=MockSession(app, base_url=MOCK_URL))
+    conditional_service = AssetService(session=MockSession(app, base_url=MOCK_URL), response_cache=ResponseCache())
+
+    results: Dict[str, CaseResult] = {}
+    for size in sizes:
+        payloads = generate_asset_payloads(size, TENANT_ID)
+        store.reset()
+        store.insert(TENANT_ID, payloads)
+        if not results:
+            # The latencies of single requests, each one is an operation
+            asset_id = next(payload["asset_id"] for payload in payloads if payload["is_active"])
+            results["get"] = measure(lambda: service.get_asset(TENANT_ID, asset_id, API_TOKEN), 1,
+                                     SINGLE_GET_REQUESTS)
+        conditional_service.get_all_assets(TENANT_ID, API_TOKEN)  # Caches the list, the next ones are answered 304
+        for name, operation in get_cases(service, conditional_service, payloads).items():
+            results[f"{name}/{size}"] = measure(operation, size, repeat)
+    return results
+
+
+def print_results(results: Dict[str, CaseResult], baseline: Optional[Dict[str, Dict[str, float]]]) -> None:
+    print(f"{'case':>24} {'items/s':>12} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10} {'peak':>10} "
+          f"{'vs baseline':>12}")
+    for name, result in results.items():
+        change = ""
+        if baseline and name in baseline:
+            change = f"{result.throughput / baseline[name]['throughput'] - 1:+.1%}"
+        print(f"{name:>24} {result.throughput:>12.0f} {format_ms(result.p50_ms):>10} {format_ms(result.p95_ms):>10} "
+              f"{format_ms(result.p99_ms):>10} {format_ms(result.max_ms):>10} {result.peak_mb:>8.1f}MB {change:>12}")
+
+
+def compare(results: Dict[str, CaseResult], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """
+    The regressions: cases whose throughput dropped, or whose peak memory grew, by more than tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        if result.throughput < baseline[name]["throughput"] * (1 - tolerance):
+            regressions.append(f"{name} throughput {result.throughput:.0f} < {baseline[name]['throughput']:.0f}")
+        if result.peak_mb > baseline[name]["peak_mb"] * (1 + tolerance):
+            regressions.append(f"{name} peak memory {result.peak_mb:.1f}MB > {baseline[name]['peak_mb']:.1f}MB")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--compare", action="store_true", help="fail when a case regressed compared to the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    if args.compare and baseline is None:
+        sys.exit(f"No baseline at {args.baseline}, create one with --update-baseline")
+
+    results = run_suite(args.sizes, args.repeat)
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps({name: result._asdict() for name, result in results.items()}, indent=2))
+        print(f"Stored the baseline at {args.baseline}")
+    if args.compare and baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            sys.exit("Regressions compared to the baseline:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
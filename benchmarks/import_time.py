@@ -0,0 +1,89 @@
+"""
+Measure the cold import time of the asset_service package with `python -X importtime`, and exit with an error when
+an import exceeds its budget, so startup (lambda cold start) regressions fail the build.
+
+Each import runs in a fresh interpreter, the best of --repeat runs (less the imports of an empty interpreter)
+is compared with the budget.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms models=150 client=400 --top 15
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+IMPORTS = {
+    "package": "import src.asset_service",
+    "models": "from src.asset_service import Asset",
+    "client": "from src.asset_service import AssetService",
+}
+DEFAULT_BUDGETS_MS = {
+    "package": 50,
+    "models": 250,
+    "client": 400,
+}
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(statement: str) -> Tuple[float, List[Tuple[int, str]]]:
+    """
+    Returns the total import time in ms, and the self time in us of each module that was imported
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True,
+                            check=True)
+    total_us = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = int(match[1]), int(match[2]), match[3], match[4]
+        modules.append((self_us, module))
+        if len(indent) == 1:  # A top level import, its cumulative time includes all of its nested imports
+            total_us += cumulative_us
+    return total_us / 1000, modules
+
+
+def parse_budgets(values: List[str]) -> Dict[str, float]:
+    budgets: Dict[str, float] = dict(DEFAULT_BUDGETS_MS)
+    for value in values:
+        name, budget = value.split("=")
+        if name not in IMPORTS:
+            raise ValueError(f"Unknown import {name}, expected one of {list(IMPORTS)}")
+        budgets[name] = float(budget)
+    return budgets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", nargs="*", default=[], metavar="IMPORT=MS",
+                        help=f"override the budgets of {list(IMPORTS)}, the defaults are {DEFAULT_BUDGETS_MS}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="print the modules with the highest self time")
+    args = parser.parse_args()
+    budgets = parse_budgets(args.budget_ms)
+
+    startup_ms = min(measure_import("pass")[0] for _ in range(args.repeat))
+    over_budget = []
+    print(f"{'import':>8} {'time':>10} {'budget':>10}")
+    for name, statement in IMPORTS.items():
+        runs = [measure_import(statement) for _ in range(args.repeat)]
+        total_ms, modules = min(runs)
+        total_ms -= startup_ms
+        is_over_budget = total_ms > budgets[name]
+        print(f"{name:>8} {total_ms:>8.1f}ms {budgets[name]:>8.1f}ms {'OVER BUDGET' if is_over_budget else ''}")
+        if is_over_budget:
+            over_budget.append(name)
+        if args.top:
+            for self_us, module in sorted(modules, reverse=True)[:args.top]:
+                print(f"{'':>10} {self_us / 1000:>7.1f}ms {module}")
+
+    if over_budget:
+        sys.exit(f"Import time over budget: {over_budget}")
+
+
+if __name__ == "__main__":
+    main()
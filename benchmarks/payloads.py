@@ -0,0 +1,49 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+ASSET_TYPES = ["repo", "repo", "repo", "repo", "aws_account", "web", "api"]
+VENDORS = {"repo": "github", "aws_account": "aws", "web": "domain", "api": "domain"}
+RISK_STATUSES = ["LOW", "MEDIUM", "HIGH", None]
+TEAMS = [f"team-{i}" for i in range(50)]
+
+
+def generate_asset_payload(index: int, tenant_id: str, rng: random.Random) -> Dict[str, Any]:
+    """
+    A json asset as returned by the asset service, the field distribution roughly follows a real tenant
+    """
+    asset_type = rng.choice(ASSET_TYPES)
+    created_at = datetime(2023, 1, 1) + timedelta(minutes=index)
+    return {
+        "asset_id": f"asset-{index:07d}",
+        "tenant_id": tenant_id,
+        "asset_type": asset_type,
+        "vendor": VENDORS[asset_type],
+        "owner": "jitsecurity",
+        "asset_name": f"{asset_type}-{index}",
+        "external_id": str(100000 + index),
+        "risk_status": rng.choice(RISK_STATUSES),
+        "risk_score": rng.randint(0, 100),
+        "score": rng.randint(0, 100),
+        "is_active": rng.random() > 0.05,
+        "is_covered": rng.random() > 0.2,
+        "is_archived": rng.random() < 0.05,
+        "created_at": created_at.isoformat(),
+        "modified_at": (created_at + timedelta(days=rng.randint(0, 300))).isoformat(),
+        "environment": "prod" if asset_type != "repo" else None,
+        "is_branch_protected_by_jit": asset_type == "repo" and rng.random() > 0.5,
+        "status": "connected" if asset_type == "aws_account" else None,
+        "status_details": None,
+        "tags": [{"name": "team", "value": team} for team in rng.sample(TEAMS, rng.randint(0, 3))],
+        "aws_account_id": str(rng.randint(10 ** 11, 10 ** 12 - 1)) if asset_type == "aws_account" else None,
+        "aws_regions_to_scan": ["us-east-1", "eu-west-1"] if asset_type == "aws_account" else None,
+        "target_url": f"https://app-{index}.example.com" if asset_type in ("web", "api") else None,
+        "authentication_mode": None,
+        "exclude_paths": None,
+        "teams": [],
+    }
+
+
+def generate_asset_payloads(count: int, tenant_id: str = "benchmark-tenant", seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [generate_asset_payload(index, tenant_id, rng) for index in range(count)]
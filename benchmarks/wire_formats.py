@@ -0,0 +1,59 @@
+"""
+Compare the bytes on the wire and the encode/decode time of asset list responses in every wire format and compression.
+Decoding includes the decompression the http client does before the body is deserialized.
+
+Usage:
+    python -m benchmarks.wire_formats --sizes 100 10000 100000
+"""
+import argparse
+import gzip
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+import zstandard
+
+from benchmarks.payloads import generate_asset_payloads
+from src.asset_service.encoding import MEDIA_TYPES, Compression, WireFormat, decode_body, encode_body
+
+WIRE_FORMATS: List[WireFormat] = ["json", "msgpack"]
+COMPRESSIONS: List[Optional[Compression]] = [None, "gzip", "zstd"]
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def decompress(body: bytes, compression: Optional[Compression]) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(body)
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(body)
+    return body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'assets':>8} {'format':>8} {'compression':>12} {'bytes':>12} {'ratio':>7} {'encode':>10} {'decode':>10}")
+    for size in args.sizes:
+        payload = generate_asset_payloads(size)
+        plain_size = len(encode_body(payload, "json", None)[0])
+        for wire_format in WIRE_FORMATS:
+            for compression in COMPRESSIONS:
+                encode_time, (body, _) = measure(lambda: encode_body(payload, wire_format, compression), args.repeat)
+                decode_time, _ = measure(
+                    lambda: decode_body(decompress(body, compression), MEDIA_TYPES[wire_format]), args.repeat)
+                print(f"{size:>8} {wire_format:>8} {compression or '-':>12} {len(body):>12} "
+                      f"{plain_size / len(body):>6.1f}x {encode_time:>9.3f}s {decode_time:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import math
+import random
+from typing import Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+DEFAULT_ENDPOINT = "*"
+Z_99 = 2.326  # The z-score of the 99th percentile of the normal distribution
+
+
+class FaultConfig(BaseModel):
+    """
+    The faults injected into the requests of an endpoint.
+    The latency is log-normal with the given median and 99th percentile (fixed when they are equal).
+    """
+    latency_p50_ms: float = 0
+    latency_p99_ms: float = 0
+    throttle_rate: float = Field(0, ge=0, le=1)  # The fraction of the requests answered with 429
+    retry_after_seconds: Optional[int] = 1  # The Retry-After of the throttled responses
+    error_rate: float = Field(0, ge=0, le=1)  # The fraction of the requests answered with error_status
+    error_status: int = 500
+
+    def get_latency_seconds(self, rng: random.Random) -> float:
+        if self.latency_p50_ms <= 0:
+            return 0
+        if self.latency_p99_ms <= self.latency_p50_ms:
+            return self.latency_p50_ms / 1000
+        sigma = math.log(self.latency_p99_ms / self.latency_p50_ms) / Z_99
+        return rng.lognormvariate(math.log(self.latency_p50_ms), sigma) / 1000
+
+
+def get_endpoint(method: str, path: str) -> str:
+    """
+    The method and the first path segment of a request, e.g. "GET /asset" for GET /asset/{asset_id}
+    """
+    return f"{method} /{path.strip('/').split('/')[0]}"
+
+
+class FaultInjector:
+    """
+    The fault configs per endpoint (see get_endpoint), the "*" config applies to the endpoints without their own
+    """
+
+    def __init__(self, random_seed: Optional[int] = None) -> None:
+        self.faults: Dict[str, FaultConfig] = {}
+        self._rng = random.Random(random_seed)
+
+    def configure(self, faults: Dict[str, FaultConfig]) -> None:
+        self.faults = dict(faults)
+
+    def draw(self, method: str, path: str) -> Tuple[float, Optional[FaultConfig], Optional[int]]:
+        """
+        Decide the faults of a request: its added latency in seconds, its config and the status to fail it with
+        (None to let it through)
+        """
+        fault = self.faults.get(get_endpoint(method, path)) or self.faults.get(DEFAULT_ENDPOINT)
+        if fault is None:
+            return 0, None, None
+
+        latency = fault.get_latency_seconds(self._rng)
+        roll = self._rng.random()
+        if roll < fault.throttle_rate:
+            return latency, fault, 429
+        if roll < fault.throttle_rate + fault.error_rate:
+            return latency, fault, fault.error_status
+        return latency, fault, None
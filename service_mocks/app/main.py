@@ -1,48 +1,221 @@
-from typing import List, Optional, Dict
-from uuid import uuid4
-from fastapi import FastAPI, Header, status, Response
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import zlib
+from typing import Iterator, List, Optional, Dict, Tuple, Union
+from urllib.parse import unquote
+
+import msgpack
+import zstandard
+from fastapi import FastAPI, Header, Request, Response, status
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.encoders import jsonable_encoder
-from datetime import datetime, timedelta
-from .models import Asset, CreateAssetRequest, UpdateAsset, CreateAssetsResponse
+from pydantic import BaseModel
+from .faults import FaultConfig, FaultInjector
+from .models import (Asset, AssetsPage, CreateAssetRequest, UpdateAsset, CreateAssetsResponse, DeleteAssetsResponse,
+                     GetAssetsByIdsResponse, UpdateAssetTags, AssetChangesPage)
+from .store import AssetRecord, AssetStore, to_response
 
 app = FastAPI(title="Asset Service")
+store = AssetStore()
+faults = FaultInjector()
 
 DESC = "desc"
 LOW = "LOW"
 MEDIUM = "MEDIUM"
 HIGH = "HIGH"
+MAX_PAGE_SIZE = 1000
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_PAGE_SIZE = 1000  # The assets read from the store and written to the stream at a time
+GZIP_COMPRESSION_LEVEL = 6
+MIN_COMPRESSED_RESPONSE_SIZE = 500
+GET_ASSETS_BY_IDS_BATCH_SIZE = 100
+ADMIN_PATH = "/_mock"
+
+
+class SeedRequest(BaseModel):
+    """
+    Seed synthetic assets, into tenant_ids or into tenants tenant-0 ... tenant-{tenants - 1}
+    """
+    tenants: int = 1
+    tenant_ids: Optional[List[str]] = None
+    assets_per_tenant: int = 1000
+    random_seed: int = 0
+
+
+def get_store_config() -> Tuple[List[str], int, Dict[str, FaultConfig]]:
+    """
+    The seed and the faults of the mock at startup, from the environment:
+        MOCK_SEED_TENANTS: the number of synthetic tenants (tenant-0, tenant-1, ...)
+        MOCK_SEED_ASSETS_PER_TENANT: the number of synthetic assets of each tenant
+        MOCK_FAULTS: a json of the fault configs per endpoint, e.g. {"*": {"latency_p50_ms": 20, "throttle_rate": 0.01}}
+    """
+    tenant_ids = [f"tenant-{i}" for i in range(int(os.environ.get("MOCK_SEED_TENANTS", 0)))]
+    assets_per_tenant = int(os.environ.get("MOCK_SEED_ASSETS_PER_TENANT", 1000))
+    endpoint_faults = {endpoint: FaultConfig(**config)
+                       for endpoint, config in json.loads(os.environ.get("MOCK_FAULTS", "{}")).items()}
+    return tenant_ids, assets_per_tenant, endpoint_faults
+
+
+def encode_cursor(offset: Optional[int]) -> Optional[str]:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode() if offset is not None else None
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    return int(base64.urlsafe_b64decode(cursor.encode()).decode()) if cursor else 0
+
+
+def split_tag_path(request: Request, tag_path: str) -> Tuple[str, str]:
+    """
+    The tag name and value of a /tag/{tag_name}/{tag_value} path. The real endpoint matches the segments before
+    decoding them, so an escaped "/" stays in the name or the value, the raw path is split the same way when the server
+    provides it (uvicorn does). Otherwise the decoded path is split on its first "/", a name can't hold a "/" then.
+    """
+    raw_path = request.scope.get("raw_path")
+    if raw_path:
+        tag_name, _, tag_value = raw_path.decode("ascii")[len("/tag/"):].partition("/")
+        return unquote(tag_name), unquote(tag_value)
+    tag_name, _, tag_value = tag_path.partition("/")
+    return tag_name, tag_value
+
+
+def get_fields(fields: Optional[str]) -> Optional[List[str]]:
+    return fields.split(",") if fields else None
+
+
+def asset_response(asset: AssetRecord, fields: Optional[str] = None) -> JSONResponse:
+    """
+    The store records are already json, they are returned as is instead of being validated again by a response model
+    """
+    return JSONResponse(content=to_response(asset, get_fields(fields)))
+
 
+def assets_response(assets: List[AssetRecord], fields: Optional[str] = None) -> JSONResponse:
+    field_names = get_fields(fields)
+    return JSONResponse(content=[to_response(asset, field_names) for asset in assets])
 
-def get_date(days_before: int = 0):
+
+def page_response(assets: List[AssetRecord], next_offset: Optional[int], fields: Optional[str] = None) -> JSONResponse:
     """
-    We create dates to the dummy asset to fit the flow.
-    For example, on create flow, the created_at and modified_at will both be the current time.
-    Example two: On update flow, the modified_at will be the current time and the created_at will be a past time.
+    The real service pages over the mongo _id, the mock encodes the position of the next page in the cursor
     """
-    return str((datetime.utcnow() - timedelta(days=days_before)).isoformat())
+    field_names = get_fields(fields)
+    return JSONResponse(content={"items": [to_response(asset, field_names) for asset in assets],
+                                 "next_cursor": encode_cursor(next_offset)})
+
 
+def not_found(message: str) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"message": message})
 
-def get_dummy_asset(partial_asset: Optional[Dict] = None, created_before_days=7, modified_before_days=1):
-    asset_item = {
-        "asset_type": "repo",
-        "vendor": "github",
-        "owner": "jit",
-        "asset_name": "asset-service",
-        "asset_domain": "jitsecurity",
-        "asset_id": str(uuid4()),
-        "risk_status": "LOW",
-        "risk_score": 10,
-        "is_active": True,
-        "created_at": get_date(created_before_days),
-        "modified_at": get_date(modified_before_days),
-        **(partial_asset or {})  # overriding the default attribute values with the ones in partial_asset
-    }
-    if asset_item.get('tenant_id') is None:
-        asset_item['tenant_id'] = str(uuid4())
 
-    return Asset(**asset_item)
+def list_response(tenant: str, asset_type: Optional[str], vendor: Optional[str], owner: Optional[str],
+                  sort_by: Optional[str], sort_order: str, limit: Optional[int], page_size: Optional[int],
+                  cursor: Optional[str], fields: Optional[str]) -> JSONResponse:
+    """
+    Unsorted pages are read straight from the indexes of the store, sorted (or limited) lists are built in full first
+    """
+    if page_size and not sort_by and limit is None:
+        assets, next_offset = store.list(tenant, asset_type, vendor, owner, decode_cursor(cursor),
+                                         min(page_size, MAX_PAGE_SIZE))
+        return page_response(assets, next_offset, fields)
+
+    assets, _ = store.list(tenant, asset_type, vendor, owner)
+    if sort_by == "risk_score":
+        assets.sort(key=lambda asset: asset.get("risk_score", 0), reverse=(sort_order == DESC))
+    if limit is not None:
+        assets = assets[:limit]
+    if not page_size:
+        return assets_response(assets, fields)
+
+    offset = decode_cursor(cursor)
+    next_offset = offset + min(page_size, MAX_PAGE_SIZE)
+    return page_response(assets[offset:next_offset], next_offset if next_offset < len(assets) else None, fields)
+
+
+@app.middleware("http")
+async def add_etag(request: Request, call_next):
+    """
+    Json reads get a strong ETag (a hash of the body), a matching If-None-Match is answered with 304 and no body.
+    Other responses (the streamed exports) are passed through without being buffered.
+    """
+    response = await call_next(request)
+    if request.method != "GET" or response.status_code != status.HTTP_200_OK or \
+            not response.headers.get("content-type", "").startswith(JSON_MEDIA_TYPE):
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = f'"{hashlib.sha256(body).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    headers = {**response.headers, "ETag": etag}
+    return Response(content=body, status_code=response.status_code, headers=headers, media_type=response.media_type)
+
+
+def decode_request_body(body: bytes, content_encoding: str, content_type: str) -> bytes:
+    if content_encoding == "gzip":
+        body = gzip.decompress(body)
+    elif content_encoding == "zstd":
+        body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if content_type.startswith(MSGPACK_MEDIA_TYPE):
+        body = json.dumps(msgpack.unpackb(body, raw=False)).encode()
+    return body
+
+
+def encode_response_body(body: bytes, accept: str, accept_encoding: str) -> Tuple[bytes, Dict[str, str]]:
+    headers = {}
+    if MSGPACK_MEDIA_TYPE in accept:
+        body = msgpack.packb(json.loads(body), use_bin_type=True)
+        headers["content-type"] = MSGPACK_MEDIA_TYPE
+    if len(body) >= MIN_COMPRESSED_RESPONSE_SIZE:
+        if "zstd" in accept_encoding:
+            body = zstandard.ZstdCompressor().compress(body)
+            headers["content-encoding"] = "zstd"
+        elif "gzip" in accept_encoding:
+            body = gzip.compress(body)
+            headers["content-encoding"] = "gzip"
+    return body, headers
+
+
+@app.middleware("http")
+async def negotiate_wire_format(request: Request, call_next):
+    """
+    Accepts gzip/zstd compressed and msgpack request bodies, and encodes json responses according to
+    the Accept (application/msgpack) and Accept-Encoding (zstd, gzip) headers.
+    Declared after add_etag so it wraps it, the ETag is computed on the plain json body.
+    """
+    content_encoding = request.headers.get("content-encoding", "")
+    content_type = request.headers.get("content-type", "")
+    if content_encoding or content_type.startswith(MSGPACK_MEDIA_TYPE):
+        body = decode_request_body(await request.body(), content_encoding, content_type)
+        request_headers = [(name, value) for name, value in request.scope["headers"]
+                           if name not in (b"content-encoding", b"content-type", b"content-length")]
+        request_headers += [(b"content-type", JSON_MEDIA_TYPE.encode()),
+                            (b"content-length", str(len(body)).encode())]
+
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            # the body is replayed once, then the (streaming) response only waits for a disconnect
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        request = Request({**request.scope, "headers": request_headers}, receive)
+
+    response = await call_next(request)
+    if not (response.media_type or response.headers.get("content-type", "")).startswith(JSON_MEDIA_TYPE):
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    body, encoding_headers = encode_response_body(body, request.headers.get("accept", ""),
+                                                  request.headers.get("accept-encoding", ""))
+    response_headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    response_headers.update(encoding_headers)
+    return Response(content=body, status_code=response.status_code, headers=response_headers)
 
 
 @app.exception_handler(RequestValidationError)
@@ -53,85 +226,165 @@ async def validation_exception_handler(request, exc):
     )
 
 
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    """
+    Adds the configured latency and fails the configured fraction of the requests (see FaultInjector).
+    Declared last so it wraps the other middlewares, the admin endpoints of the mock are never faulted.
+    """
+    if request.url.path.startswith(ADMIN_PATH):
+        return await call_next(request)
+
+    latency, fault, fault_status = faults.draw(request.method, request.url.path)
+    if latency:
+        await asyncio.sleep(latency)
+    if fault_status == status.HTTP_429_TOO_MANY_REQUESTS:
+        headers = {"Retry-After": str(fault.retry_after_seconds)} if fault.retry_after_seconds is not None else None
+        return JSONResponse(status_code=fault_status, content={"message": "Rate exceeded"}, headers=headers)
+    if fault_status:
+        return JSONResponse(status_code=fault_status, content={"message": "Injected error"})
+    return await call_next(request)
+
+
+@app.on_event("startup")
+def configure_store():
+    tenant_ids, assets_per_tenant, startup_faults = get_store_config()
+    if tenant_ids:
+        store.seed(tenant_ids, assets_per_tenant)
+    faults.configure(startup_faults)
+
+
+@app.post(f"{ADMIN_PATH}/seed", status_code=status.HTTP_200_OK)
+def seed_store(seed_request: SeedRequest):
+    tenant_ids = seed_request.tenant_ids or [f"tenant-{i}" for i in range(seed_request.tenants)]
+    return {"seeded_assets": store.seed(tenant_ids, seed_request.assets_per_tenant, seed_request.random_seed)}
+
+
+@app.post(f"{ADMIN_PATH}/reset", status_code=status.HTTP_204_NO_CONTENT)
+def reset_store():
+    store.reset()
+    faults.configure({})
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@app.get(f"{ADMIN_PATH}/stats", status_code=status.HTTP_200_OK)
+def get_store_stats():
+    return store.get_stats()
+
+
+@app.put(f"{ADMIN_PATH}/faults", response_model=Dict[str, FaultConfig], status_code=status.HTTP_200_OK)
+def configure_faults(endpoint_faults: Dict[str, FaultConfig]):
+    """
+    Replace the fault configs, keyed by "METHOD /first-path-segment" (e.g. "GET /asset", "POST /delete") or "*"
+    """
+    faults.configure(endpoint_faults)
+    return faults.faults
+
+
 @app.post("/",
           response_model=CreateAssetsResponse, status_code=status.HTTP_201_CREATED)
 def create_asset(new_assets: List[CreateAssetRequest], tenant: Optional[str] = Header(None)):
+    store.create(tenant, [jsonable_encoder(asset, exclude={"should_trigger_event"}) for asset in new_assets])
     return CreateAssetsResponse(created_assets_count=str(len(new_assets)))
 
 
 @app.get("/",
-         response_model=List[Asset],
+         response_model=Union[AssetsPage, List[Asset]],
          status_code=status.HTTP_200_OK)
 def get_assets_by_tenant_id(
-        sort_by: str = None, sort_order: str = DESC, limit: int = 7, tenant: Optional[str] = Header(None)
+        sort_by: str = None, sort_order: str = DESC, limit: Optional[int] = None, page_size: Optional[int] = None,
+        cursor: Optional[str] = None, fields: Optional[str] = None, tenant: Optional[str] = Header(None)
 ):
-    asset_count = min(7, limit)
-    repos = ["asset-service", "tenant-service", "finding-service", "report-service", "secret-service",
-             "workflow-service", "webhook-service"]
-    scores = [20, 10, 30, 70, 40, 5, 90]
-    statuses = ["MEDIUM", "LOW", "HIGH", "HIGH", "MEDIUM", "LOW", "HIGH"]  # Note that the statuses are arbitrary
-    assets = []
-    for i in range(asset_count):
-        assets.append(
-            get_dummy_asset(
-                partial_asset={
-                    "tenant_id": tenant,
-                    "asset_name": repos[i],
-                    "risk_score": scores[i],
-                    "risk_status": statuses[i],
-                    "asset_id": f"repo-{i}"
-                }
-            )
+    return list_response(tenant, None, None, None, sort_by, sort_order, limit, page_size, cursor, fields)
+
+
+@app.get("/asset/{asset_id}",
+         response_model=Asset,
+         status_code=status.HTTP_200_OK)
+def get_asset_by_id(asset_id: str, fields: Optional[str] = None, tenant: Optional[str] = Header(None)):
+    asset = store.get(tenant, asset_id)
+    if asset is None:
+        return not_found(f"Asset {asset_id} not found")
+    return asset_response(asset, fields)
+
+
+@app.post("/batch-get",
+          response_model=GetAssetsByIdsResponse,
+          status_code=status.HTTP_200_OK)
+def get_assets_by_ids(asset_ids: List[str], tenant: Optional[str] = Header(None)):
+    if len(asset_ids) > GET_ASSETS_BY_IDS_BATCH_SIZE:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"message": f"Up to {GET_ASSETS_BY_IDS_BATCH_SIZE} asset ids can be fetched at once"},
         )
+    assets, missing_asset_ids = store.get_many(tenant, asset_ids)
+    return JSONResponse(content={"assets": [to_response(asset) for asset in assets],
+                                 "missing_asset_ids": missing_asset_ids})
 
-    aws_asset = get_dummy_asset(
-        partial_asset={
-            "tenant_id": tenant,
-            "asset_name": "staging_account",
-            "asset_type": "aws_account",
-            "environment": "staging",
-            "vendor": "aws",
-            "asset_id": "aws-1"
-        }
-    )
-    assets.append(aws_asset)
-
-    dot_jit_asset = get_dummy_asset(
-        partial_asset={
-            "tenant_id": tenant,
-            "asset_name": ".jit",
-            "asset_type": "repo",
-            "vendor": "github",
-            "asset_id": "repo-123"
-        }
-    )
 
-    assets.append(dot_jit_asset)
+@app.get("/tag/{tag_path:path}",  # The path is matched decoded, the name and value are split by split_tag_path
+         response_model=AssetsPage,
+         status_code=status.HTTP_200_OK)
+def get_assets_by_tag(request: Request, tag_path: str, page_size: int = MAX_PAGE_SIZE, cursor: Optional[str] = None,
+                      tenant: Optional[str] = Header(None)):
+    """
+    The real service queries the tags_index (tenant_id, is_active, tags.name, tags.value, created_at),
+    so only the active assets holding the tag are returned, oldest first
+    """
+    tag_name, tag_value = split_tag_path(request, tag_path)
+    assets, next_offset = store.list_by_tag(tenant, (tag_name, tag_value), decode_cursor(cursor),
+                                            min(page_size, MAX_PAGE_SIZE))
+    return page_response(assets, next_offset)
 
-    zap_web_asset = get_dummy_asset(
-        partial_asset={
-            'asset_name': 'app1',
-            'asset_type': 'web',
-            'target_url': 'https://target_url/openapi.json',
-        }
-    )
 
-    assets.append(zap_web_asset)
+@app.get("/changes",
+         response_model=AssetChangesPage,
+         status_code=status.HTTP_200_OK)
+def get_asset_changes(since: Optional[str] = None, page_size: int = MAX_PAGE_SIZE,
+                      tenant: Optional[str] = Header(None)):
+    """
+    The real service queries the modified_index (tenant_id, modified_at, asset_id), the mock keeps a change log and
+    the watermark encodes a position in it
+    """
+    changes, position, has_more = store.list_changes(tenant, decode_cursor(since), min(page_size, MAX_PAGE_SIZE))
+    return JSONResponse(content={
+        "assets": [to_response(asset) for asset in changes if asset.get("is_active")],
+        "deleted_asset_ids": [asset["asset_id"] for asset in changes if not asset.get("is_active")],
+        "watermark": encode_cursor(position),
+        "has_more": has_more,
+    })
 
-    if sort_by == "risk_score":
-        assets.sort(key=lambda x: x.risk_score, reverse=(sort_order == DESC))
-        assets = assets[:limit]
 
-    return assets
+def generate_export_chunks(tenant: str) -> Iterator[bytes]:
+    """
+    The active assets of the tenant as newline delimited json, EXPORT_PAGE_SIZE assets per chunk
+    """
+    position: Optional[int] = 0
+    while position is not None:
+        assets, position = store.list(tenant, start=position, page_size=EXPORT_PAGE_SIZE)
+        if assets:
+            yield "".join(f"{json.dumps(to_response(asset))}\n" for asset in assets).encode()
+
 
+def gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # A gzip stream
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
 
-@app.get("/asset/{asset_id}",
-         response_model=Asset,
-         status_code=status.HTTP_200_OK)
-def get_asset_by_id(asset_id: str, tenant: Optional[str] = Header(None)):
-    return get_dummy_asset(partial_asset={"tenant_id": tenant,
-                                          "asset_id": asset_id,
-                                          })
+
+@app.get("/export", status_code=status.HTTP_200_OK)
+def export_assets(tenant: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
+    """
+    Stream all the active assets of the tenant as newline delimited json (gzip compressed when accepted).
+    The assets are read from the store a page at a time, so neither side holds the whole tenant in memory.
+    """
+    if "gzip" in (accept_encoding or ""):
+        return StreamingResponse(gzip_chunks(generate_export_chunks(tenant)), media_type=NDJSON_MEDIA_TYPE,
+                                 headers={"Content-Encoding": "gzip"})
+    return StreamingResponse(generate_export_chunks(tenant), media_type=NDJSON_MEDIA_TYPE)
 
 
 @app.get("/type/{asset_type}/vendor/{vendor}/owner/{owner}/name/{asset_name}",
@@ -140,41 +393,27 @@ def get_asset_by_id(asset_id: str, tenant: Optional[str] = Header(None)):
 def get_asset_by_key_attributes(
         asset_type: str, vendor: str, owner: str, asset_name: str, tenant: Optional[str] = Header(None)
 ):
-    return get_dummy_asset(partial_asset={"tenant_id": tenant,
-                                          "asset_type": asset_type,
-                                          "owner": owner,
-                                          "vendor": vendor,
-                                          "asset_name": asset_name
-                                          })
+    asset = store.get_by_key(tenant, (asset_type, vendor, owner, asset_name))
+    if asset is None:
+        return not_found(f"Asset {asset_type}/{vendor}/{owner}/{asset_name} not found")
+    return asset_response(asset)
 
 
 @app.get("/type/{asset_type}",
-         response_model=List[Asset],
+         response_model=Union[AssetsPage, List[Asset]],
          status_code=status.HTTP_200_OK)
 @app.get("/type/{asset_type}/vendor/{vendor}",
-         response_model=List[Asset],
+         response_model=Union[AssetsPage, List[Asset]],
          status_code=status.HTTP_200_OK)
 @app.get("/type/{asset_type}/vendor/{vendor}/owner/{owner}",
-         response_model=List[Asset],
+         response_model=Union[AssetsPage, List[Asset]],
          status_code=status.HTTP_200_OK)
 def get_assets_by_key_attributes(
-        asset_type: str, vendor: Optional[str] = None, owner: Optional[str] = None, tenant: Optional[str] = Header(None)
+        asset_type: str, vendor: Optional[str] = None, owner: Optional[str] = None, sort_by: str = None,
+        sort_order: str = DESC, page_size: Optional[int] = None, cursor: Optional[str] = None,
+        fields: Optional[str] = None, tenant: Optional[str] = Header(None)
 ):
-    return [
-        get_dummy_asset(
-            partial_asset={"tenant_id": tenant,
-                           "asset_type": asset_type,
-                           "owner": owner or "jitsecurity",
-                           "vendor": vendor or "github",
-                           "asset_name": 'asset-1'
-                           }),
-        get_dummy_asset(
-            partial_asset={"tenant_id": tenant,
-                           "asset_type": asset_type,
-                           "owner": owner or "jitsecurity",
-                           "vendor": vendor or "github",
-                           "asset_name": 'asset-2'
-                           })]
+    return list_response(tenant, asset_type, vendor, owner, sort_by, sort_order, None, page_size, cursor, fields)
 
 
 @app.patch("/asset/{asset_id}",
@@ -182,12 +421,24 @@ def get_assets_by_key_attributes(
            status_code=status.HTTP_200_OK)
 def update_asset(asset_id: str, update_request: Dict, tenant: Optional[str] = Header(None)):
     validated_update_request = UpdateAsset(**update_request, asset_id=asset_id)
-    if not validated_update_request.new_name:
-        del validated_update_request.new_name
-    return get_dummy_asset(partial_asset={"tenant_id": tenant,
-                                          "asset_id": asset_id,
-                                          **validated_update_request.dict(exclude_none=True)
-                                          })
+    try:
+        asset = store.update(tenant, asset_id, jsonable_encoder(validated_update_request, exclude_none=True))
+    except ValueError as e:  # new_name is the name of another asset
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"message": str(e)})
+    if asset is None:
+        return not_found(f"Asset {asset_id} not found")
+    return asset_response(asset)
+
+
+@app.patch("/asset/{asset_id}/tags",
+           response_model=Asset,
+           status_code=status.HTTP_200_OK)
+def update_asset_tags(asset_id: str, update_request: UpdateAssetTags, tenant: Optional[str] = Header(None)):
+    asset = store.update_tags(tenant, asset_id, jsonable_encoder(update_request.tags_to_add),
+                              jsonable_encoder(update_request.tags_to_remove))
+    if asset is None:
+        return not_found(f"Asset {asset_id} not found")
+    return asset_response(asset)
 
 
 @app.post(
@@ -195,14 +446,15 @@ def update_asset(asset_id: str, update_request: Dict, tenant: Optional[str] = He
     response_model=List[Asset],
     status_code=status.HTTP_200_OK)
 def update_multiple_assets(new_assets_fields: List[UpdateAsset], tenant: Optional[str] = Header(None)):
-    return [get_dummy_asset(partial_asset={
-        "tenant_id": tenant,
-        "asset_id": asset_fields.asset_id,
-        **asset_fields.dict(exclude_none=True)
-    }
-    ) for asset_fields in new_assets_fields]
+    """
+    The assets that are not found (or whose new_name is taken) are skipped, they are missing from the response
+    """
+    changes = [jsonable_encoder(asset_fields, exclude_none=True) for asset_fields in new_assets_fields]
+    return assets_response(store.update_many(tenant, changes))
 
 
-@app.post("/delete")
-def delete_asset(tenant: Optional[str] = Header(None)):
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+@app.post("/delete",
+          response_model=DeleteAssetsResponse,
+          status_code=status.HTTP_200_OK)
+def delete_asset(asset_ids: List[str], tenant: Optional[str] = Header(None)):
+    return DeleteAssetsResponse(deleted_asset_ids=store.delete(tenant, asset_ids))
@@ -0,0 +1,5 @@
+"""
+The asset service models, for running the mock from the repository (e.g. by benchmarks.client_suite).
+The mock image replaces this file with a copy of src/asset_service/models.py (see dockerfile-test).
+"""
+from src.asset_service.models import *  # noqa: F401,F403
@@ -0,0 +1,376 @@
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+
+from .models import TEAM_TAG
+
+AssetRecord = Dict[str, Any]  # The json of an asset, without its None fields (they are the defaults of the model)
+KeyAttributes = Tuple[str, str, str, str]  # (asset_type, vendor, owner, asset_name)
+TagKey = Tuple[str, str]  # (name, value)
+
+SYNTHETIC_ASSET_TYPES = ("repo", "repo", "repo", "repo", "aws_account", "web", "api")
+SYNTHETIC_VENDORS = {"repo": "github", "aws_account": "aws", "web": "domain", "api": "domain"}
+SYNTHETIC_OWNERS = ("jitsecurity", "jit-labs", "jit-demo")
+SYNTHETIC_RISK_STATUSES = ("LOW", "MEDIUM", "HIGH")
+SYNTHETIC_TEAMS = tuple(f"team-{i}" for i in range(50))
+SYNTHETIC_START = datetime(2023, 1, 1)
+
+
+def get_now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def get_key(asset: AssetRecord) -> KeyAttributes:
+    return asset["asset_type"], asset["vendor"], asset["owner"], asset["asset_name"]
+
+
+def get_tag_keys(asset: AssetRecord) -> List[TagKey]:
+    return [(tag["name"], tag["value"]) for tag in asset.get("tags", [])]
+
+
+def to_record(data: Dict[str, Any]) -> AssetRecord:
+    """
+    teams is computed from the tags when the asset is returned, it is never stored
+    """
+    return {name: value for name, value in data.items() if value is not None and name != "teams"}
+
+
+def to_response(asset: AssetRecord, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    response = {**asset, "teams": [value for name, value in get_tag_keys(asset) if name == TEAM_TAG]}
+    if fields:
+        return {name: response[name] for name in fields if name in response}
+    return response
+
+
+def generate_assets(tenant_id: str, count: int, rng: random.Random) -> Iterator[AssetRecord]:
+    """
+    Synthetic assets of a tenant, the same rng seed always generates the same assets
+    """
+    for index in range(count):
+        asset_type = rng.choice(SYNTHETIC_ASSET_TYPES)
+        created_at = (SYNTHETIC_START + timedelta(seconds=index)).isoformat()
+        asset = {
+            "asset_id": str(UUID(int=rng.getrandbits(128), version=4)),
+            "tenant_id": tenant_id,
+            "asset_type": asset_type,
+            "vendor": SYNTHETIC_VENDORS[asset_type],
+            "owner": rng.choice(SYNTHETIC_OWNERS),
+            "asset_name": f"{asset_type}-{index}",
+            "risk_status": rng.choice(SYNTHETIC_RISK_STATUSES),
+            "risk_score": rng.randint(0, 100),
+            "score": rng.randint(0, 100),
+            "is_active": True,
+            "is_covered": rng.random() > 0.2,
+            "created_at": created_at,
+            "modified_at": created_at,
+            "tags": [{"name": TEAM_TAG, "value": team} for team in rng.sample(SYNTHETIC_TEAMS, rng.randint(0, 2))],
+        }
+        if asset_type == "aws_account":
+            asset.update(aws_account_id=str(rng.randint(10 ** 11, 10 ** 12 - 1)), environment="prod")
+        elif asset_type in ("web", "api"):
+            asset["target_url"] = f"https://app-{index}.example.com"
+        yield asset
+
+
+class TenantAssets:
+    """
+    The assets of a single tenant and their indexes. Deletes are soft (is_active is cleared, like the real service),
+    so the ids only grow and a position in ids is a stable cursor.
+    Records are never changed in place, an update replaces the record, so a read can serialize what it got
+    without holding the lock.
+    """
+
+    def __init__(self) -> None:
+        self.by_id: Dict[str, AssetRecord] = {}
+        self.ids: List[str] = []  # Creation order
+        self.positions: Dict[str, int] = {}
+        self.ids_by_key: Dict[KeyAttributes, str] = {}
+        self.ids_by_type: Dict[str, List[str]] = {}  # Creation order
+        self.ids_by_tag: Dict[TagKey, Dict[str, None]] = {}  # Ordered sets
+        # The ids holding a tag in creation order, built on the first read of the tag after its holders changed,
+        # so paging through a tag doesn't sort its holders again for every page
+        self._sorted_ids_by_tag: Dict[TagKey, List[str]] = {}
+        self.changes: List[str] = []  # The ids of the changed assets in the order of the changes
+        self.last_changes: Dict[str, int] = {}  # The position in changes of the last change of every asset
+
+    def _index_tags(self, asset_id: str, previous_tags: Iterable[TagKey], tags: Iterable[TagKey]) -> None:
+        previous_tags, tags = set(previous_tags), set(tags)
+        for tag in previous_tags - tags:
+            self.ids_by_tag[tag].pop(asset_id, None)
+            self._sorted_ids_by_tag.pop(tag, None)
+        for tag in tags - previous_tags:
+            self.ids_by_tag.setdefault(tag, {})[asset_id] = None
+            self._sorted_ids_by_tag.pop(tag, None)
+
+    def get_ids_by_tag(self, tag: TagKey) -> List[str]:
+        """
+        The ids of the assets holding the tag, in creation order
+        """
+        if tag not in self.ids_by_tag:
+            return []
+        if tag not in self._sorted_ids_by_tag:
+            self._sorted_ids_by_tag[tag] = sorted(self.ids_by_tag[tag], key=self.positions.__getitem__)
+        return self._sorted_ids_by_tag[tag]
+
+    def _log_change(self, asset_id: str) -> None:
+        self.last_changes[asset_id] = len(self.changes)
+        self.changes.append(asset_id)
+
+    def add(self, asset: AssetRecord) -> None:
+        asset_id = asset["asset_id"]
+        if self.ids_by_key.get(get_key(asset), asset_id) != asset_id:
+            raise ValueError(f"Another asset has the key attributes {get_key(asset)}")
+
+        self.positions[asset_id] = len(self.ids)
+        self.ids.append(asset_id)
+        self.ids_by_type.setdefault(asset["asset_type"], []).append(asset_id)
+        self.ids_by_key[get_key(asset)] = asset_id
+        self._index_tags(asset_id, (), get_tag_keys(asset))
+        self.by_id[asset_id] = asset
+        self._log_change(asset_id)
+
+    def replace(self, asset: AssetRecord) -> None:
+        """
+        Replace an existing asset with a new version of it (same asset_id and asset_type)
+        """
+        asset_id = asset["asset_id"]
+        previous = self.by_id[asset_id]
+        if get_key(previous) != get_key(asset):
+            if self.ids_by_key.get(get_key(asset), asset_id) != asset_id:
+                raise ValueError(f"Another asset has the key attributes {get_key(asset)}")
+            del self.ids_by_key[get_key(previous)]
+            self.ids_by_key[get_key(asset)] = asset_id
+        self._index_tags(asset_id, get_tag_keys(previous), get_tag_keys(asset))
+        self.by_id[asset_id] = asset
+        self._log_change(asset_id)
+
+    def get_active(self, asset_id: str) -> Optional[AssetRecord]:
+        asset = self.by_id.get(asset_id)
+        return asset if asset and asset.get("is_active") else None
+
+    def scan(self, ids: Sequence[str], start: int, page_size: Optional[int],
+             match: Callable[[AssetRecord], bool]) -> Tuple[List[AssetRecord], Optional[int]]:
+        """
+        The matching active assets from position start of ids, and the position to continue from (None at the end)
+        """
+        assets: List[AssetRecord] = []
+        for position in range(start, len(ids)):
+            if page_size is not None and len(assets) == page_size:
+                return assets, position
+            asset = self.by_id[ids[position]]
+            if asset.get("is_active") and match(asset):
+                assets.append(asset)
+        return assets, None
+
+
+class AssetStore:
+    """
+    A thread safe in-memory asset store with the semantics of the asset service, indexed by tenant and then by
+    asset_id, by the key attributes, by asset_type and by tag, so reads don't scan the assets of other tenants
+    (or other types and tags).
+    """
+
+    def __init__(self) -> None:
+        self._tenants: Dict[str, TenantAssets] = {}
+        self._lock = threading.RLock()
+
+    def _get_tenant(self, tenant_id: str) -> TenantAssets:
+        return self._tenants.setdefault(tenant_id, TenantAssets())
+
+    def _find_tenant(self, tenant_id: str) -> TenantAssets:
+        """
+        For reads, so reading an unknown tenant doesn't store it
+        """
+        return self._tenants.get(tenant_id) or TenantAssets()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tenants = {}
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            tenants = list(self._tenants.values())
+            return {
+                "tenants": len(tenants),
+                "assets": sum(len(tenant.ids) for tenant in tenants),
+                "active_assets": sum(1 for tenant in tenants for asset in tenant.by_id.values()
+                                     if asset.get("is_active")),
+            }
+
+    def insert(self, tenant_id: str, assets: Iterable[Dict[str, Any]]) -> int:
+        """
+        Store assets as they are (an asset with an existing asset_id replaces it), used to load fixtures
+        """
+        count = 0
+        with self._lock:
+            tenant = self._get_tenant(tenant_id)
+            for asset in assets:
+                record = {**to_record(asset), "tenant_id": tenant_id}
+                if record["asset_id"] in tenant.by_id:
+                    tenant.replace(record)
+                else:
+                    tenant.add(record)
+                count += 1
+        return count
+
+    def seed(self, tenant_ids: Sequence[str], assets_per_tenant: int, random_seed: int = 0) -> int:
+        rng = random.Random(random_seed)
+        return sum(self.insert(tenant_id, generate_assets(tenant_id, assets_per_tenant, rng))
+                   for tenant_id in tenant_ids)
+
+    def get(self, tenant_id: str, asset_id: str) -> Optional[AssetRecord]:
+        with self._lock:
+            return self._find_tenant(tenant_id).get_active(asset_id)
+
+    def get_by_key(self, tenant_id: str, key: KeyAttributes) -> Optional[AssetRecord]:
+        with self._lock:
+            tenant = self._find_tenant(tenant_id)
+            asset_id = tenant.ids_by_key.get(key)
+            return tenant.get_active(asset_id) if asset_id else None
+
+    def get_many(self, tenant_id: str, asset_ids: Sequence[str]) -> Tuple[List[AssetRecord], List[str]]:
+        """
+        The found assets and the ids of the missing ones
+        """
+        with self._lock:
+            tenant = self._find_tenant(tenant_id)
+            assets = {asset_id: tenant.get_active(asset_id) for asset_id in asset_ids}
+        return ([asset for asset in assets.values() if asset],
+                [asset_id for asset_id, asset in assets.items() if asset is None])
+
+    def list(self, tenant_id: str, asset_type: Optional[str] = None, vendor: Optional[str] = None,
+             owner: Optional[str] = None, start: int = 0,
+             page_size: Optional[int] = None) -> Tuple[List[AssetRecord], Optional[int]]:
+        """
+        The active assets of a tenant (of a type, vendor and owner) in creation order, from position start.
+        Returns up to page_size assets (all by default) and the position of the next page, None after the last page.
+        """
+        def match(asset: AssetRecord) -> bool:
+            return (vendor is None or asset["vendor"] == vendor) and (owner is None or asset["owner"] == owner)
+
+        with self._lock:
+            tenant = self._find_tenant(tenant_id)
+            ids = tenant.ids_by_type.get(asset_type, []) if asset_type else tenant.ids
+            return tenant.scan(ids, start, page_size, match)
+
+    def list_by_tag(self, tenant_id: str, tag: TagKey, start: int = 0,
+                    page_size: Optional[int] = None) -> Tuple[List[AssetRecord], Optional[int]]:
+        """
+        The active assets holding the tag oldest first, paginated like list
+        """
+        with self._lock:
+            tenant = self._find_tenant(tenant_id)
+            return tenant.scan(tenant.get_ids_by_tag(tag), start, page_size, lambda asset: True)
+
+    def list_changes(self, tenant_id: str, since: int, page_size: int) -> Tuple[List[AssetRecord], int, bool]:
+        """
+        The assets changed after position since of the change log (deleted ones included) in the order of their
+        changes, only the last change of an asset is returned. Returns up to page_size assets, the position to
+        continue from (the new watermark) and whether there are more changes after it.
+        """
+        with self._lock:
+            tenant = self._find_tenant(tenant_id)
+            assets: List[AssetRecord] = []
+            position = since
+            while position < len(tenant.changes) and len(assets) < page_size:
+                asset_id = tenant.changes[position]
+                if tenant.last_changes[asset_id] == position:
+                    assets.append(tenant.by_id[asset_id])
+                position += 1
+            return assets, position, position < len(tenant.changes)
+
+    def create(self, tenant_id: str, assets: Sequence[Dict[str, Any]]) -> List[AssetRecord]:
+        """
+        Create assets, an asset with the key attributes of an existing one updates and reactivates it
+        """
+        now = get_now()
+        created = []
+        with self._lock:
+            tenant = self._get_tenant(tenant_id)
+            for asset in assets:
+                record = to_record(asset)
+                existing_id = tenant.ids_by_key.get(get_key(record))
+                if existing_id:
+                    record = {**tenant.by_id[existing_id], **record, "is_active": True, "modified_at": now}
+                    tenant.replace(record)
+                else:
+                    record = {"asset_id": str(uuid4()), "tenant_id": tenant_id, "risk_score": 0, "is_active": True,
+                              "is_covered": True, "created_at": now, "modified_at": now, **record}
+                    tenant.add(record)
+                created.append(record)
+        return created
+
+    def _apply_update(self, tenant: TenantAssets, asset: AssetRecord, changes: Dict[str, Any]) -> AssetRecord:
+        changes = dict(changes)
+        new_name = changes.pop("new_name", None)
+        teams = changes.pop("teams", None)
+        changes.pop("asset_id", None)
+        updated = {**asset, **to_record(changes), "modified_at": get_now()}
+        if new_name:
+            updated["asset_name"] = new_name
+        if teams is not None:
+            updated["tags"] = ([tag for tag in updated.get("tags", []) if tag["name"] != TEAM_TAG] +
+                               [{"name": TEAM_TAG, "value": team} for team in teams])
+        tenant.replace(updated)
+        return updated
+
+    def update(self, tenant_id: str, asset_id: str, changes: Dict[str, Any]) -> Optional[AssetRecord]:
+        """
+        Apply the not None fields of changes to an active asset, new_name renames it and teams replaces its team tags.
+        Returns the updated asset, None if it wasn't found. Raises ValueError when new_name is taken.
+        """
+        with self._lock:
+            tenant = self._get_tenant(tenant_id)
+            asset = tenant.get_active(asset_id)
+            return self._apply_update(tenant, asset, changes) if asset else None
+
+    def update_many(self, tenant_id: str, changes: Sequence[Dict[str, Any]]) -> List[AssetRecord]:
+        """
+        Apply update to every asset of changes (by its asset_id), the assets that weren't found (or whose new_name
+        is taken) are skipped. Returns the updated assets.
+        """
+        with self._lock:
+            tenant = self._get_tenant(tenant_id)
+            updated = []
+            for asset_changes in changes:
+                asset = tenant.get_active(asset_changes["asset_id"])
+                if asset is None:
+                    continue
+                try:
+                    updated.append(self._apply_update(tenant, asset, asset_changes))
+                except ValueError:
+                    continue
+            return updated
+
+    def update_tags(self, tenant_id: str, asset_id: str, tags_to_add: Sequence[Dict[str, str]],
+                    tags_to_remove: Sequence[Dict[str, str]]) -> Optional[AssetRecord]:
+        """
+        Add and remove tags atomically, tags that are in both lists are removed
+        """
+        with self._lock:
+            tenant = self._get_tenant(tenant_id)
+            asset = tenant.get_active(asset_id)
+            if asset is None:
+                return None
+            tags = [tag for tag in asset.get("tags", []) if tag not in tags_to_remove]
+            tags += [tag for tag in tags_to_add if tag not in tags and tag not in tags_to_remove]
+            updated = {**asset, "tags": tags, "modified_at": get_now()}
+            tenant.replace(updated)
+            return updated
+
+    def delete(self, tenant_id: str, asset_ids: Sequence[str]) -> List[str]:
+        """
+        Deactivate assets, returns the ids of the assets that were active
+        """
+        now = get_now()
+        deleted = []
+        with self._lock:
+            tenant = self._get_tenant(tenant_id)
+            for asset_id in dict.fromkeys(asset_ids):
+                asset = tenant.get_active(asset_id)
+                if asset:
+                    tenant.replace({**asset, "is_active": False, "modified_at": now})
+                    deleted.append(asset_id)
+        return deleted
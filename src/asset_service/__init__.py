@@ -0,0 +1,61 @@
+"""
+The asset service client package.
+
+The public names are loaded on first access (PEP 562), so e.g. `from src.asset_service import Asset` loads only the
+models and not the http stack of the clients. This keeps the cold start of the lambdas that depend on us short.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:  # Lets type checkers and IDEs resolve the lazily loaded names
+    from .async_client import AsyncAssetService  # noqa: F401
+    from .cache import AssetCache, ResponseCache  # noqa: F401
+    from .client import AssetService  # noqa: F401
+    from .exceptions import (AssetNotFoundException, AssetServiceApiException, ConflictException,  # noqa: F401
+                             RequestValidationException, UnauthorizedException, UnhandledException)
+    from .frame import AssetFrame  # noqa: F401
+    from .instrumentation import EmfExporter, HistogramCollector, Instrumentation, InstrumentationGroup  # noqa: F401
+    from .models import (Asset, AssetChangesPage, AssetsPage, BulkWriteResult, CreateAssetRequest,  # noqa: F401
+                         LimitedAsset, PartialAsset, UpdateAsset, UpdateAssetRequest, UpdateAssetTags)
+
+_MODULE_BY_NAME: Dict[str, str] = {
+    "AssetService": ".client",
+    "AsyncAssetService": ".async_client",
+    "AssetCache": ".cache",
+    "ResponseCache": ".cache",
+    "AssetFrame": ".frame",
+    "AssetNotFoundException": ".exceptions",
+    "AssetServiceApiException": ".exceptions",
+    "ConflictException": ".exceptions",
+    "RequestValidationException": ".exceptions",
+    "UnauthorizedException": ".exceptions",
+    "UnhandledException": ".exceptions",
+    "EmfExporter": ".instrumentation",
+    "HistogramCollector": ".instrumentation",
+    "Instrumentation": ".instrumentation",
+    "InstrumentationGroup": ".instrumentation",
+    "Asset": ".models",
+    "AssetChangesPage": ".models",
+    "AssetsPage": ".models",
+    "BulkWriteResult": ".models",
+    "CreateAssetRequest": ".models",
+    "LimitedAsset": ".models",
+    "PartialAsset": ".models",
+    "UpdateAsset": ".models",
+    "UpdateAssetRequest": ".models",
+    "UpdateAssetTags": ".models",
+}
+
+__all__ = list(_MODULE_BY_NAME)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _MODULE_BY_NAME:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_MODULE_BY_NAME[name], __name__), name)
+    globals()[name] = value  # Later accesses don't go through __getattr__
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,259 @@
+import asyncio
+from http import HTTPStatus
+from typing import Any, Dict, List, Literal, Optional
+
+import httpx
+from jit_utils.logger import logger
+
+from .constants import ASSET_SERVICE_NAME, DEFAULT_MAX_CONCURRENCY, DEFAULT_TIMEOUT_SECONDS, TENANT_HEADER
+from .endpoints import (ASSET_SERVICE_GET_ALL_ASSETS, ASSET_SERVICE_GET_ASSET_BY_ID,
+                        ASSET_SERVICE_PATCH_MULTIPLE_ASSETS, ASSET_SERVICE_GET_ASSET_BY_ATTRIBUTES,
+                        ASSET_SERVICE_DELETE_ASSETS, get_asset_service_url)
+from .discovery import service_url_cache
+from .models import Asset, CreateAssetRequest, CreateAssetsResponse, DeleteAssetsResponse, UpdateAsset
+from .exceptions import raise_for_status
+
+
+class AsyncAssetService:
+    """
+    Asyncio flavour of AssetService, all requests share a single pooled connection pool and at most
+    max_concurrency requests are in flight at the same time, so callers can freely asyncio.gather many calls.
+
+    Usage:
+        async with AsyncAssetService(max_concurrency=100) as asset_service:
+            assets = await asyncio.gather(*[asset_service.get_asset(tenant_id, asset_id, api_token)
+                                            for asset_id in asset_ids])
+    """
+
+    @staticmethod
+    def _validate_response(response: httpx.Response) -> httpx.Response:
+        """
+        Validate the response from the asset service, raises the same exceptions as AssetService._validate_response
+        """
+        if not response.is_success:
+            logger.error(f"Error response from asset service: {response.text} {response.status_code}")
+            raise_for_status(response.status_code, response.text)
+        return response
+
+    def __init__(self,
+                 test_mode: bool = False,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                 trusted_responses: bool = False) -> None:
+        self.test_mode = test_mode
+        self.max_concurrency = max_concurrency
+        self.trusted_responses = trusted_responses
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,  # Same as requests, which the sync client is built on
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        # Created lazily, on python 3.8 a semaphore is bound to the event loop that is current when it is created
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncAssetService":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    @property
+    def service(self) -> str:
+        """
+        The url of the asset service, taken from the process cache on every request, so an url invalidated after a
+        connection error or refreshed in the background reaches long lived clients (e.g. the one of the registry)
+        """
+        return get_asset_service_url(self.test_mode)
+
+    def _parse_asset(self, data: Dict[str, Any]) -> Asset:
+        if self.trusted_responses:
+            return Asset.construct_trusted(data)
+        return Asset(**data)
+
+    async def _request(self, method: str, url: str, tenant_id: str, api_token: str, **kwargs: Any) -> httpx.Response:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            try:
+                response = await self._client.request(
+                    method,
+                    url,
+                    headers={"Authorization": f"Bearer {api_token}", TENANT_HEADER: tenant_id},
+                    **kwargs,
+                )
+            except httpx.ConnectError:
+                # The service may have moved, the next requests resolve its url again
+                service_url_cache.invalidate(ASSET_SERVICE_NAME, self.test_mode)
+                raise
+        return self._validate_response(response)
+
+    async def get_asset(self, tenant_id: str, asset_id: str, api_token: str) -> Asset:
+        """
+        Get asset by asset id
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the asset to be retrieved
+            asset_id(str): the asset id of the asset to be retrieved
+            api_token(str): the api token of the user making the request
+
+        Returns:
+            Asset: the asset object
+        """
+        logger.info(f"Getting asset with {asset_id=}")
+        url = ASSET_SERVICE_GET_ASSET_BY_ID.format(asset_service=self.service, asset_id=asset_id)
+        response = await self._request("GET", url, tenant_id, api_token)
+
+        return self._parse_asset(response.json())
+
+    async def get_many_assets(self, tenant_id: str, asset_ids: List[str], api_token: str) -> List[Asset]:
+        """
+        Get assets by asset ids, the requests are sent concurrently (bounded by max_concurrency)
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be retrieved
+            asset_ids(List[str]): the asset ids of the assets to be retrieved
+            api_token(str): the api token of the user making the request
+
+        Returns:
+            List[Asset]: the asset objects, in the order of asset_ids
+        """
+        return list(await asyncio.gather(*[self.get_asset(tenant_id, asset_id, api_token) for asset_id in asset_ids]))
+
+    async def get_asset_by_attributes(
+            self, tenant_id: str, asset_type: str, vendor: str, owner: str, asset_name: str, api_token: str
+    ) -> Asset:
+        """
+        Get asset by asset attributes
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the asset to be retrieved
+            asset_type(str): the asset type of the asset to be retrieved
+            vendor(str): the vendor of the asset to be retrieved
+            owner(str): the owner of the asset to be retrieved
+            asset_name(str): the asset name of the asset to be retrieved
+            api_token(str): the api token of the user making the request
+
+        Returns:
+            Asset: the asset object
+        """
+        logger.info(f"Getting asset with {asset_type=} {vendor=}, {owner=} and {asset_name=}")
+        url = ASSET_SERVICE_GET_ASSET_BY_ATTRIBUTES.format(
+            asset_service=self.service,
+            asset_type=asset_type,
+            vendor=vendor,
+            owner=owner,
+            asset_name=asset_name,
+        )
+        response = await self._request("GET", url, tenant_id, api_token)
+
+        return self._parse_asset(response.json())
+
+    async def get_all_assets(self,
+                             tenant_id: str,
+                             api_token: str,
+                             sort_by: Optional[Literal['risk_score']] = None,
+                             sort_order: Optional[Literal['asc', 'desc']] = None,
+                             limit: Optional[int] = None
+                             ) -> List[Asset]:
+        """
+        Get all assets for a tenant
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be retrieved
+            api_token(str): the api token of the user making the request
+            sort_by(str): the field to sort by (optional, can be only risk_score)
+            sort_order(str): the sort order (optional, can be only asc or desc)
+            limit(int): the number of assets to return (optional)
+
+        Returns:
+            List[Asset]: the list of assets
+        """
+        logger.info(f"Getting all assets for {tenant_id=}")
+        url = ASSET_SERVICE_GET_ALL_ASSETS.format(asset_service=self.service)
+        params = {
+            "sort_by": sort_by,
+            "sort_order": sort_order,
+            "limit": limit,
+        }
+        existing_params = {k: v for k, v in params.items() if v is not None}
+        response = await self._request("GET", url, tenant_id, api_token, params=existing_params or None)
+
+        return [self._parse_asset(asset) for asset in response.json()]
+
+    async def get_all_assets_for_tenants(self, api_tokens: Dict[str, str]) -> Dict[str, List[Asset]]:
+        """
+        Get all assets for many tenants, the requests are sent concurrently (bounded by max_concurrency)
+
+        Parameters:
+            api_tokens(Dict[str, str]): the api token to use for each tenant id
+
+        Returns:
+            Dict[str, List[Asset]]: the list of assets of each tenant id
+        """
+        tenant_ids = list(api_tokens)
+        tenants_assets = await asyncio.gather(
+            *[self.get_all_assets(tenant_id, api_tokens[tenant_id]) for tenant_id in tenant_ids]
+        )
+        return dict(zip(tenant_ids, tenants_assets))
+
+    async def create_asset(self, tenant_id: str, assets: List[CreateAssetRequest],
+                           api_token: str) -> CreateAssetsResponse:
+        """
+        Create assets
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be created
+            assets(List[CreateAssetRequest]): the list of assets to be created
+            api_token(str): the api token of the user making the request
+
+        Returns:
+            CreateAssetsResponse: the response object of the create assets request
+        """
+        logger.info(f"Creating {len(assets)} assets with {tenant_id=}")
+        response = await self._request("POST", self.service, tenant_id, api_token,
+                                       json=[asset.dict() for asset in assets])
+
+        return CreateAssetsResponse(**response.json())
+
+    async def update_multiple_assets(self, tenant_id: str, assets: List[UpdateAsset], api_token: str) -> List[Asset]:
+        """
+        Update multiple assets
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be updated
+            assets(List[UpdateAsset]): the list of assets to be updated
+            api_token(str): the api token of the user making the request
+
+        Returns:
+            List[Asset]: the list of updated assets
+        """
+        logger.info(f"Updating {len(assets)} assets with {tenant_id=}")
+        url = ASSET_SERVICE_PATCH_MULTIPLE_ASSETS.format(asset_service=self.service)
+        response = await self._request("POST", url, tenant_id, api_token, json=[asset.dict() for asset in assets])
+
+        return [self._parse_asset(asset_data) for asset_data in response.json()]
+
+    async def delete_assets(self, tenant_id: str, asset_ids: List[str], api_token: str) -> int:
+        """
+        Delete assets by asset ids
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be deleted
+            asset_ids(List[str]): the list of asset ids to be deleted
+            api_token(str): the api token of the user making the request
+
+        Returns:
+            int: the number of deleted assets
+        """
+        logger.info(f"Deleting {len(asset_ids)} assets with {tenant_id=}")
+        url = ASSET_SERVICE_DELETE_ASSETS.format(asset_service=self.service)
+        response = await self._request("POST", url, tenant_id, api_token, json=asset_ids)
+
+        if response.status_code == HTTPStatus.NO_CONTENT:
+            # Older deployments don't report which assets were deleted
+            return len(asset_ids)
+        return len(DeleteAssetsResponse(**response.json()).deleted_asset_ids)
@@ -0,0 +1,82 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from jit_utils.logger import logger
+
+from .exceptions import RequestValidationException
+from .models import BulkWriteFailure, BulkWriteResult
+
+# Sends the items at the given positions and returns the positions of the items that were actually written
+SendChunk = Callable[[List[int]], List[int]]
+
+
+def split_to_chunks(payloads: List[Any], chunk_size: int, max_chunk_bytes: int) -> List[List[int]]:
+    """
+    Split the payloads into chunks of positions, each chunk holds at most chunk_size items
+    and its serialized json body is at most max_chunk_bytes (unless a single item is bigger than that).
+    """
+    chunks: List[List[int]] = []
+    current_chunk: List[int] = []
+    current_chunk_bytes = 0
+    for index, payload in enumerate(payloads):
+        payload_bytes = len(json.dumps(payload, default=str)) + 1  # +1 for the separator in the json list
+        is_chunk_full = len(current_chunk) >= chunk_size or current_chunk_bytes + payload_bytes > max_chunk_bytes
+        if current_chunk and is_chunk_full:
+            chunks.append(current_chunk)
+            current_chunk, current_chunk_bytes = [], 0
+        current_chunk.append(index)
+        current_chunk_bytes += payload_bytes
+
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def _write_chunk(send_chunk: SendChunk, chunk: List[int], asset_ids: List[Optional[str]]) -> BulkWriteResult:
+    try:
+        written = set(send_chunk(chunk))
+    except RequestValidationException as e:
+        if len(chunk) == 1:
+            index = chunk[0]
+            return BulkWriteResult(failed=[BulkWriteFailure(index=index, asset_id=asset_ids[index], error=str(e))])
+        # A single invalid item fails the whole request, bisect the chunk to isolate the invalid items
+        middle = len(chunk) // 2
+        first_half = _write_chunk(send_chunk, chunk[:middle], asset_ids)
+        second_half = _write_chunk(send_chunk, chunk[middle:], asset_ids)
+        return BulkWriteResult(succeeded=first_half.succeeded + second_half.succeeded,
+                               failed=first_half.failed + second_half.failed)
+    except Exception as e:
+        logger.exception(f"Failed to write a chunk of {len(chunk)} assets")
+        return BulkWriteResult(failed=[BulkWriteFailure(index=index, asset_id=asset_ids[index], error=str(e))
+                                       for index in chunk])
+
+    return BulkWriteResult(
+        succeeded=[index for index in chunk if index in written],
+        failed=[BulkWriteFailure(index=index, asset_id=asset_ids[index], error="The asset was not written")
+                for index in chunk if index not in written],
+    )
+
+
+def run_bulk_write(send_chunk: SendChunk, chunks: List[List[int]], asset_ids: List[Optional[str]],
+                   parallelism: int) -> BulkWriteResult:
+    """
+    Send the chunks concurrently and collect the outcome of every item
+
+    Parameters:
+        send_chunk(SendChunk): sends a single chunk, returns the positions of the items that were written
+        chunks(List[List[int]]): the chunks of item positions to send
+        asset_ids(List[Optional[str]]): the asset id of every item (None when unknown), used for reporting
+        parallelism(int): the maximal number of chunks sent at the same time
+
+    Returns:
+        BulkWriteResult: the positions of the written items and the failure reason of the others
+    """
+    result = BulkWriteResult()
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(chunks)))) as executor:
+        for chunk_result in executor.map(lambda chunk: _write_chunk(send_chunk, chunk, asset_ids), chunks):
+            result.succeeded.extend(chunk_result.succeeded)
+            result.failed.extend(chunk_result.failed)
+
+    logger.info(f"Bulk write finished with {len(result.succeeded)} succeeded and {len(result.failed)} failed items")
+    return result
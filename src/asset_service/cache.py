@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+
+from .constants import DEFAULT_ASSET_CACHE_MAX_SIZE, DEFAULT_ASSET_CACHE_TTL_SECONDS, DEFAULT_RESPONSE_CACHE_MAX_SIZE
+from .models import Asset
+
+AssetIdKey = Tuple[str, str]  # (tenant_id, asset_id)
+AssetAttributesKey = Tuple[str, str, str, str, str]  # (tenant_id, asset_type, vendor, owner, asset_name)
+
+
+class _CacheEntry(NamedTuple):
+    asset: Asset
+    attributes_key: AssetAttributesKey
+    expires_at: float
+
+
+def get_attributes_key(tenant_id: str, asset_type: str, vendor: str, owner: str,
+                       asset_name: str) -> AssetAttributesKey:
+    """
+    The key attributes of an asset (see AssetKeyAttributes) as a hashable tuple
+    """
+    return tenant_id, asset_type, vendor, owner, asset_name
+
+
+class AssetCache:
+    """
+    A bounded, thread safe, read-through cache of assets for AssetService.
+    Entries are reachable both by (tenant_id, asset_id) and by the asset key attributes, expire after ttl_seconds
+    and the least recently used entry is evicted once max_size is reached.
+    Assets are copied in and out of the cache, so callers mutating a returned asset never corrupt the cache.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_ASSET_CACHE_MAX_SIZE,
+                 ttl_seconds: float = DEFAULT_ASSET_CACHE_TTL_SECONDS) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[AssetIdKey, _CacheEntry]" = OrderedDict()
+        self._attributes_index: Dict[AssetAttributesKey, AssetIdKey] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, tenant_id: str, asset_id: str) -> Optional[Asset]:
+        with self._lock:
+            return self._get((tenant_id, asset_id))
+
+    def get_by_attributes(self, tenant_id: str, asset_type: str, vendor: str, owner: str,
+                          asset_name: str) -> Optional[Asset]:
+        attributes_key = get_attributes_key(tenant_id, asset_type, vendor, owner, asset_name)
+        with self._lock:
+            id_key = self._attributes_index.get(attributes_key)
+            if id_key is None:
+                self.misses += 1
+                return None
+            return self._get(id_key)
+
+    def put(self, asset: Asset) -> None:
+        id_key = (asset.tenant_id, asset.asset_id)
+        attributes_key = get_attributes_key(asset.tenant_id, asset.asset_type, asset.vendor, asset.owner,
+                                            asset.asset_name)
+        entry = _CacheEntry(asset.copy(deep=True), attributes_key, time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            # The asset may have been renamed, so its previous attributes key must not point to it anymore
+            self._remove(id_key)
+            self._entries[id_key] = entry
+            self._attributes_index[attributes_key] = id_key
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tenant_id: str, asset_id: str) -> None:
+        with self._lock:
+            self._remove((tenant_id, asset_id))
+
+    def invalidate_by_attributes(self, tenant_id: str, asset_type: str, vendor: str, owner: str,
+                                 asset_name: str) -> None:
+        attributes_key = get_attributes_key(tenant_id, asset_type, vendor, owner, asset_name)
+        with self._lock:
+            id_key = self._attributes_index.get(attributes_key)
+            if id_key is not None:
+                self._remove(id_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._attributes_index.clear()
+
+    def _get(self, id_key: AssetIdKey) -> Optional[Asset]:
+        entry = self._entries.get(id_key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                self._remove(id_key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(id_key)
+        self.hits += 1
+        return entry.asset.copy(deep=True)
+
+    def _remove(self, id_key: AssetIdKey) -> None:
+        entry = self._entries.pop(id_key, None)
+        if entry is not None and self._attributes_index.get(entry.attributes_key) == id_key:
+            del self._attributes_index[entry.attributes_key]
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+    content_type: Optional[str]
+
+
+class ResponseCache:
+    """
+    A bounded, thread safe, LRU cache of the ETag and the body of read requests, used by AssetService to send
+    conditional requests (If-None-Match) and to rebuild the result from the cached body when the server answers 304.
+    The bodies are immutable bytes, so the results built from them never share state.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_RESPONSE_CACHE_MAX_SIZE) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            cached_response = self._entries.get(key)
+            if cached_response is not None:
+                self._entries.move_to_end(key)
+            return cached_response
+
+    def put(self, key: Hashable, etag: str, body: bytes, content_type: Optional[str]) -> None:
+        with self._lock:
+            self._entries[key] = CachedResponse(etag, body, content_type)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def record(self, not_modified: bool) -> None:
+        with self._lock:
+            if not_modified:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
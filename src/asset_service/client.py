@@ -1,23 +1,47 @@
+import json
+import time
+from contextlib import closing
 from http import HTTPStatus
-from typing import List, Literal, Optional
+from pathlib import Path
+from typing import (TYPE_CHECKING, Any, BinaryIO, Callable, Dict, Iterator, List, Literal, Optional, Sequence, Tuple,
+                    TypeVar, Union, overload)
+from urllib.parse import quote
 
 from jit_utils.logger import logger
+from jit_utils.models.tags.entities import Tag
 
-from jit_utils.service_discovery import get_service_url
-from jit_utils.requests.requests_client import get_session, requests
-from jit_utils.service_discovery.test_utils import get_test_service_url
-
-from .constants import TENANT_HEADER
+from .bulk import run_bulk_write, split_to_chunks
+from .cache import AssetCache, ResponseCache
+from .constants import (ASSET_SERVICE_NAME, BULK_WRITE_CHUNK_SIZE, BULK_WRITE_MAX_CHUNK_BYTES, BULK_WRITE_PARALLELISM,
+                        DEFAULT_PAGE_SIZE, DEFAULT_PAYLOAD_LOG_SAMPLE_RATE, EXPORT_READ_CHUNK_BYTES,
+                        GET_ASSETS_BY_IDS_BATCH_SIZE, TENANT_HEADER)
 from .endpoints import (ASSET_SERVICE_GET_ALL_ASSETS, ASSET_SERVICE_GET_ASSET_BY_ID, ASSET_SERVICE_PATCH_ASSET,
                         ASSET_SERVICE_PATCH_MULTIPLE_ASSETS, ASSET_SERVICE_GET_ASSET_BY_ATTRIBUTES,
-                        ASSET_SERVICE_DELETE_ASSETS, ASSET_SERVICE_GET_ASSETS_BY_ATTRIBUTES_BASE)
-from .models import Asset, CreateAssetRequest, CreateAssetsResponse, UpdateAssetRequest, UpdateAsset
-from .exceptions import RequestValidationException, AssetNotFoundException, UnhandledException
+                        ASSET_SERVICE_DELETE_ASSETS, ASSET_SERVICE_GET_ASSETS_BY_ATTRIBUTES_BASE,
+                        ASSET_SERVICE_GET_ASSETS_BY_IDS, ASSET_SERVICE_PATCH_ASSET_TAGS,
+                        ASSET_SERVICE_GET_ASSETS_BY_TAG, ASSET_SERVICE_GET_ASSET_CHANGES, ASSET_SERVICE_EXPORT_ASSETS,
+                        get_asset_service_url)
+from .models import (TEAM_TAG, Asset, AssetChangesPage, AssetsPage, BulkWriteResult, CreateAssetRequest,
+                     CreateAssetsResponse, DeleteAssetsResponse, GetAssetsByIdsResponse, PartialAsset,
+                     UpdateAssetRequest, UpdateAsset, UpdateAssetTags, get_partial_asset_model)
+from .discovery import service_url_cache
+from .encoding import (NDJSON_MEDIA_TYPE, Compression, WireFormat, decode_body, encode_body, get_accept_headers,
+                       validate_wire_options)
+from .exceptions import UnhandledException, raise_for_status
+from .instrumentation import Instrumentation, PayloadLogger, RequestSample
+from .resilience import Resilience, ResiliencePolicy, get_endpoint
+
+if TYPE_CHECKING:
+    from jit_utils.requests.requests_client import requests
+
+    from .frame import AssetFrame
+
+T = TypeVar("T")
 
 
 class AssetService:
     @staticmethod
-    def _validate_response(response: requests.Response) -> requests.Response:
+    def _validate_response(response: "requests.Response") -> "requests.Response":
         """
         Validate the response from the asset service
         Parameters:
@@ -29,28 +53,246 @@ class AssetService:
             AssetNotFoundException:
                 if the server returns a status code of not found
                 meaning the asset is not found
+            UnauthorizedException:
+                if the server returns a status code of unauthorized
+                meaning the api token was rejected, a cached token should be invalidated
+            ConflictException:
+                if the server returns a status code of conflict
+                meaning a concurrent write of the asset won, the write can be retried
             UnhandledException:
                 if the server returns a status code of an unknown status code
-                meaning there is an error that is not handled by the client
+                meaning there is an error that is not handled by the client,
+                a 304 is handled by _get and is unexpected here
         Returns:
             The original response if it passes validation
         """
-        if not response.ok:
+        if not response.ok or response.status_code == HTTPStatus.NOT_MODIFIED:
             logger.error(f"Error response from asset service: {response.text} {response.status_code}")
-            if response.status_code == HTTPStatus.BAD_REQUEST:
-                raise RequestValidationException(response.text)
-            if response.status_code == HTTPStatus.NOT_FOUND:
-                raise AssetNotFoundException(response.text)
-            raise UnhandledException(response.text)
+            raise_for_status(response.status_code, response.text)
         return response
 
-    def __init__(self, test_mode: bool = False) -> None:
-        if test_mode:
-            self.service = get_test_service_url("asset-service")
-        else:
-            self.service = get_service_url("asset-service")["service_url"]
+    def __init__(self, test_mode: bool = False, cache: Optional[AssetCache] = None,
+                 trusted_responses: bool = False, response_cache: Optional[ResponseCache] = None,
+                 wire_format: WireFormat = "json", compression: Optional[Compression] = None,
+                 session: Optional["requests.Session"] = None,
+                 resilience_policy: ResiliencePolicy = ResiliencePolicy(),
+                 instrumentation: Optional[Instrumentation] = None,
+                 payload_log_sample_rate: float = DEFAULT_PAYLOAD_LOG_SAMPLE_RATE) -> None:
+        """
+        Parameters:
+            test_mode(bool): resolve the url of the test deployment of the asset service
+            cache(AssetCache): serve get_asset and get_asset_by_attributes from this cache (optional),
+                               the cache is kept up to date with the writes made through this client
+            trusted_responses(bool): build the returned assets without validating them (see Asset.construct_trusted),
+                                     parsing big responses is several times faster
+            response_cache(ResponseCache): send the reads as conditional requests (If-None-Match) and rebuild
+                                           the result from the cached body when the asset service answers 304
+                                           (optional), without transferring or validating it again
+            wire_format(str): the encoding of request and response bodies, json or msgpack (requires msgpack)
+            compression(str): compress request bodies with gzip or zstd (optional, zstd requires zstandard),
+                              response compression is always negotiated through Accept-Encoding
+            session(requests.Session): the http session of the requests (optional, the shared jit_utils session
+                                       by default), e.g. one with a bigger connection pool
+            resilience_policy(ResiliencePolicy): the timeouts, retries, hedging and circuit breaking of the requests,
+                                                 what they did is counted in self.resilience.stats
+            instrumentation(Instrumentation): measures the latency, the transferred bytes, the decode and model
+                                              construction times and the status code of every request (optional),
+                                              e.g. a HistogramCollector or an EmfExporter
+            payload_log_sample_rate(float): the fraction of the writes whose payload is logged (see PayloadLogger)
+        """
+        validate_wire_options(wire_format, compression)
+        self.cache = cache
+        self.trusted_responses = trusted_responses
+        self.response_cache = response_cache
+        self.wire_format = wire_format
+        self.compression = compression
+        self.session = session
+        self.resilience = Resilience(resilience_policy)
+        self.instrumentation = instrumentation
+        self.payload_logger = PayloadLogger(payload_log_sample_rate)
+        self.test_mode = test_mode
+
+    def __enter__(self) -> "AssetService":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Releases the threads of the hedged requests, the session is not closed (it may be shared)
+        """
+        self.resilience.close()
+
+    @property
+    def service(self) -> str:
+        """
+        The url of the asset service, taken from the process cache on every request, so an url invalidated after a
+        connection error or refreshed in the background reaches long lived clients (e.g. the one of the registry)
+        """
+        return get_asset_service_url(self.test_mode)
+
+    def _parse_asset(self, data: Dict[str, Any]) -> Asset:
+        if self.trusted_responses:
+            return Asset.construct_trusted(data)
+        return Asset(**data)
+
+    def _request(self, method: str, url: str, tenant_id: str, api_token: str, body: Any = None,
+                 params: Optional[Dict[str, Any]] = None,
+                 headers: Optional[Dict[str, str]] = None,
+                 idempotent: Optional[bool] = None,
+                 stream: bool = False) -> "requests.Response":
+        request_headers = {
+            "Authorization": f"Bearer {api_token}",
+            TENANT_HEADER: tenant_id,
+            **get_accept_headers(self.wire_format),
+            **(headers or {}),
+        }
+        data = None
+        if body is not None:
+            data, content_headers = encode_body(body, self.wire_format, self.compression)
+            request_headers.update(content_headers)
+        # Imported on first use, the requests stack is a large part of the import time of the package
+        from requests.exceptions import ConnectionError
+
+        session = self.session
+        if session is None:
+            from jit_utils.requests.requests_client import get_session
+            session = get_session()
+
+        def send(timeout: Optional[float]) -> "requests.Response":
+            return session.request(method, url, headers=request_headers, params=params, data=data, timeout=timeout,
+                                   stream=stream)
+
+        response = None
+        start = time.perf_counter()
+        try:
+            response = self.resilience.call(method, url, send, idempotent, hedge=not stream)
+            return response
+        except ConnectionError:
+            # The service may have moved, the next requests resolve its url again
+            service_url_cache.invalidate(ASSET_SERVICE_NAME, self.test_mode)
+            raise
+        finally:
+            if self.instrumentation is not None:
+                self._record_request(self.instrumentation, method, url, data, response, time.perf_counter() - start,
+                                     stream)
+
+    @staticmethod
+    def _record_request(instrumentation: Instrumentation, method: str, url: str, data: Optional[bytes],
+                        response: Optional["requests.Response"], latency_seconds: float, stream: bool) -> None:
+        """
+        A request that failed without a response (connection error, timeout, open circuit) is recorded with status 0.
+        The latency of a streamed response is the time to its headers, its body is not read here.
+        Runs in the finally of the request, so a failing hook is logged and never replaces the result of the request.
+        """
+        try:
+            status_code, bytes_received = 0, 0
+            if response is not None:
+                status_code = response.status_code
+                content_length = response.headers.get("Content-Length")
+                if content_length or not stream:
+                    bytes_received = int(content_length or len(response.content))
+            instrumentation.on_request(RequestSample(
+                endpoint=get_endpoint(method, url),
+                status_code=status_code,
+                latency_seconds=latency_seconds,
+                bytes_sent=len(data) if data else 0,
+                bytes_received=bytes_received,
+            ))
+        except Exception:
+            logger.exception(f"Failed to record the request {method} {url}")
+
+    @staticmethod
+    def _record_read(instrumentation: Instrumentation, endpoint: str, decode_seconds: float,
+                     parse_seconds: float) -> None:
+        try:
+            instrumentation.on_decode(endpoint, decode_seconds)
+            instrumentation.on_parse(endpoint, parse_seconds)
+        except Exception:
+            logger.exception(f"Failed to record the read of {endpoint}")
+
+    @staticmethod
+    def _decode(response: "requests.Response") -> Any:
+        return decode_body(response.content, response.headers.get("Content-Type"))
+
+    def _read(self, response: "requests.Response", parse: Callable[[Any], T]) -> T:
+        """
+        Decode the body of a response and build the result from it, both are timed for the instrumentation
+        """
+        if self.instrumentation is None:
+            return parse(self._decode(response))
+
+        endpoint = get_endpoint(response.request.method or "", response.url)
+        start = time.perf_counter()
+        json_data = self._decode(response)
+        decoded = time.perf_counter()
+        result = parse(json_data)
+        self._record_read(self.instrumentation, endpoint, decoded - start, time.perf_counter() - decoded)
+        return result
+
+    @staticmethod
+    def _construct_assets_trusted(json_data: List[Dict[str, Any]]) -> List[Asset]:
+        return [Asset.construct_trusted(asset) for asset in json_data]
+
+    def _parse_assets_page(self, json_data: Dict[str, Any]) -> AssetsPage:
+        return AssetsPage.construct(items=[self._parse_asset(asset) for asset in json_data["items"]],
+                                    next_cursor=json_data.get("next_cursor"))
 
-    def get_asset(self, tenant_id: str, asset_id: str, api_token: str) -> Asset:
+    def _get(self, url: str, tenant_id: str, api_token: str, parse: Callable[[Any], T],
+             params: Optional[Dict[str, Any]] = None, parse_trusted: Optional[Callable[[Any], T]] = None) -> T:
+        """
+        Send a GET request and parse its json body. When a response cache is configured the request is conditional
+        and the body of the response is cached (as bytes, which nobody can mutate). A 304 response rebuilds the
+        result from the cached body with parse_trusted, without transferring the body again or validating it again
+        (it was validated when it was first parsed), parse is used when there is no parse_trusted.
+        """
+        headers = {}
+        response_cache = self.response_cache
+        cache_key: Tuple[Any, ...] = (tenant_id, url, tuple(sorted(params.items())) if params else None)
+        cached_response = response_cache.get(cache_key) if response_cache is not None else None
+        if cached_response is not None:
+            headers["If-None-Match"] = cached_response.etag
+
+        response = self._request("GET", url, tenant_id, api_token, params=params, headers=headers)
+        if response_cache is not None:
+            response_cache.record(not_modified=response.status_code == HTTPStatus.NOT_MODIFIED)
+        if cached_response is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+            logger.info(f"Asset service response for {url=} was not modified, reusing the cached body")
+            return (parse_trusted or parse)(decode_body(cached_response.body, cached_response.content_type))
+        self._validate_response(response)
+
+        result = self._read(response, parse)
+        etag = response.headers.get("ETag")
+        if response_cache is not None and etag:
+            response_cache.put(cache_key, etag, response.content, response.headers.get("Content-Type"))
+        return result
+
+    def _get_assets_url(self, asset_type: Optional[str] = None, vendor: Optional[str] = None,
+                        owner: Optional[str] = None) -> str:
+        if not asset_type:
+            return ASSET_SERVICE_GET_ALL_ASSETS.format(asset_service=self.service)
+
+        url = ASSET_SERVICE_GET_ASSETS_BY_ATTRIBUTES_BASE.format(
+            asset_service=self.service,
+            asset_type=asset_type,
+        )
+        if vendor and owner:
+            url = f"{url}/vendor/{vendor}/owner/{owner}"
+        elif vendor:
+            url = f"{url}/vendor/{vendor}"
+        return url
+
+    @overload
+    def get_asset(self, tenant_id: str, asset_id: str, api_token: str, fields: None = None) -> Asset:
+        ...
+
+    @overload
+    def get_asset(self, tenant_id: str, asset_id: str, api_token: str, fields: Sequence[str]) -> PartialAsset:
+        ...
+
+    def get_asset(self, tenant_id: str, asset_id: str, api_token: str,
+                  fields: Optional[Sequence[str]] = None) -> Union[Asset, PartialAsset]:
         """
         Get asset by asset id
 
@@ -58,20 +300,69 @@ class AssetService:
             tenant_id(str): the tenant id owner of the asset to be retrieved
             asset_id(str): the asset id of the asset to be retrieved
             api_token(str): the api token of the user making the request
+            fields(List[str]): return only these asset fields (optional), see get_partial_asset_model
 
         Returns:
-            Asset: the asset object
+            Asset: the asset object, or a PartialAsset holding only the requested fields
         """
+        if fields:
+            partial_asset_model = get_partial_asset_model(fields)
+            logger.info(f"Getting asset with {asset_id=} and {fields=}")
+            url = ASSET_SERVICE_GET_ASSET_BY_ID.format(asset_service=self.service, asset_id=asset_id)
+            return self._get(url, tenant_id, api_token, lambda json_data: partial_asset_model(**json_data),
+                             params={"fields": ",".join(fields)})
+
+        if self.cache is not None:
+            cached_asset = self.cache.get(tenant_id, asset_id)
+            if cached_asset is not None:
+                return cached_asset
+
         logger.info(f"Getting asset with {asset_id=}")
         url = ASSET_SERVICE_GET_ASSET_BY_ID.format(asset_service=self.service, asset_id=asset_id)
-        response = get_session().get(
-            url,
-            headers={"Authorization": f"Bearer {api_token}", TENANT_HEADER: tenant_id},
-        )
-        self._validate_response(response)
+        asset = self._get(url, tenant_id, api_token, self._parse_asset, parse_trusted=Asset.construct_trusted)
+        if self.cache is not None:
+            self.cache.put(asset)
+        return asset
+
+    def get_assets(self, tenant_id: str, asset_ids: List[str], api_token: str) -> GetAssetsByIdsResponse:
+        """
+        Get assets by asset ids, the ids are sent in batches of up to GET_ASSETS_BY_IDS_BATCH_SIZE ids per request
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be retrieved
+            asset_ids(List[str]): the asset ids of the assets to be retrieved
+            api_token(str): the api token of the user making the request
+
+        Returns:
+            GetAssetsByIdsResponse: the found assets and the ids of the assets that were not found
+        """
+        result = GetAssetsByIdsResponse(assets=[], missing_asset_ids=[])
+        asset_ids_to_fetch = []
+        for asset_id in dict.fromkeys(asset_ids):  # Removes duplicates while keeping the order
+            cached_asset = self.cache.get(tenant_id, asset_id) if self.cache is not None else None
+            if cached_asset is not None:
+                result.assets.append(cached_asset)
+            else:
+                asset_ids_to_fetch.append(asset_id)
+
+        logger.info(f"Getting {len(asset_ids_to_fetch)} assets by ids for {tenant_id=}")
+        url = ASSET_SERVICE_GET_ASSETS_BY_IDS.format(asset_service=self.service)
+        for i in range(0, len(asset_ids_to_fetch), GET_ASSETS_BY_IDS_BATCH_SIZE):
+            response = self._request("POST", url, tenant_id, api_token,
+                                     body=asset_ids_to_fetch[i:i + GET_ASSETS_BY_IDS_BATCH_SIZE], idempotent=True)
+            self._validate_response(response)
+
+            fetched_assets, missing_asset_ids = self._read(response, lambda json_data: (
+                [self._parse_asset(asset) for asset in json_data["assets"]], json_data.get("missing_asset_ids", [])))
+            result.assets.extend(fetched_assets)
+            result.missing_asset_ids.extend(missing_asset_ids)
+            if self.cache is not None:
+                for asset in fetched_assets:
+                    self.cache.put(asset)
 
-        json_data = response.json()
-        return Asset(**json_data)
+        if result.missing_asset_ids:
+            logger.info(f"Assets not found for {tenant_id=}: {result.missing_asset_ids}")
+        return result
 
     def get_asset_by_attributes(
             self, tenant_id: str, asset_type: str, vendor: str, owner: str, asset_name: str, api_token: str
@@ -90,6 +381,11 @@ class AssetService:
         Returns:
             Asset: the asset object
         """
+        if self.cache is not None:
+            cached_asset = self.cache.get_by_attributes(tenant_id, asset_type, vendor, owner, asset_name)
+            if cached_asset is not None:
+                return cached_asset
+
         logger.info(f"Getting asset with {asset_type=} {vendor=}, {owner=} and {asset_name=}")
         url = ASSET_SERVICE_GET_ASSET_BY_ATTRIBUTES.format(
             asset_service=self.service,
@@ -98,14 +394,24 @@ class AssetService:
             owner=owner,
             asset_name=asset_name,
         )
-        response = get_session().get(url, headers={"Authorization": f"Bearer {api_token}", TENANT_HEADER: tenant_id})
-        self._validate_response(response)
+        asset = self._get(url, tenant_id, api_token, self._parse_asset, parse_trusted=Asset.construct_trusted)
+        if self.cache is not None:
+            self.cache.put(asset)
+        return asset
+
+    @overload
+    def get_assets_by_attributes(self, tenant_id: str, api_token: str, asset_type: str, vendor: Optional[str] = None,
+                                 owner: Optional[str] = None, fields: None = None) -> List[Asset]:
+        ...
 
-        json_data = response.json()
-        return Asset(**json_data)
+    @overload
+    def get_assets_by_attributes(self, tenant_id: str, api_token: str, asset_type: str, vendor: Optional[str] = None,
+                                 owner: Optional[str] = None, *, fields: Sequence[str]) -> List[PartialAsset]:
+        ...
 
     def get_assets_by_attributes(self, tenant_id: str, api_token: str, asset_type: str, vendor: Optional[str] = None,
-                                 owner: Optional[str] = None) -> List[Asset]:
+                                 owner: Optional[str] = None, fields: Optional[Sequence[str]] = None
+                                 ) -> Union[List[Asset], List[PartialAsset]]:
         """
         Get assets by asset attributes
 
@@ -115,34 +421,53 @@ class AssetService:
             asset_type(str): the asset type of the assets to be retrieved
             vendor(str): the vendor of the assets to be retrieved (optional)
             owner(str): the owner of the assets to be retrieved (optional)
+            fields(List[str]): return only these asset fields (optional), see get_partial_asset_model
 
         Returns:
-            List[Asset]: the list of asset objects
+            List[Asset]: the list of asset objects, or of PartialAsset objects holding only the requested fields
         """
         logger.info(f"Getting assets with {asset_type=} {vendor=} {owner=}")
-        url = ASSET_SERVICE_GET_ASSETS_BY_ATTRIBUTES_BASE.format(
-            asset_service=self.service,
-            asset_type=asset_type,
-        )
-
-        if vendor and owner:
-            url = f"{url}/vendor/{vendor}/owner/{owner}"
-        elif vendor:
-            url = f"{url}/vendor/{vendor}"
+        url = self._get_assets_url(asset_type, vendor, owner)
+        if fields:
+            partial_asset_model = get_partial_asset_model(fields)
+            return list(self._get(url, tenant_id, api_token,
+                                  lambda json_data: [partial_asset_model(**asset) for asset in json_data],
+                                  params={"fields": ",".join(fields)}))
+        return list(self._get(url, tenant_id, api_token,
+                              lambda json_data: [self._parse_asset(asset) for asset in json_data],
+                              parse_trusted=self._construct_assets_trusted))
 
-        response = get_session().get(url, headers={"Authorization": f"Bearer {api_token}", TENANT_HEADER: tenant_id})
-        self._validate_response(response)
+    @overload
+    def get_all_assets(self,
+                       tenant_id: str,
+                       api_token: str,
+                       sort_by: Optional[Literal['risk_score']] = None,
+                       sort_order: Optional[Literal['asc', 'desc']] = None,
+                       limit: Optional[int] = None,
+                       fields: None = None,
+                       ) -> List[Asset]:
+        ...
 
-        json_data = response.json()
-        return [Asset(**asset) for asset in json_data]
+    @overload
+    def get_all_assets(self,
+                       tenant_id: str,
+                       api_token: str,
+                       sort_by: Optional[Literal['risk_score']] = None,
+                       sort_order: Optional[Literal['asc', 'desc']] = None,
+                       limit: Optional[int] = None,
+                       *,
+                       fields: Sequence[str],
+                       ) -> List[PartialAsset]:
+        ...
 
     def get_all_assets(self,
                        tenant_id: str,
                        api_token: str,
                        sort_by: Optional[Literal['risk_score']] = None,
                        sort_order: Optional[Literal['asc', 'desc']] = None,
-                       limit: Optional[int] = None
-                       ) -> List[Asset]:
+                       limit: Optional[int] = None,
+                       fields: Optional[Sequence[str]] = None,
+                       ) -> Union[List[Asset], List[PartialAsset]]:
         """
         Get all assets for a tenant
 
@@ -152,24 +477,370 @@ class AssetService:
             sort_by(str): the field to sort by (optional, can be only risk_score)
             sort_order(str): the sort order (optional, can be only asc or desc)
             limit(int): the number of assets to return (optional)
+            fields(List[str]): return only these asset fields (optional), see get_partial_asset_model
 
         Returns:
-            List[Asset]: the list of assets
+            List[Asset]: the list of assets, or of PartialAsset objects holding only the requested fields
         """
+        partial_asset_model = get_partial_asset_model(fields) if fields else None
         logger.info(f"Getting all assets for {tenant_id=}")
         url = ASSET_SERVICE_GET_ALL_ASSETS.format(asset_service=self.service)
         params = {
             "sort_by": sort_by,
             "sort_order": sort_order,
             "limit": limit,
+            "fields": ",".join(fields) if fields else None,
+        }
+        existing_params = {k: v for k, v in params.items() if v is not None}
+        if partial_asset_model:
+            return list(self._get(url, tenant_id, api_token,
+                                  lambda json_data: [partial_asset_model(**asset) for asset in json_data],
+                                  params=existing_params))
+        return list(self._get(url, tenant_id, api_token,
+                              lambda json_data: [self._parse_asset(asset) for asset in json_data],
+                              params=existing_params if existing_params else None,
+                              parse_trusted=self._construct_assets_trusted))
+
+    def _get_assets_page(self,
+                         tenant_id: str,
+                         api_token: str,
+                         page_size: int,
+                         cursor: Optional[str],
+                         asset_type: Optional[str],
+                         vendor: Optional[str],
+                         owner: Optional[str],
+                         sort_by: Optional[Literal['risk_score']],
+                         sort_order: Optional[Literal['asc', 'desc']],
+                         parse: Callable[[Dict[str, Any]], T],
+                         ) -> T:
+        url = self._get_assets_url(asset_type, vendor, owner)
+        params = {
+            "page_size": page_size,
+            "cursor": cursor,
+            "sort_by": sort_by,
+            "sort_order": sort_order,
         }
         existing_params = {k: v for k, v in params.items() if v is not None}
-        response = get_session().get(url, headers={"Authorization": f"Bearer {api_token}", TENANT_HEADER: tenant_id},
-                                     params=existing_params if existing_params else None)
+        response = self._request("GET", url, tenant_id, api_token, params=existing_params)
         self._validate_response(response)
 
-        json_data = response.json()
-        return [Asset(**asset) for asset in json_data]
+        return self._read(response, parse)
+
+    def get_assets_page(self,
+                        tenant_id: str,
+                        api_token: str,
+                        page_size: int = DEFAULT_PAGE_SIZE,
+                        cursor: Optional[str] = None,
+                        asset_type: Optional[str] = None,
+                        vendor: Optional[str] = None,
+                        owner: Optional[str] = None,
+                        sort_by: Optional[Literal['risk_score']] = None,
+                        sort_order: Optional[Literal['asc', 'desc']] = None,
+                        ) -> AssetsPage:
+        """
+        Get a single page of the tenant assets
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be retrieved
+            api_token(str): the api token of the user making the request
+            page_size(int): the maximal number of assets in the page
+            cursor(str): the next_cursor of the previous page (optional, None for the first page)
+            asset_type(str): the asset type of the assets to be retrieved (optional)
+            vendor(str): the vendor of the assets to be retrieved (optional, requires asset_type)
+            owner(str): the owner of the assets to be retrieved (optional, requires asset_type and vendor)
+            sort_by(str): the field to sort by (optional, can be only risk_score)
+            sort_order(str): the sort order (optional, can be only asc or desc)
+
+        Returns:
+            AssetsPage: the page of assets and the cursor of the next page
+        """
+        logger.info(f"Getting assets page for {tenant_id=} {asset_type=} {vendor=} {owner=} {cursor=}")
+        return self._get_assets_page(tenant_id, api_token, page_size, cursor, asset_type, vendor, owner, sort_by,
+                                     sort_order, self._parse_assets_page)
+
+    def iter_all_assets(self,
+                        tenant_id: str,
+                        api_token: str,
+                        page_size: int = DEFAULT_PAGE_SIZE,
+                        asset_type: Optional[str] = None,
+                        vendor: Optional[str] = None,
+                        owner: Optional[str] = None,
+                        sort_by: Optional[Literal['risk_score']] = None,
+                        sort_order: Optional[Literal['asc', 'desc']] = None,
+                        ) -> Iterator[Asset]:
+        """
+        Iterate over the tenant assets, pages are fetched lazily so only a single page is held in memory
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be retrieved
+            api_token(str): the api token of the user making the request
+            page_size(int): the number of assets to fetch in each request
+            asset_type(str): the asset type of the assets to be retrieved (optional)
+            vendor(str): the vendor of the assets to be retrieved (optional, requires asset_type)
+            owner(str): the owner of the assets to be retrieved (optional, requires asset_type and vendor)
+            sort_by(str): the field to sort by (optional, can be only risk_score)
+            sort_order(str): the sort order (optional, can be only asc or desc)
+
+        Yields:
+            Asset: the tenant assets, one at a time
+        """
+        logger.info(f"Iterating over assets for {tenant_id=} {asset_type=} {vendor=} {owner=}")
+        cursor = None
+        while True:
+            page = self._get_assets_page(tenant_id, api_token, page_size, cursor, asset_type, vendor, owner, sort_by,
+                                         sort_order, self._parse_assets_page)
+            yield from page.items
+
+            cursor = page.next_cursor
+            if not cursor:
+                return
+
+    def get_assets_by_tag(self,
+                          tenant_id: str,
+                          tag_name: str,
+                          tag_value: str,
+                          api_token: str,
+                          page_size: int = DEFAULT_PAGE_SIZE,
+                          ) -> List[Asset]:
+        """
+        Get the active assets of a tenant that have a tag, the asset service serves it from its tags index,
+        so the cost is proportional to the number of tagged assets rather than to the size of the tenant
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be retrieved
+            tag_name(str): the name of the tag
+            tag_value(str): the value of the tag
+            api_token(str): the api token of the user making the request
+            page_size(int): the number of assets to fetch in each request
+
+        Returns:
+            List[Asset]: the list of tagged assets, oldest first
+        """
+        logger.info(f"Getting assets by tag for {tenant_id=} {tag_name=} {tag_value=}")
+        # Team names may contain "/", "?" or "#", the tag is escaped so it stays within its path segments
+        url = ASSET_SERVICE_GET_ASSETS_BY_TAG.format(asset_service=self.service, tag_name=quote(tag_name, safe=""),
+                                                     tag_value=quote(tag_value, safe=""))
+        assets: List[Asset] = []
+        cursor: Optional[str] = None
+        while True:
+            params: Dict[str, Any] = {"page_size": page_size, "cursor": cursor} if cursor else {"page_size": page_size}
+            response = self._request("GET", url, tenant_id, api_token, params=params)
+            self._validate_response(response)
+
+            page = self._read(response, self._parse_assets_page)
+            assets.extend(page.items)
+            cursor = page.next_cursor
+            if not cursor:
+                return assets
+
+    def get_assets_by_team(self, tenant_id: str, team: str, api_token: str,
+                           page_size: int = DEFAULT_PAGE_SIZE) -> List[Asset]:
+        """
+        Get the active assets of a tenant that are owned by a team (tagged with the team tag)
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be retrieved
+            team(str): the name of the team
+            api_token(str): the api token of the user making the request
+            page_size(int): the number of assets to fetch in each request
+
+        Returns:
+            List[Asset]: the list of the team assets, oldest first
+        """
+        return self.get_assets_by_tag(tenant_id, TEAM_TAG, team, api_token, page_size)
+
+    def _parse_asset_changes_page(self, json_data: Dict[str, Any]) -> AssetChangesPage:
+        return AssetChangesPage.construct(assets=[self._parse_asset(asset) for asset in json_data["assets"]],
+                                          deleted_asset_ids=json_data.get("deleted_asset_ids", []),
+                                          watermark=json_data["watermark"],
+                                          has_more=json_data.get("has_more", False))
+
+    def iter_asset_changes(self,
+                           tenant_id: str,
+                           api_token: str,
+                           since: Optional[str] = None,
+                           page_size: int = DEFAULT_PAGE_SIZE,
+                           ) -> Iterator[AssetChangesPage]:
+        """
+        Iterate over the pages of the assets changed after a watermark, pages are fetched lazily.
+        An asset changed again while iterating can show up in a later page too, its last occurrence is its state.
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets
+            api_token(str): the api token of the user making the request
+            since(str): the watermark of the last sync (optional, None returns all the assets of the tenant)
+            page_size(int): the maximal number of changes in each page
+
+        Yields:
+            AssetChangesPage: the pages of changes, the watermark of the last one is the watermark of the next sync
+        """
+        logger.info(f"Iterating over asset changes for {tenant_id=} {since=}")
+        url = ASSET_SERVICE_GET_ASSET_CHANGES.format(asset_service=self.service)
+        while True:
+            params: Dict[str, Any] = {"page_size": page_size, "since": since} if since else {"page_size": page_size}
+            response = self._request("GET", url, tenant_id, api_token, params=params)
+            self._validate_response(response)
+
+            page = self._read(response, self._parse_asset_changes_page)
+            if self.cache is not None:
+                for asset in page.assets:
+                    self.cache.put(asset)
+                for asset_id in page.deleted_asset_ids:
+                    self.cache.invalidate(tenant_id, asset_id)
+            yield page
+
+            since = page.watermark
+            if not page.has_more:
+                return
+
+    def get_asset_changes(self,
+                          tenant_id: str,
+                          api_token: str,
+                          since: Optional[str] = None,
+                          page_size: int = DEFAULT_PAGE_SIZE,
+                          ) -> AssetChangesPage:
+        """
+        Get the assets created, updated or deleted after a watermark, so a local copy of the tenant assets is kept
+        current with work proportional to the changes rather than to the size of the tenant:
+
+            changes = service.get_asset_changes(tenant_id, api_token, since=watermark)
+            for asset in changes.assets: ...  # Created or updated, upsert it
+            for asset_id in changes.deleted_asset_ids: ...  # Deleted, remove it
+            watermark = changes.watermark  # Store it for the next sync
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets
+            api_token(str): the api token of the user making the request
+            since(str): the watermark of the last sync (optional, None returns all the assets of the tenant)
+            page_size(int): the maximal number of changes fetched in each request
+
+        Returns:
+            AssetChangesPage: all the changes merged, every asset appears once in assets (its last state, in the
+                              order of the changes) or in deleted_asset_ids, and the watermark of the next sync
+        """
+        changed_assets: Dict[str, Asset] = {}
+        deleted_asset_ids: Dict[str, None] = {}  # Ordered set
+        watermark = since
+        for page in self.iter_asset_changes(tenant_id, api_token, since, page_size):
+            for asset in page.assets:
+                deleted_asset_ids.pop(asset.asset_id, None)
+                changed_assets.pop(asset.asset_id, None)  # Moves a changed again asset to its last position
+                changed_assets[asset.asset_id] = asset
+            for asset_id in page.deleted_asset_ids:
+                changed_assets.pop(asset_id, None)
+                deleted_asset_ids[asset_id] = None
+            watermark = page.watermark
+
+        return AssetChangesPage.construct(assets=list(changed_assets.values()),
+                                          deleted_asset_ids=list(deleted_asset_ids), watermark=watermark,
+                                          has_more=False)
+
+    def get_all_assets_frame(self,
+                             tenant_id: str,
+                             api_token: str,
+                             page_size: int = DEFAULT_PAGE_SIZE,
+                             asset_type: Optional[str] = None,
+                             vendor: Optional[str] = None,
+                             owner: Optional[str] = None,
+                             ) -> "AssetFrame":
+        """
+        Get the tenant assets as a column oriented AssetFrame, the frame is built straight from the json pages
+        without creating Asset objects. Requires numpy (the asset_service[frame] extra).
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be retrieved
+            api_token(str): the api token of the user making the request
+            page_size(int): the number of assets to fetch in each request
+            asset_type(str): the asset type of the assets to be retrieved (optional)
+            vendor(str): the vendor of the assets to be retrieved (optional, requires asset_type)
+            owner(str): the owner of the assets to be retrieved (optional, requires asset_type and vendor)
+
+        Returns:
+            AssetFrame: the tenant assets
+        """
+        from .frame import AssetFrame
+
+        logger.info(f"Getting assets frame for {tenant_id=} {asset_type=} {vendor=} {owner=}")
+        records: List[Dict[str, Any]] = []
+        cursor = None
+        while True:
+            json_data = self._get_assets_page(tenant_id, api_token, page_size, cursor, asset_type, vendor, owner,
+                                              None, None, lambda page: page)
+            records.extend(json_data["items"])
+            cursor = json_data.get("next_cursor")
+            if not cursor:
+                return AssetFrame.from_records(records)
+
+    def _request_export(self, tenant_id: str, api_token: str) -> "requests.Response":
+        url = ASSET_SERVICE_EXPORT_ASSETS.format(asset_service=self.service)
+        response = self._request("GET", url, tenant_id, api_token, headers={"Accept": NDJSON_MEDIA_TYPE}, stream=True)
+        try:
+            return self._validate_response(response)
+        except Exception:
+            response.close()
+            raise
+
+    def iter_export_assets(self, tenant_id: str, api_token: str,
+                           chunk_size: int = EXPORT_READ_CHUNK_BYTES) -> Iterator[Asset]:
+        """
+        Export all the assets of a tenant, the asset service streams them as newline delimited json and they are
+        parsed as they arrive, so the memory use doesn't depend on the size of the tenant (unlike get_all_assets).
+        Close the iterator (or exhaust it) to release the connection.
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be exported
+            api_token(str): the api token of the user making the request
+            chunk_size(int): the number of bytes read from the connection at a time
+
+        Yields:
+            Asset: the tenant assets, one at a time
+        """
+        logger.info(f"Exporting assets for {tenant_id=}")
+        decode_seconds, parse_seconds = 0.0, 0.0
+        with closing(self._request_export(tenant_id, api_token)) as response:
+            for line in response.iter_lines(chunk_size=chunk_size):
+                if not line:
+                    continue
+                start = time.perf_counter()
+                json_data = json.loads(line)
+                decoded = time.perf_counter()
+                asset = self._parse_asset(json_data)
+                decode_seconds += decoded - start
+                parse_seconds += time.perf_counter() - decoded
+                yield asset
+
+        if self.instrumentation is not None:
+            self._record_read(self.instrumentation, get_endpoint("GET", response.url), decode_seconds, parse_seconds)
+
+    def export_assets_to_file(self, tenant_id: str, api_token: str, file: Union[str, Path, BinaryIO],
+                              chunk_size: int = EXPORT_READ_CHUNK_BYTES) -> int:
+        """
+        Export all the assets of a tenant into a newline delimited json file (an asset json per line), the stream is
+        written as it arrives without being parsed, so the memory use doesn't depend on the size of the tenant
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be exported
+            api_token(str): the api token of the user making the request
+            file(str | Path | BinaryIO): the path of the file to write (it is overwritten), or a binary file object
+            chunk_size(int): the number of bytes read from the connection and written at a time
+
+        Returns:
+            int: the number of exported assets
+        """
+        logger.info(f"Exporting assets for {tenant_id=} to a file")
+        lines = 0
+        with closing(self._request_export(tenant_id, api_token)) as response:
+            output = open(file, "wb") if isinstance(file, (str, Path)) else file
+            try:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    output.write(chunk)
+                    lines += chunk.count(b"\n")
+            finally:
+                if output is not file:
+                    output.close()
+
+        logger.info(f"Exported {lines} assets for {tenant_id=}")
+        return lines
 
     def create_asset(self, tenant_id: str, assets: List[CreateAssetRequest], api_token: str) -> CreateAssetsResponse:
         """
@@ -183,17 +854,19 @@ class AssetService:
         Returns:
             CreateAssetsResponse: the response object of the create assets request
         """
-        logger.info(f"Creating asset with {tenant_id=} {assets=}")
+        logger.info(f"Creating {len(assets)} assets with {tenant_id=}")
+        self.payload_logger.log("Creating assets", assets=assets)
         url = self.service
-        response = get_session().post(
-            url,
-            headers={"Authorization": f"Bearer {api_token}", TENANT_HEADER: tenant_id},
-            json=[asset.dict() for asset in assets]
-        )
+        response = self._request("POST", url, tenant_id, api_token, body=[asset.dict() for asset in assets])
         self._validate_response(response)
 
-        json_data = response.json()
-        return CreateAssetsResponse(**json_data)
+        if self.cache is not None:
+            # Creating an existing asset reactivates it, so a cached copy of it is no longer valid
+            for asset in assets:
+                self.cache.invalidate_by_attributes(tenant_id, asset.asset_type, asset.vendor, asset.owner,
+                                                    asset.asset_name)
+
+        return self._read(response, lambda json_data: CreateAssetsResponse(**json_data))
 
     def update_asset(self, tenant_id: str, asset_id: str, details: UpdateAssetRequest, api_token: str) -> Asset:
         """
@@ -208,17 +881,43 @@ class AssetService:
         Returns:
             Asset: the updated asset object
         """
-        logger.info(f"Updating asset with {tenant_id=}, {asset_id=}, {details=}")
+        logger.info(f"Updating asset with {tenant_id=}, {asset_id=}")
+        self.payload_logger.log("Updating asset", details=details)
         url = ASSET_SERVICE_PATCH_ASSET.format(asset_service=self.service, asset_id=asset_id)
-        response = get_session().patch(
-            url,
-            headers={"Authorization": f"Bearer {api_token}", TENANT_HEADER: tenant_id},
-            json=details.dict()
-        )
+        response = self._request("PATCH", url, tenant_id, api_token, body=details.dict())
         self._validate_response(response)
 
-        json_data = response.json()
-        return Asset(**json_data)
+        asset = self._read(response, self._parse_asset)
+        if self.cache is not None:
+            self.cache.put(asset)
+        return asset
+
+    def update_asset_tags(self, tenant_id: str, asset_id: str, api_token: str, tags_to_add: Sequence[Tag] = (),
+                          tags_to_remove: Sequence[Tag] = ()) -> Asset:
+        """
+        Add and remove tags of an asset in a single atomic operation of the asset service.
+        Unlike update_asset with a full tag list, concurrent tag changes of the same asset do not overwrite each other.
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the asset to be updated
+            asset_id(str): the asset id of the asset to be updated
+            api_token(str): the api token of the user making the request
+            tags_to_add(Sequence[Tag]): the tags to add to the asset, tags it already has are ignored
+            tags_to_remove(Sequence[Tag]): the tags to remove from the asset, tags it does not have are ignored
+
+        Returns:
+            Asset: the updated asset object
+        """
+        logger.info(f"Updating asset tags with {tenant_id=}, {asset_id=}, {tags_to_add=}, {tags_to_remove=}")
+        url = ASSET_SERVICE_PATCH_ASSET_TAGS.format(asset_service=self.service, asset_id=asset_id)
+        details = UpdateAssetTags(tags_to_add=list(tags_to_add), tags_to_remove=list(tags_to_remove))
+        response = self._request("PATCH", url, tenant_id, api_token, body=details.dict())
+        self._validate_response(response)
+
+        asset = self._read(response, self._parse_asset)
+        if self.cache is not None:
+            self.cache.put(asset)
+        return asset
 
     def update_multiple_assets(self, tenant_id: str, assets: List[UpdateAsset], api_token: str) -> List[Asset]:
         """
@@ -232,17 +931,17 @@ class AssetService:
         Returns:
             List[Asset]: the list of updated assets
         """
-        logger.info(f"Updating multiple asset with {tenant_id=}, {assets=}")
+        logger.info(f"Updating {len(assets)} assets with {tenant_id=}")
+        self.payload_logger.log("Updating assets", assets=assets)
         url = ASSET_SERVICE_PATCH_MULTIPLE_ASSETS.format(asset_service=self.service)
-        response = get_session().post(
-            url,
-            headers={"Authorization": f"Bearer {api_token}", TENANT_HEADER: tenant_id},
-            json=[asset.dict() for asset in assets]
-        )
+        response = self._request("POST", url, tenant_id, api_token, body=[asset.dict() for asset in assets])
         self._validate_response(response)
 
-        json_data = response.json()
-        return [Asset(**asset_data) for asset_data in json_data]
+        updated_assets = self._read(response, lambda json_data: [self._parse_asset(asset) for asset in json_data])
+        if self.cache is not None:
+            for asset in updated_assets:
+                self.cache.put(asset)
+        return updated_assets
 
     def delete_assets(self, tenant_id: str, asset_ids: List[str], api_token: str) -> int:
         """
@@ -256,14 +955,115 @@ class AssetService:
         Returns:
             int: the number of deleted assets
         """
-        logger.info(f"Deleting the followings assets with {tenant_id=}, {asset_ids=}")
+        return len(self._delete_assets(tenant_id, asset_ids, api_token))
+
+    def _delete_assets(self, tenant_id: str, asset_ids: List[str], api_token: str) -> List[str]:
+        logger.info(f"Deleting {len(asset_ids)} assets with {tenant_id=}")
+        self.payload_logger.log("Deleting assets", asset_ids=asset_ids)
         url = ASSET_SERVICE_DELETE_ASSETS.format(asset_service=self.service)
 
-        response = get_session().post(
-            url,
-            headers={"Authorization": f"Bearer {api_token}", TENANT_HEADER: tenant_id},
-            json=asset_ids
-        )
+        response = self._request("POST", url, tenant_id, api_token, body=asset_ids, idempotent=True)
         self._validate_response(response)
 
-        return len(asset_ids)
+        if self.cache is not None:
+            for asset_id in asset_ids:
+                self.cache.invalidate(tenant_id, asset_id)
+
+        if response.status_code == HTTPStatus.NO_CONTENT:
+            # Older deployments don't report which assets were deleted
+            return asset_ids
+        return self._read(response, lambda json_data: DeleteAssetsResponse(**json_data).deleted_asset_ids)
+
+    def bulk_create_assets(self,
+                           tenant_id: str,
+                           assets: List[CreateAssetRequest],
+                           api_token: str,
+                           chunk_size: int = BULK_WRITE_CHUNK_SIZE,
+                           parallelism: int = BULK_WRITE_PARALLELISM,
+                           ) -> BulkWriteResult:
+        """
+        Create any number of assets, the assets are split into size bounded chunks which are sent concurrently.
+        A chunk rejected as invalid is bisected until the invalid assets are isolated, so a single bad asset
+        doesn't fail the others.
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be created
+            assets(List[CreateAssetRequest]): the list of assets to be created
+            api_token(str): the api token of the user making the request
+            chunk_size(int): the maximal number of assets sent in a single request
+            parallelism(int): the maximal number of requests sent at the same time
+
+        Returns:
+            BulkWriteResult: the positions (in assets) of the created assets and the failure reason of the others,
+                             retrying only the failed assets resumes the operation
+        """
+        payloads = [asset.dict() for asset in assets]
+
+        def send_chunk(chunk: List[int]) -> List[int]:
+            response = self.create_asset(tenant_id, [assets[index] for index in chunk], api_token)
+            if int(response.created_assets_count) != len(chunk):
+                # The response doesn't tell which assets were created, the whole chunk is reported as failed
+                # (creating an asset again is safe, it updates the existing one)
+                raise UnhandledException(f"The asset service created {response.created_assets_count} assets "
+                                         f"out of {len(chunk)}")
+            return chunk
+
+        chunks = split_to_chunks(payloads, chunk_size, BULK_WRITE_MAX_CHUNK_BYTES)
+        return run_bulk_write(send_chunk, chunks, [None] * len(assets), parallelism)
+
+    def bulk_update_assets(self,
+                           tenant_id: str,
+                           assets: List[UpdateAsset],
+                           api_token: str,
+                           chunk_size: int = BULK_WRITE_CHUNK_SIZE,
+                           parallelism: int = BULK_WRITE_PARALLELISM,
+                           ) -> BulkWriteResult:
+        """
+        Update any number of assets, see bulk_create_assets for the chunking and failure handling
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be updated
+            assets(List[UpdateAsset]): the list of assets to be updated
+            api_token(str): the api token of the user making the request
+            chunk_size(int): the maximal number of assets sent in a single request
+            parallelism(int): the maximal number of requests sent at the same time
+
+        Returns:
+            BulkWriteResult: the positions (in assets) of the updated assets and the failure reason of the others
+        """
+        payloads = [asset.dict() for asset in assets]
+
+        def send_chunk(chunk: List[int]) -> List[int]:
+            updated_assets = self.update_multiple_assets(tenant_id, [assets[index] for index in chunk], api_token)
+            updated_asset_ids = {asset.asset_id for asset in updated_assets}
+            return [index for index in chunk if assets[index].asset_id in updated_asset_ids]
+
+        chunks = split_to_chunks(payloads, chunk_size, BULK_WRITE_MAX_CHUNK_BYTES)
+        return run_bulk_write(send_chunk, chunks, [asset.asset_id for asset in assets], parallelism)
+
+    def bulk_delete_assets(self,
+                           tenant_id: str,
+                           asset_ids: List[str],
+                           api_token: str,
+                           chunk_size: int = BULK_WRITE_CHUNK_SIZE,
+                           parallelism: int = BULK_WRITE_PARALLELISM,
+                           ) -> BulkWriteResult:
+        """
+        Delete any number of assets, see bulk_create_assets for the chunking and failure handling
+
+        Parameters:
+            tenant_id(str): the tenant id owner of the assets to be deleted
+            asset_ids(List[str]): the list of asset ids to be deleted
+            api_token(str): the api token of the user making the request
+            chunk_size(int): the maximal number of asset ids sent in a single request
+            parallelism(int): the maximal number of requests sent at the same time
+
+        Returns:
+            BulkWriteResult: the positions (in asset_ids) of the deleted assets and the failure reason of the others
+        """
+        def send_chunk(chunk: List[int]) -> List[int]:
+            deleted_asset_ids = set(self._delete_assets(tenant_id, [asset_ids[index] for index in chunk], api_token))
+            return [index for index in chunk if asset_ids[index] in deleted_asset_ids]
+
+        chunks = split_to_chunks(list(asset_ids), chunk_size, BULK_WRITE_MAX_CHUNK_BYTES)
+        return run_bulk_write(send_chunk, chunks, list(asset_ids), parallelism)
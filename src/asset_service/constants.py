@@ -1,3 +1,25 @@
 TENANT_HEADER = "Tenant"
 REGION_NAME = "AWS_REGION_NAME"
 ACCOUNT_ID = "AWS_ACCOUNT_ID"
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_MAX_CONCURRENCY = 50
+DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_BASE_SECONDS = 0.1
+DEFAULT_BACKOFF_MAX_SECONDS = 5
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RESET_SECONDS = 30
+DEFAULT_HEDGE_MAX_WORKERS = 8
+DEFAULT_ASSET_CACHE_MAX_SIZE = 10_000
+DEFAULT_ASSET_CACHE_TTL_SECONDS = 60
+GET_ASSETS_BY_IDS_BATCH_SIZE = 100  # The DynamoDB BatchGetItem limit
+BULK_WRITE_CHUNK_SIZE = 100
+BULK_WRITE_MAX_CHUNK_BYTES = 5 * 1024 * 1024  # Keeps the request body below the 6MB lambda payload limit
+BULK_WRITE_PARALLELISM = 4
+DEFAULT_RESPONSE_CACHE_MAX_SIZE = 256
+DEFAULT_SERVICE_URL_TTL_SECONDS = 300
+ASSET_SERVICE_NAME = "asset-service"
+DEFAULT_PAYLOAD_LOG_SAMPLE_RATE = 0.01
+DEFAULT_PAYLOAD_LOG_MAX_ITEMS = 5
+DEFAULT_EMF_NAMESPACE = "AssetServiceClient"
+EXPORT_READ_CHUNK_BYTES = 64 * 1024
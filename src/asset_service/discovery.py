@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Set, Tuple
+
+from jit_utils.logger import logger
+
+from .constants import DEFAULT_SERVICE_URL_TTL_SECONDS
+
+ServiceKey = Tuple[str, bool]  # (service name, test mode)
+PINNED = float("inf")  # The resolved_at of the urls pinned with set(), they never expire
+
+
+class ResolvedUrl(NamedTuple):
+    url: str
+    resolved_at: float  # time.monotonic() of the resolution
+
+
+def resolve_service_url(service_name: str, test_mode: bool) -> str:
+    """
+    Service discovery is imported on first use, so importing the package (e.g. only for the models) stays cheap
+    """
+    if test_mode:
+        from jit_utils.service_discovery.test_utils import get_test_service_url
+        return get_test_service_url(service_name)
+
+    from jit_utils.service_discovery import get_service_url
+    return get_service_url(service_name)["service_url"]
+
+
+class ServiceUrlCache:
+    """
+    Caches the service discovery (SSM) lookups of the process, so building a client doesn't make network calls.
+
+    An url older than ttl_seconds is still returned, while a background thread resolves it again.
+    Clients invalidate the url of a service when a request to it fails to connect, the next request resolves it again.
+    Urls pinned with set() are never resolved, nor invalidated.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_SERVICE_URL_TTL_SECONDS,
+                 resolve: Callable[[str, bool], str] = resolve_service_url) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._resolve = resolve
+        self._urls: Dict[ServiceKey, ResolvedUrl] = {}
+        self._refreshing: Set[ServiceKey] = set()
+        self._lock = threading.Lock()
+
+    def _resolve_and_store(self, key: ServiceKey) -> str:
+        url = self._resolve(*key)
+        self._urls[key] = ResolvedUrl(url, time.monotonic())
+        return url
+
+    def _refresh_in_background(self, key: ServiceKey) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                self._resolve_and_store(key)
+            except Exception:
+                logger.exception(f"Failed to refresh the url of {key=}, the previous url is kept")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def get(self, service_name: str, test_mode: bool = False) -> str:
+        key = (service_name, test_mode)
+        resolved: Optional[ResolvedUrl] = self._urls.get(key)
+        if resolved is None:
+            return self._resolve_and_store(key)
+
+        if time.monotonic() - resolved.resolved_at > self.ttl_seconds:
+            self._refresh_in_background(key)
+        return resolved.url
+
+    def set(self, service_name: str, url: str, test_mode: bool = False) -> None:
+        """
+        Pin the url of a service, e.g. to run the clients against a local mock
+        """
+        self._urls[(service_name, test_mode)] = ResolvedUrl(url, PINNED)
+
+    def invalidate(self, service_name: str, test_mode: bool = False) -> None:
+        key = (service_name, test_mode)
+        resolved = self._urls.get(key)
+        if resolved is not None and resolved.resolved_at == PINNED:
+            return  # Pinned explicitly, a failed request must not replace it with the discovered url
+        logger.info(f"Invalidating the url of {service_name=}")
+        self._urls.pop(key, None)
+
+    def clear(self) -> None:
+        self._urls.clear()
+
+
+service_url_cache = ServiceUrlCache()
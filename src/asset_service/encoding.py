@@ -0,0 +1,73 @@
+import gzip
+import json
+from typing import Any, Dict, Literal, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # msgpack is an optional dependency, see the asset_service[msgpack] extra
+    msgpack = None  # type: ignore
+
+try:
+    import zstandard
+except ImportError:  # zstandard is an optional dependency, see the asset_service[zstd] extra
+    zstandard = None  # type: ignore
+
+WireFormat = Literal["json", "msgpack"]
+Compression = Literal["gzip", "zstd"]
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MEDIA_TYPES: Dict[str, str] = {"json": JSON_MEDIA_TYPE, "msgpack": MSGPACK_MEDIA_TYPE}
+GZIP_COMPRESSION_LEVEL = 6
+ZSTD_COMPRESSION_LEVEL = 3
+
+
+def validate_wire_options(wire_format: WireFormat, compression: Optional[Compression]) -> None:
+    """
+    Fail fast when an optional dependency of the chosen wire format or compression is not installed
+    """
+    if wire_format not in MEDIA_TYPES:
+        raise ValueError(f"Unknown wire format {wire_format}, expected one of {list(MEDIA_TYPES)}")
+    if wire_format == "msgpack" and msgpack is None:
+        raise ValueError("The msgpack wire format requires the msgpack package (asset_service[msgpack])")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package (asset_service[zstd])")
+    if compression not in (None, "gzip", "zstd"):
+        raise ValueError(f"Unknown compression {compression}, expected gzip or zstd")
+
+
+def get_accept_headers(wire_format: WireFormat) -> Dict[str, str]:
+    """
+    Response compression is negotiated by requests itself (Accept-Encoding is gzip, and zstd when urllib3 supports it)
+    """
+    return {"Accept": MEDIA_TYPES[wire_format]}
+
+
+def encode_body(payload: Any, wire_format: WireFormat,
+                compression: Optional[Compression]) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serialize a request body, returns the body and the headers describing it
+    """
+    if wire_format == "msgpack":
+        body = msgpack.packb(payload, use_bin_type=True)
+    else:
+        body = json.dumps(payload).encode()
+    headers = {"Content-Type": MEDIA_TYPES[wire_format]}
+
+    if compression == "gzip":
+        body = gzip.compress(body, compresslevel=GZIP_COMPRESSION_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+    elif compression == "zstd":
+        body = zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).compress(body)
+        headers["Content-Encoding"] = "zstd"
+    return body, headers
+
+
+def decode_body(content: bytes, content_type: Optional[str]) -> Any:
+    """
+    Deserialize a response body that was already decompressed by the http client
+    """
+    if content_type and content_type.startswith(MSGPACK_MEDIA_TYPE):
+        return msgpack.unpackb(content, raw=False)
+    return json.loads(content)
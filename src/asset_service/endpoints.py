@@ -1,9 +1,24 @@
+from .constants import ASSET_SERVICE_NAME
+
 ASSET_SERVICE_GET_ALL_ASSETS = "{asset_service}/"
 ASSET_SERVICE_GET_ASSET_BY_ID = "{asset_service}/asset/{asset_id}"
 ASSET_SERVICE_GET_ASSET_BY_ATTRIBUTES = (
     "{asset_service}/type/{asset_type}/vendor/{vendor}/owner/{owner}/name/{asset_name}"
 )
+ASSET_SERVICE_GET_ASSETS_BY_TAG = "{asset_service}/tag/{tag_name}/{tag_value}"
 ASSET_SERVICE_GET_ASSETS_BY_ATTRIBUTES_BASE = "{asset_service}/type/{asset_type}"
 ASSET_SERVICE_PATCH_ASSET = "{asset_service}/asset/{asset_id}"
+ASSET_SERVICE_PATCH_ASSET_TAGS = "{asset_service}/asset/{asset_id}/tags"
 ASSET_SERVICE_PATCH_MULTIPLE_ASSETS = "{asset_service}/assets/"
 ASSET_SERVICE_DELETE_ASSETS = "{asset_service}/delete/"
+ASSET_SERVICE_GET_ASSETS_BY_IDS = "{asset_service}/batch-get/"
+ASSET_SERVICE_GET_ASSET_CHANGES = "{asset_service}/changes"
+ASSET_SERVICE_EXPORT_ASSETS = "{asset_service}/export"
+
+
+def get_asset_service_url(test_mode: bool) -> str:
+    """
+    Resolved once per process and cached (see ServiceUrlCache)
+    """
+    from .discovery import service_url_cache
+    return service_url_cache.get(ASSET_SERVICE_NAME, test_mode)
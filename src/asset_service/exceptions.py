@@ -1,3 +1,5 @@
+from http import HTTPStatus
+
 from jit_utils.requests.exceptions import JitApiException
 
 
@@ -18,3 +20,35 @@ class AssetNotFoundException(AssetServiceApiException):
 class UnhandledException(AssetServiceApiException):
     """Exception raised when the asset service backend returns an error that is not specified in the above."""
     pass
+
+
+class UnauthorizedException(UnhandledException):
+    """Exception raised when the asset service rejects the api token of the request (e.g. it was revoked).
+    An UnhandledException, which 401 used to raise, so the existing handlers keep catching it."""
+    pass
+
+
+class ConflictException(UnhandledException):
+    """Exception raised when the asset service rejects a write that conflicts with a concurrent write of the asset.
+    An UnhandledException, which 409 used to raise, so the existing handlers keep catching it."""
+    pass
+
+
+class CircuitOpenException(AssetServiceApiException):
+    """Exception raised without calling the asset service when the circuit of the endpoint is open."""
+    pass
+
+
+def raise_for_status(status_code: int, text: str) -> None:
+    """
+    Raise the asset service exception matching an error status code, shared by the sync and async clients
+    """
+    if status_code == HTTPStatus.BAD_REQUEST:
+        raise RequestValidationException(text)
+    if status_code == HTTPStatus.UNAUTHORIZED:
+        raise UnauthorizedException(text)
+    if status_code == HTTPStatus.NOT_FOUND:
+        raise AssetNotFoundException(text)
+    if status_code == HTTPStatus.CONFLICT:
+        raise ConflictException(text)
+    raise UnhandledException(text)
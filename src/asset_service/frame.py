@@ -0,0 +1,191 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .models import Asset
+
+NUMERIC_COLUMNS = ("risk_score", "score")
+BOOLEAN_COLUMNS = ("is_active", "is_covered", "is_archived", "is_branch_protected_by_jit")
+STRING_COLUMNS = ("asset_id", "tenant_id", "asset_type", "vendor", "owner", "asset_name", "risk_status",
+                  "environment", "status")
+# The value of a boolean missing from a record, the default of the Asset model (an asset is covered by default)
+BOOLEAN_DEFAULTS = {name: bool(Asset.__fields__[name].default) for name in BOOLEAN_COLUMNS}
+
+
+class DictionaryColumn(NamedTuple):
+    """
+    A dictionary encoded string column, the value of row i is categories[codes[i]]
+    """
+    codes: np.ndarray
+    categories: List[Optional[str]]
+
+    def decode(self) -> np.ndarray:
+        return np.array(self.categories, dtype=object)[self.codes]
+
+    def code_of(self, value: Optional[str]) -> int:
+        """
+        The code of value, -1 if no row holds it
+        """
+        try:
+            return self.categories.index(value)
+        except ValueError:
+            return -1
+
+    def sort_keys(self) -> np.ndarray:
+        """
+        An integer per row that sorts like the decoded strings (None first)
+        """
+        order = sorted(range(len(self.categories)), key=lambda code: (self.categories[code] is not None,
+                                                                      self.categories[code] or ""))
+        ranks = np.empty(len(self.categories), dtype=np.int64)
+        ranks[order] = np.arange(len(self.categories))
+        return ranks[self.codes]
+
+
+def _encode_strings(values: Iterable[Optional[str]], count: int) -> DictionaryColumn:
+    codes_by_value: Dict[Optional[str], int] = {}
+    codes = np.fromiter((codes_by_value.setdefault(value, len(codes_by_value)) for value in values),
+                        dtype=np.int32, count=count)
+    return DictionaryColumn(codes, list(codes_by_value))
+
+
+class AssetFrame:
+    """
+    Column oriented view of a list of assets for analytics.
+    Numeric and boolean fields are stored in numpy arrays (missing booleans are stored as the default of the Asset
+    model) and string fields are dictionary encoded, so filtering, sorting and grouping are a handful of vectorized
+    operations instead of an attribute lookup per asset.
+
+    Usage:
+        frame = asset_service.get_all_assets_frame(tenant_id, api_token)
+        top_risks = frame.where(asset_type="repo", is_covered=True).top_k("risk_score", 10)
+        counts = frame.group_count("asset_type", "vendor")
+    """
+
+    def __init__(self, numeric: Dict[str, np.ndarray], boolean: Dict[str, np.ndarray],
+                 strings: Dict[str, DictionaryColumn]) -> None:
+        self.numeric = numeric
+        self.boolean = boolean
+        self.strings = strings
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "AssetFrame":
+        """
+        Build the frame straight from asset service json records, no Asset objects are created
+        """
+        count = len(records)
+        return cls(
+            numeric={name: np.fromiter((record.get(name) or 0 for record in records), dtype=np.int64, count=count)
+                     for name in NUMERIC_COLUMNS},
+            boolean={name: np.fromiter((bool(record.get(name, BOOLEAN_DEFAULTS[name])) for record in records),
+                                       dtype=bool, count=count)
+                     for name in BOOLEAN_COLUMNS},
+            strings={name: _encode_strings((record.get(name) for record in records), count)
+                     for name in STRING_COLUMNS},
+        )
+
+    @classmethod
+    def from_assets(cls, assets: List[Asset]) -> "AssetFrame":
+        return cls.from_records([
+            {name: getattr(asset, name) for name in NUMERIC_COLUMNS + BOOLEAN_COLUMNS + STRING_COLUMNS}
+            for asset in assets
+        ])
+
+    def __len__(self) -> int:
+        return len(self.strings["asset_id"].codes)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return NUMERIC_COLUMNS + BOOLEAN_COLUMNS + STRING_COLUMNS
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        The values of a column, string columns are decoded to an object array
+        """
+        if name in self.strings:
+            return self.strings[name].decode()
+        if name in self.numeric:
+            return self.numeric[name]
+        if name in self.boolean:
+            return self.boolean[name]
+        raise KeyError(f"Unknown column {name}, the available columns are {self.columns}")
+
+    def _sort_keys(self, name: str) -> np.ndarray:
+        if name in self.strings:
+            return self.strings[name].sort_keys()
+        return self.column(name).astype(np.int64)
+
+    def _take(self, rows: np.ndarray) -> "AssetFrame":
+        return AssetFrame(
+            numeric={name: values[rows] for name, values in self.numeric.items()},
+            boolean={name: values[rows] for name, values in self.boolean.items()},
+            strings={name: DictionaryColumn(column.codes[rows], column.categories)
+                     for name, column in self.strings.items()},
+        )
+
+    def equals(self, name: str, value: Any) -> np.ndarray:
+        """
+        A boolean mask of the rows where the column equals value
+        """
+        if name in self.strings:
+            return self.strings[name].codes == self.strings[name].code_of(value)
+        return self.column(name) == value
+
+    def filter(self, mask: np.ndarray) -> "AssetFrame":
+        return self._take(np.flatnonzero(mask))
+
+    def where(self, **equals: Any) -> "AssetFrame":
+        """
+        The rows matching all the given column values, e.g. frame.where(asset_type="repo", is_covered=False)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in equals.items():
+            mask &= self.equals(name, value)
+        return self.filter(mask)
+
+    def sort_by(self, name: str, descending: bool = False) -> "AssetFrame":
+        keys = self._sort_keys(name)
+        rows = np.argsort(-keys if descending else keys, kind="stable")
+        return self._take(rows)
+
+    def top_k(self, name: str, k: int, largest: bool = True) -> "AssetFrame":
+        """
+        The k rows with the largest (or smallest) values of the column, sorted
+        """
+        keys = self._sort_keys(name)
+        keys = -keys if largest else keys
+        if k < len(self):
+            candidates = np.argpartition(keys, k)[:k]
+        else:
+            candidates = np.arange(len(self))
+        rows = candidates[np.argsort(keys[candidates], kind="stable")]
+        return self._take(rows)
+
+    def count(self, name: str) -> int:
+        """
+        The number of rows where the boolean column is True, e.g. frame.count("is_covered")
+        """
+        return int(np.count_nonzero(self.boolean[name]))
+
+    def group_count(self, *names: str) -> Dict[Tuple[Any, ...], int]:
+        """
+        The number of rows of each distinct combination of the given columns' values
+        """
+        if not len(self):
+            return {}
+
+        keys = np.stack([self.strings[name].codes if name in self.strings else self.column(name).astype(np.int64)
+                         for name in names], axis=1)
+        groups, counts = np.unique(keys, axis=0, return_counts=True)
+        decoded_groups = []
+        for group in groups:
+            decoded_groups.append(tuple(
+                self.strings[name].categories[code] if name in self.strings
+                else bool(code) if name in self.boolean else int(code)
+                for name, code in zip(names, group)
+            ))
+        return dict(zip(decoded_groups, (int(count) for count in counts)))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        columns = {name: self.column(name).tolist() for name in self.columns}
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
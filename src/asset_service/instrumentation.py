@@ -0,0 +1,271 @@
+import json
+import math
+import random
+import reprlib
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from jit_utils.logger import logger
+
+from .constants import DEFAULT_EMF_NAMESPACE, DEFAULT_PAYLOAD_LOG_MAX_ITEMS, DEFAULT_PAYLOAD_LOG_SAMPLE_RATE
+
+LATENCY_MS = "latency_ms"
+BYTES_SENT = "bytes_sent"
+BYTES_RECEIVED = "bytes_received"
+DECODE_MS = "decode_ms"
+PARSE_MS = "parse_ms"
+ERRORS = "errors"
+
+HISTOGRAM_BUCKETS_PER_DOUBLING = 8  # The percentiles are accurate to about 4.5%
+_ZERO_BUCKET = -(2 ** 63)
+EMF_MAX_VALUES = 100  # The maximal number of values of a metric in a single EMF document
+EMF_METRICS = {  # The CloudWatch name and unit of every metric
+    LATENCY_MS: ("Latency", "Milliseconds"),
+    BYTES_SENT: ("BytesSent", "Bytes"),
+    BYTES_RECEIVED: ("BytesReceived", "Bytes"),
+    DECODE_MS: ("DecodeTime", "Milliseconds"),
+    PARSE_MS: ("ParseTime", "Milliseconds"),
+    ERRORS: ("Errors", "Count"),
+}
+
+
+class RequestSample(NamedTuple):
+    endpoint: str  # The method and the first path segment, e.g. "GET /asset", see resilience.get_endpoint
+    status_code: int  # 0 when no response was received (connection error, timeout, open circuit)
+    latency_seconds: float  # Including the retries
+    bytes_sent: int
+    # The Content-Length of the response, which is its size as transferred (before decompression). Responses without
+    # one (chunked) count the size of their decompressed body, and streamed ones without one count 0
+    bytes_received: int
+
+
+class Instrumentation:
+    """
+    The hooks called by AssetService for every request, they do nothing by default.
+    The hooks run on the request path, implementations must be cheap and should not raise (a raising hook is logged
+    and ignored).
+    """
+
+    def on_request(self, sample: RequestSample) -> None:
+        pass
+
+    def on_decode(self, endpoint: str, seconds: float) -> None:
+        """
+        The time to decode the response body (decompress and parse the json / msgpack)
+        """
+
+    def on_parse(self, endpoint: str, seconds: float) -> None:
+        """
+        The time to build the models returned to the caller from the decoded body
+        """
+
+
+class InstrumentationGroup(Instrumentation):
+    """
+    Calls several instrumentations, e.g. a HistogramCollector and an EmfExporter
+    """
+
+    def __init__(self, *instrumentations: Instrumentation) -> None:
+        self.instrumentations = instrumentations
+
+    def on_request(self, sample: RequestSample) -> None:
+        for instrumentation in self.instrumentations:
+            instrumentation.on_request(sample)
+
+    def on_decode(self, endpoint: str, seconds: float) -> None:
+        for instrumentation in self.instrumentations:
+            instrumentation.on_decode(endpoint, seconds)
+
+    def on_parse(self, endpoint: str, seconds: float) -> None:
+        for instrumentation in self.instrumentations:
+            instrumentation.on_parse(endpoint, seconds)
+
+
+class Histogram:
+    """
+    A log bucketed histogram, it takes constant memory whatever the number of values
+    """
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        bucket = math.floor(math.log2(value) * HISTOGRAM_BUCKETS_PER_DOUBLING) if value > 0 else _ZERO_BUCKET
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        The value below which fraction of the values are (fraction is between 0 and 1), 0 when there are no values
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                if bucket == _ZERO_BUCKET:
+                    return 0.0
+                middle = 2 ** ((bucket + 0.5) / HISTOGRAM_BUCKETS_PER_DOUBLING)
+                return min(max(middle, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class HistogramCollector(Instrumentation):
+    """
+    Keeps a histogram of every metric per endpoint and counts the status codes, in memory.
+
+    Usage:
+        collector = HistogramCollector()
+        service = AssetService(instrumentation=collector)
+        ...
+        collector.get_histogram("GET /asset", LATENCY_MS).percentile(0.99)
+        collector.snapshot()  # {"GET /asset": {"latency_ms": {"count": ..., "p50": ...}, ..., "status_codes": {...}}}
+    """
+
+    def __init__(self) -> None:
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.status_codes: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, endpoint: str, metric: str, value: float) -> None:
+        key = (endpoint, metric)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].add(value)
+
+    def on_request(self, sample: RequestSample) -> None:
+        with self._lock:
+            self._observe(sample.endpoint, LATENCY_MS, sample.latency_seconds * 1000)
+            self._observe(sample.endpoint, BYTES_SENT, sample.bytes_sent)
+            self._observe(sample.endpoint, BYTES_RECEIVED, sample.bytes_received)
+            self.status_codes.setdefault(sample.endpoint, Counter())[sample.status_code] += 1
+
+    def on_decode(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self._observe(endpoint, DECODE_MS, seconds * 1000)
+
+    def on_parse(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self._observe(endpoint, PARSE_MS, seconds * 1000)
+
+    def get_histogram(self, endpoint: str, metric: str) -> Optional[Histogram]:
+        return self.histograms.get((endpoint, metric))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result: Dict[str, Dict[str, Any]] = {}
+            for (endpoint, metric), histogram in self.histograms.items():
+                result.setdefault(endpoint, {})[metric] = histogram.summary()
+            for endpoint, status_codes in self.status_codes.items():
+                result.setdefault(endpoint, {})["status_codes"] = dict(status_codes)
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.status_codes.clear()
+
+
+class EmfExporter(Instrumentation):
+    """
+    Writes the metrics as CloudWatch embedded metric format (EMF) log lines, which CloudWatch turns into metrics of
+    namespace with the dimensions and an Endpoint dimension. The values are buffered per endpoint and written
+    EMF_MAX_VALUES at most per line, when a buffer is full and on flush() (call it at the end of every invocation).
+    """
+
+    def __init__(self, namespace: str = DEFAULT_EMF_NAMESPACE, dimensions: Optional[Dict[str, str]] = None,
+                 write: Callable[[str], None] = print) -> None:
+        """
+        write: writes a log line, the lambda stdout is collected by CloudWatch logs
+        """
+        self.namespace = namespace
+        self.dimensions = dimensions or {}
+        self.write = write
+        self._values: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, endpoint: str, metrics: Sequence[Tuple[str, float]]) -> None:
+        with self._lock:
+            values = self._values.setdefault(endpoint, {})
+            for metric, value in metrics:
+                values.setdefault(metric, []).append(value)
+            if not any(len(metric_values) >= EMF_MAX_VALUES for metric_values in values.values()):
+                return
+            del self._values[endpoint]
+        self.write(self._format(endpoint, values))
+
+    def _format(self, endpoint: str, values: Dict[str, List[float]]) -> str:
+        document: Dict[str, Any] = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [[*self.dimensions, "Endpoint"]],
+                    "Metrics": [{"Name": EMF_METRICS[metric][0], "Unit": EMF_METRICS[metric][1]} for metric in values],
+                }],
+            },
+            **self.dimensions,
+            "Endpoint": endpoint,
+        }
+        for metric, metric_values in values.items():
+            document[EMF_METRICS[metric][0]] = metric_values
+        return json.dumps(document)
+
+    def on_request(self, sample: RequestSample) -> None:
+        is_error = sample.status_code == 0 or sample.status_code >= 400
+        self._observe(sample.endpoint, [(LATENCY_MS, sample.latency_seconds * 1000), (BYTES_SENT, sample.bytes_sent),
+                                        (BYTES_RECEIVED, sample.bytes_received), (ERRORS, int(is_error))])
+
+    def on_decode(self, endpoint: str, seconds: float) -> None:
+        self._observe(endpoint, [(DECODE_MS, seconds * 1000)])
+
+    def on_parse(self, endpoint: str, seconds: float) -> None:
+        self._observe(endpoint, [(PARSE_MS, seconds * 1000)])
+
+    def flush(self) -> None:
+        with self._lock:
+            buffered, self._values = self._values, {}
+        for endpoint, values in buffered.items():
+            self.write(self._format(endpoint, values))
+
+
+class PayloadLogger:
+    """
+    Logs the payloads of a sample of the calls. A payload is formatted only when its call is sampled, and only its
+    first max_items items, so bulk calls don't pay for formatting thousands of assets.
+    """
+
+    def __init__(self, sample_rate: float = DEFAULT_PAYLOAD_LOG_SAMPLE_RATE,
+                 max_items: int = DEFAULT_PAYLOAD_LOG_MAX_ITEMS) -> None:
+        self.sample_rate = sample_rate
+        self._repr = reprlib.Repr()
+        self._repr.maxlist = self._repr.maxtuple = self._repr.maxdict = max_items
+        self._repr.maxstring = self._repr.maxother = 500
+
+    def log(self, message: str, **payloads: Any) -> None:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        formatted = ", ".join(f"{name}={self._repr.repr(payload)}" for name, payload in payloads.items())
+        logger.info(f"{message}: {formatted}")
@@ -1,11 +1,50 @@
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TypeVar, get_type_hints
 from typing_extensions import Literal
 from jit_utils.models.tags.entities import Tag
 
-from pydantic import BaseModel
+from pydantic import BaseModel, create_model
+
+# Defined here and not imported, the mock image copies this module alone (see service_mocks/dockerfile-test)
+TEAM_TAG = "team"
+ModelT = TypeVar('ModelT', bound=BaseModel)
+LimitedAssetT = TypeVar('LimitedAssetT', bound='LimitedAsset')
+
+_IMMUTABLE_DEFAULT_TYPES = (type(None), bool, int, float, str, Enum)
+
+
+@lru_cache(maxsize=None)
+def _get_model_defaults(model: Type[BaseModel]) -> Tuple[Dict[str, Any], Tuple[str, ...]]:
+    """
+    The shared immutable defaults of a model and the names of its fields that need a fresh default per instance
+    """
+    immutable_defaults = {}
+    fields_with_mutable_defaults = []
+    for name, field in model.__fields__.items():
+        if isinstance(field.default, _IMMUTABLE_DEFAULT_TYPES) and field.default_factory is None:
+            immutable_defaults[name] = field.default
+        else:
+            fields_with_mutable_defaults.append(name)
+    return immutable_defaults, tuple(fields_with_mutable_defaults)
+
+
+def construct_without_validation(model: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    """
+    A faster BaseModel.construct: defaults are computed once per model instead of once per instance and field,
+    unknown keys are dropped. Nested models are not converted, the caller is responsible for them.
+    """
+    immutable_defaults, fields_with_mutable_defaults = _get_model_defaults(model)
+    fields_values = {**immutable_defaults, **{name: value for name, value in data.items() if name in model.__fields__}}
+    for name in fields_with_mutable_defaults:
+        if name not in fields_values:
+            fields_values[name] = model.__fields__[name].get_default()
+
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", fields_values)
+    object.__setattr__(instance, "__fields_set__", model.__fields__.keys() & data.keys())
+    return instance
 
-from src.lib.constants import TEAM_TAG
 
 AssetType = Literal['repo', 'org', 'aws_account', 'gcp_account', 'azure_account', 'web', 'api']
 
@@ -83,6 +122,20 @@ class LimitedAsset(ZapAssetFields, LimitedAwsAssetFields, CloudProviderFields):
         dict["teams"] = self.teams
         return dict
 
+    @classmethod
+    def construct_trusted(cls: Type[LimitedAssetT], data: Dict[str, Any]) -> LimitedAssetT:
+        """
+        Build an asset from data that was already validated by the asset service, skipping the pydantic validation.
+        Only the nested tags and the status enum are converted, so the result behaves like a validated asset.
+        Never use it on data that doesn't come from the asset service.
+        """
+        asset = construct_without_validation(cls, data)
+        if asset.tags:
+            object.__setattr__(asset, "tags", [construct_without_validation(Tag, tag) for tag in data["tags"]])
+        if asset.status is not None:
+            object.__setattr__(asset, "status", AssetStatus(asset.status))
+        return asset
+
 
 class CreateAssetRequest(ZapAssetFields, AwsAssetFields, CloudProviderFields):
     external_id: Optional[str]
@@ -102,6 +155,36 @@ class Asset(LimitedAsset, AwsAssetFields):
     pass
 
 
+class PartialAsset(BaseModel):
+    """
+    Base of the models returned by reads with a fields projection, see get_partial_asset_model
+    """
+
+
+@lru_cache(maxsize=128)
+def _create_partial_asset_model(fields: Tuple[str, ...]) -> Type[PartialAsset]:
+    type_hints = get_type_hints(Asset)
+    field_definitions: Dict[str, Any] = {}
+    for name in fields:
+        if name == "teams":
+            field_definitions[name] = (List[str], [])
+        elif name in Asset.__fields__:
+            field = Asset.__fields__[name]
+            field_definitions[name] = (type_hints[name], ... if field.required else field.default)
+        else:
+            raise ValueError(f"Unknown asset field {name}")
+
+    return create_model(f"PartialAsset_{'_'.join(fields)}", __base__=PartialAsset, **field_definitions)
+
+
+def get_partial_asset_model(fields: Sequence[str]) -> Type[PartialAsset]:
+    """
+    A model holding only the given Asset fields ("teams" included), used to parse projected read responses.
+    The models are cached, so the same fields always return the same model.
+    """
+    return _create_partial_asset_model(tuple(sorted(set(fields))))
+
+
 class AssetKeyAttributes(BaseModel):
     tenant_id: str
     asset_type: AssetType
@@ -153,6 +236,14 @@ class UpdateAssetRequest(ZapAssetFields, AwsAssetFields):
     status_details: Optional[str]
 
 
+class UpdateAssetTags(BaseModel):
+    """
+    A delta of tags applied atomically by the asset service, tags that are in both lists are removed
+    """
+    tags_to_add: List[Tag] = []
+    tags_to_remove: List[Tag] = []
+
+
 class AssetCount(BaseModel):
     covered: int
     not_covered: int
@@ -162,6 +253,46 @@ class CreateAssetsResponse(BaseModel):
     created_assets_count: str
 
 
+class GetAssetsByIdsResponse(BaseModel):
+    assets: List[Asset]
+    missing_asset_ids: List[str] = []
+
+
+class AssetsPage(BaseModel):
+    """
+    A single page of assets, next_cursor is None when there are no more pages to fetch
+    """
+    items: List[Asset]
+    next_cursor: Optional[str] = None
+
+
+class AssetChangesPage(BaseModel):
+    """
+    The assets created, updated (archived included) or deleted after a watermark, in the order of their changes.
+    Deleted assets are tombstones, only their ids are returned. Pass watermark as the since of the next request,
+    to fetch the next page while has_more is true and the later changes afterwards.
+    """
+    assets: List[Asset]
+    deleted_asset_ids: List[str] = []
+    watermark: str
+    has_more: bool = False
+
+
+class DeleteAssetsResponse(BaseModel):
+    deleted_asset_ids: List[str]
+
+
+class BulkWriteFailure(BaseModel):
+    index: int  # The position of the failed item in the list passed to the bulk write
+    asset_id: Optional[str]
+    error: str
+
+
+class BulkWriteResult(BaseModel):
+    succeeded: List[int] = []  # The positions of the written items in the list passed to the bulk write
+    failed: List[BulkWriteFailure] = []
+
+
 class DeleteTenantData(BaseModel):
     tenant_id: str
 
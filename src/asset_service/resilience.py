@@ -0,0 +1,278 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import Any, Callable, Dict, FrozenSet, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+from jit_utils.logger import logger
+
+from .constants import (DEFAULT_BACKOFF_BASE_SECONDS, DEFAULT_BACKOFF_MAX_SECONDS, DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+                        DEFAULT_CIRCUIT_RESET_SECONDS, DEFAULT_HEDGE_MAX_WORKERS, DEFAULT_MAX_ATTEMPTS,
+                        DEFAULT_TIMEOUT_SECONDS)
+from .exceptions import CircuitOpenException
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+RETRYABLE_STATUSES = frozenset({HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.BAD_GATEWAY, HTTPStatus.SERVICE_UNAVAILABLE,
+                                HTTPStatus.GATEWAY_TIMEOUT})
+
+
+class ResiliencePolicy(NamedTuple):
+    """
+    timeout_seconds: the connect and read timeout of each attempt
+    max_attempts: the attempts of idempotent calls, 1 disables the retries
+    backoff_base_seconds, backoff_max_seconds: the retries wait a random time up to min(max, base * 2 ** retry),
+        or the Retry-After of the response when it is longer (a Retry-After longer than the max is not waited for)
+    hedge_after_seconds: send a second identical GET when the first didn't complete after this long and use the
+        response that arrives first (optional, disabled by default)
+    hedge_max_workers: the threads of the client that send the hedged GETs, a hedged call waits for a free thread
+        when they are all busy (each hedged call uses one or two)
+    circuit_failure_threshold: consecutive failures of an endpoint that open its circuit, 0 disables the breaker
+        (a 429 is retried but is neither a failure nor a success of the circuit, throttling must not fail the endpoint
+        for every caller, nor close the circuit of an endpoint that is shedding load)
+    circuit_reset_seconds: how long an open circuit fails fast before a single trial call is let through
+    """
+    timeout_seconds: Optional[float] = DEFAULT_TIMEOUT_SECONDS
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    backoff_base_seconds: float = DEFAULT_BACKOFF_BASE_SECONDS
+    backoff_max_seconds: float = DEFAULT_BACKOFF_MAX_SECONDS
+    retry_statuses: FrozenSet[int] = RETRYABLE_STATUSES
+    hedge_after_seconds: Optional[float] = None
+    hedge_max_workers: int = DEFAULT_HEDGE_MAX_WORKERS
+    circuit_failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD
+    circuit_reset_seconds: float = DEFAULT_CIRCUIT_RESET_SECONDS
+
+
+def get_retry_after_seconds(response: Any) -> Optional[float]:
+    """
+    The Retry-After header of a response in seconds, it is either a number of seconds or an http date
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_endpoint(method: str, url: str) -> str:
+    """
+    The circuit breaker key of a request, the method and the first path segment (e.g. "GET /asset"),
+    so the requests of the same route share a circuit whatever the ids in their path
+    """
+    path = urlparse(url).path.strip("/")
+    return f"{method} /{path.split('/')[0]}"
+
+
+class CircuitBreaker:
+    """
+    Fails fast after threshold consecutive failures, until reset_seconds passed and a trial call succeeds
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float) -> None:
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True  # Half open, a single trial call decides whether the circuit closes
+            return True
+
+    def release(self) -> None:
+        """
+        Records a call that was neither a success nor a failure (e.g. throttled), the failures and the state are kept,
+        a half open circuit lets its next trial call through
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record(self, success: bool) -> bool:
+        """
+        Returns whether this failure opened the circuit
+        """
+        with self._lock:
+            self._trial_in_flight = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return False
+
+            self.failures += 1
+            if self.failures >= self.threshold:
+                was_closed = self.opened_at is None
+                self.opened_at = time.monotonic()
+                return was_closed
+            return False
+
+
+class Resilience:
+    """
+    Runs the requests of a client with the timeouts, retries, hedging and circuit breaking of its policy,
+    and counts what it did in stats (attempts, retries, hedges, hedge_wins, circuit_opened, circuit_rejected).
+    The hedged requests run in a thread pool of the client, created on the first hedged call and shut down by close().
+    """
+
+    def __init__(self, policy: ResiliencePolicy = ResiliencePolicy()) -> None:
+        self.policy = policy
+        self.stats: Dict[str, int] = dict.fromkeys(
+            ("attempts", "retries", "hedges", "hedge_wins", "circuit_opened", "circuit_rejected"), 0)
+        self._circuits: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+
+    def close(self) -> None:
+        """
+        Shuts down the thread pool of the hedged requests without waiting for the requests still running (their
+        responses are dropped), a later hedged call creates a new pool
+        """
+        with self._lock:
+            hedge_executor, self._hedge_executor = self._hedge_executor, None
+        if hedge_executor is not None:
+            hedge_executor.shutdown(wait=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _get_circuit(self, endpoint: str) -> Optional[CircuitBreaker]:
+        if not self.policy.circuit_failure_threshold:
+            return None
+        with self._lock:
+            if endpoint not in self._circuits:
+                self._circuits[endpoint] = CircuitBreaker(self.policy.circuit_failure_threshold,
+                                                          self.policy.circuit_reset_seconds)
+            return self._circuits[endpoint]
+
+    def _get_backoff_seconds(self, retry: int, response: Any) -> Optional[float]:
+        """
+        The time to wait before the next attempt, None when the server asked to wait longer than the policy allows
+        """
+        backoff = random.uniform(0, min(self.policy.backoff_max_seconds,
+                                        self.policy.backoff_base_seconds * 2 ** retry))
+        retry_after = get_retry_after_seconds(response) if response is not None else None
+        if retry_after is None:
+            return backoff
+        if retry_after > self.policy.backoff_max_seconds:
+            return None
+        return max(backoff, retry_after)
+
+    def _send_hedged(self, send: Callable[[Optional[float]], Any]) -> Any:
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=self.policy.hedge_max_workers,
+                                                          thread_name_prefix="asset-service-hedge")
+            hedge_executor = self._hedge_executor
+
+        first = hedge_executor.submit(send, self.policy.timeout_seconds)
+        done, _ = wait([first], timeout=self.policy.hedge_after_seconds)
+        if done:
+            return first.result()
+
+        self._count("hedges")
+        second = hedge_executor.submit(send, self.policy.timeout_seconds)
+        futures = [first, second]
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            future: Future = done.pop()
+            futures.remove(future)
+            if future.exception() is None or not futures:
+                if future is second:
+                    self._count("hedge_wins")
+                return future.result()  # The slower request completes in the background and is dropped
+
+    def _send_once(self, send: Callable[[Optional[float]], Any], hedge: bool) -> Any:
+        self._count("attempts")
+        if hedge and self.policy.hedge_after_seconds is not None:
+            return self._send_hedged(send)
+        return send(self.policy.timeout_seconds)
+
+    def _record(self, endpoint: str, circuit: Optional[CircuitBreaker], success: bool) -> None:
+        if circuit and circuit.record(success):
+            self._count("circuit_opened")
+            logger.warning(f"Opened the circuit of {endpoint}")
+
+    def _attempt(self, endpoint: str, send: Callable[[Optional[float]], Any], hedge: bool) -> Tuple[Any, bool]:
+        """
+        A single attempt through the circuit breaker of the endpoint, returns the response and whether it failed
+        """
+        circuit = self._get_circuit(endpoint)
+        if circuit and not circuit.allow():
+            self._count("circuit_rejected")
+            raise CircuitOpenException(f"The circuit of {endpoint} is open after repeated failures")
+
+        try:
+            response = self._send_once(send, hedge)
+        except BaseException:
+            # Whatever the error (e.g. a connection error, a broken chunked body, too many redirects), the attempt
+            # is recorded, so a half open circuit never waits forever for the result of its trial call
+            self._record(endpoint, circuit, success=False)
+            raise
+
+        failed = response.status_code in self.policy.retry_statuses or response.status_code >= 500
+        if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+            if circuit:
+                circuit.release()
+        else:
+            self._record(endpoint, circuit, success=not failed)
+        return response, failed
+
+    def call(self, method: str, url: str, send: Callable[[Optional[float]], Any],
+             idempotent: Optional[bool] = None, hedge: bool = True) -> Any:
+        """
+        Send a request according to the policy
+
+        Parameters:
+            method(str): the http method of the request
+            url(str): the url of the request, used for the circuit breaker of its endpoint
+            send(Callable): sends the request with the given timeout and returns the response
+            idempotent(bool): whether the request can be retried and hedged (default: by the method)
+            hedge(bool): whether an idempotent GET may be hedged, not for streamed responses since the slower
+                         response would never be closed
+
+        Returns:
+            The last response, a response with a retryable status is returned when the attempts are exhausted
+        """
+        # Imported on first use, the requests stack is a large part of the import time of the package
+        from requests.exceptions import ConnectionError, Timeout
+
+        endpoint = get_endpoint(method, url)
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        max_attempts = self.policy.max_attempts if idempotent else 1
+
+        for attempt in range(max_attempts):
+            is_last_attempt = attempt == max_attempts - 1
+            try:
+                response, failed = self._attempt(endpoint, send, hedge=hedge and idempotent and method == "GET")
+            except (ConnectionError, Timeout):
+                if is_last_attempt:
+                    raise
+                response, failed = None, True
+
+            if not failed or is_last_attempt:
+                return response
+
+            backoff = self._get_backoff_seconds(attempt, response)
+            if backoff is None:
+                return response
+            logger.warning(f"Retrying {endpoint} in {backoff:.3f} seconds, {attempt=}")
+            if response is not None:
+                response.close()  # Releases the connection of a streamed response
+            self._count("retries")
+            time.sleep(backoff)
+        raise ValueError(f"max_attempts must be positive, got {max_attempts}")
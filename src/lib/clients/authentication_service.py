@@ -1,19 +1,174 @@
+import base64
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+
 from jit_utils.requests import get_session
-from jit_utils.service_discovery import get_service_url
 from jit_utils.logger import logger
+from requests.exceptions import ConnectionError as RequestsConnectionError
 
+from src.asset_service.discovery import service_url_cache
 from src.lib.awsv4_sign_requests import sign
 from src.lib.endpoints import AUTH_SERVICE_GENERATE_LAMBDA_API_TOKEN
 
+API_TOKEN_REFRESH_MARGIN_SECONDS = 60  # Tokens are refreshed this long before they expire
+API_TOKEN_DEFAULT_TTL_SECONDS = 300  # Used for tokens without a readable exp claim
+AUTHENTICATION_SERVICE_NAME = 'authentication-service'
+
+
+def get_token_expiry(token: str) -> Optional[float]:
+    """
+    The exp claim of a JWT (the signature is not verified, the token is only read), None if it can't be read
+    """
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class CachedToken(NamedTuple):
+    token: str
+    refresh_at: float  # Epoch seconds
+
+
+class TenantLock:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.users = 0  # The callers holding the lock or waiting for it
+
+
+class ApiTokenCache:
+    """
+    Per tenant cache of api tokens. A token is served until shortly before it expires (or until it is invalidated,
+    e.g. after it was rejected), and concurrent callers of the same tenant share a single request to the
+    authentication service. Expired tokens are evicted when a token is fetched, and the lock of a tenant only exists
+    while callers of the tenant hold it or wait for it, so neither grows with the tenants seen by the process.
+    """
+
+    def __init__(self, refresh_margin_seconds: float = API_TOKEN_REFRESH_MARGIN_SECONDS,
+                 default_ttl_seconds: float = API_TOKEN_DEFAULT_TTL_SECONDS) -> None:
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.default_ttl_seconds = default_ttl_seconds
+        self._tokens: Dict[str, CachedToken] = {}
+        self._tenant_locks: Dict[str, TenantLock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0  # No token was cached for the tenant
+        self.refreshes = 0  # The cached token of the tenant was about to expire
+
+    @contextmanager
+    def _hold_tenant_lock(self, tenant_id: str) -> Iterator[None]:
+        """
+        Holds the lock of the tenant, it is removed by its last user, never while another caller holds or waits for
+        it (a new lock would let that caller fetch a second token concurrently)
+        """
+        with self._lock:
+            tenant_lock = self._tenant_locks.setdefault(tenant_id, TenantLock())
+            tenant_lock.users += 1
+        try:
+            with tenant_lock.lock:
+                yield
+        finally:
+            with self._lock:
+                tenant_lock.users -= 1
+                if not tenant_lock.users:
+                    del self._tenant_locks[tenant_id]
+
+    def _get_valid(self, tenant_id: str) -> Optional[str]:
+        """
+        The cached token of the tenant if it is still valid, counted as a hit
+        """
+        with self._lock:
+            cached = self._tokens.get(tenant_id)
+            if cached and time.time() < cached.refresh_at:
+                self.hits += 1
+                return cached.token
+            return None
+
+    def _put(self, tenant_id: str, token: str) -> None:
+        expiry = get_token_expiry(token)
+        refresh_at = expiry - self.refresh_margin_seconds if expiry else time.time() + self.default_ttl_seconds
+        now = time.time()
+        with self._lock:
+            for expired_tenant_id in [cached_tenant_id for cached_tenant_id, cached in self._tokens.items()
+                                      if cached.refresh_at <= now and cached_tenant_id != tenant_id]:
+                del self._tokens[expired_tenant_id]
+            self._tokens[tenant_id] = CachedToken(token, refresh_at)
+
+    def get(self, tenant_id: str, fetch_token: Callable[[str], str]) -> str:
+        token = self._get_valid(tenant_id)
+        if token:
+            return token
+
+        with self._hold_tenant_lock(tenant_id):
+            # Another caller may have fetched the token while this one waited for the lock
+            token = self._get_valid(tenant_id)
+            if token:
+                return token
+
+            with self._lock:
+                if tenant_id in self._tokens:
+                    self.refreshes += 1
+                else:
+                    self.misses += 1
+            token = fetch_token(tenant_id)
+            self._put(tenant_id, token)
+            return token
+
+    def invalidate(self, tenant_id: str) -> None:
+        with self._lock:
+            self._tokens.pop(tenant_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "refreshes": self.refreshes, "size": len(self._tokens)}
+
+
+api_token_cache = ApiTokenCache()
+
 
 class AuthenticationServiceClient:
-    def __init__(self):
-        self.service = get_service_url('authentication-service')['service_url']
+    def __init__(self, token_cache: Optional[ApiTokenCache] = api_token_cache):
+        """
+        token_cache: the cache of the api tokens, shared by all the clients of the process by default,
+                     None to request a new token on every call
+        """
+        self.token_cache = token_cache
 
-    def get_api_token(self, tenant_id: str) -> str:
+    @property
+    def service(self) -> str:
+        return service_url_cache.get(AUTHENTICATION_SERVICE_NAME)
+
+    def _generate_api_token(self, tenant_id: str) -> str:
         logger.info(f'Getting an api token from authentication service for tenant {tenant_id}')
         url = AUTH_SERVICE_GENERATE_LAMBDA_API_TOKEN.format(authentication_service=self.service)
-        response = get_session().post(url=url, auth=sign(url), json={"tenant_id": tenant_id})
+        try:
+            response = get_session().post(url=url, auth=sign(url), json={"tenant_id": tenant_id})
+        except RequestsConnectionError:
+            service_url_cache.invalidate(AUTHENTICATION_SERVICE_NAME)
+            raise
 
         response.raise_for_status()
         return response.json()
+
+    def get_api_token(self, tenant_id: str) -> str:
+        if self.token_cache is None:
+            return self._generate_api_token(tenant_id)
+        return self.token_cache.get(tenant_id, self._generate_api_token)
+
+    def invalidate_api_token(self, tenant_id: str) -> None:
+        """
+        Drop the cached token of the tenant, call it when a service rejected the token (401),
+        the next get_api_token requests a new one
+        """
+        if self.token_cache is not None:
+            self.token_cache.invalidate(tenant_id)
@@ -0,0 +1,156 @@
+import functools
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, TypeVar
+
+import boto3
+from jit_utils.logger import logger
+
+from jit_utils.aws_clients.config.aws_config import get_aws_config
+
+PUT_EVENTS_MAX_ENTRIES = 10  # The EventBridge limits of a single PutEvents call
+PUT_EVENTS_MAX_BYTES = 256 * 1024
+PUT_EVENTS_ENTRY_OVERHEAD_BYTES = 14  # The size EventBridge accounts for the Time field of each entry
+DEFAULT_PUBLISH_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 0.1
+
+Handler = TypeVar("Handler", bound=Callable[..., Any])
+
+
+class FailedEvent(NamedTuple):
+    entry: Dict[str, str]
+    code: str
+    error: str
+
+
+class PublishEventsException(Exception):
+    """Exception raised when events failed to publish after all the attempts."""
+
+    def __init__(self, failed_events: List[FailedEvent]) -> None:
+        super().__init__(f"Failed to publish {len(failed_events)} events")
+        self.failed_events = failed_events
+
+
+def get_entry_size(entry: Dict[str, str]) -> int:
+    return PUT_EVENTS_ENTRY_OVERHEAD_BYTES + sum(len(entry[key].encode()) for key in ("Source", "DetailType", "Detail"))
+
+
+class EventBridgePublisher:
+    """
+    Buffers events per bus and publishes them with as few PutEvents calls as possible
+    (up to 10 entries and 256 KB per call). Only the entries that failed are retried.
+
+    Use get_event_publisher() to share a single publisher in the process, and decorate the lambda handlers with
+    flush_events_after so the buffered events are published before each invocation ends.
+
+    Usage:
+        publisher = get_event_publisher()
+        for asset in assets:
+            publisher.publish(ASSET_SERVICE_BUS, EVENT_SOURCE, ASSET_CREATED_DETAIL_TYPE, json.dumps(asset.dict()))
+        failed_events = publisher.flush()
+    """
+
+    def __init__(self, client: Any = None, max_attempts: int = DEFAULT_PUBLISH_ATTEMPTS) -> None:
+        self.client = client or boto3.client('events', **get_aws_config())
+        self.max_attempts = max_attempts
+        self._buffers: Dict[str, List[Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, bus_name: str, source: str, detail_type: str, detail: str) -> None:
+        """
+        Buffer an event, it is sent on the next flush
+        """
+        entry = {"Source": source, "DetailType": detail_type, "Detail": detail, "EventBusName": bus_name}
+        with self._lock:
+            self._buffers.setdefault(bus_name, []).append(entry)
+
+    def _put_events(self, entries: List[Dict[str, str]]) -> List[FailedEvent]:
+        failed: List[FailedEvent] = []
+        for attempt in range(self.max_attempts):
+            if attempt:
+                time.sleep(RETRY_DELAY_SECONDS * 2 ** (attempt - 1))
+            response = self.client.put_events(Entries=entries)
+            if not response.get("FailedEntryCount"):
+                return []
+
+            # The result entries are in the order of the request entries
+            failed = [FailedEvent(entry, result["ErrorCode"], result.get("ErrorMessage", ""))
+                      for entry, result in zip(entries, response["Entries"]) if result.get("ErrorCode")]
+            entries = [failed_event.entry for failed_event in failed]
+            logger.warning(f"Failed to publish {len(failed)} events, {attempt=}")
+        return failed
+
+    @staticmethod
+    def _split_to_batches(entries: List[Dict[str, str]]) -> List[List[Dict[str, str]]]:
+        batches: List[List[Dict[str, str]]] = []
+        batch: List[Dict[str, str]] = []
+        batch_size = 0
+        for entry in entries:
+            entry_size = get_entry_size(entry)
+            if batch and (len(batch) == PUT_EVENTS_MAX_ENTRIES or batch_size + entry_size > PUT_EVENTS_MAX_BYTES):
+                batches.append(batch)
+                batch, batch_size = [], 0
+            batch.append(entry)
+            batch_size += entry_size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def flush(self) -> List[FailedEvent]:
+        """
+        Publish all the buffered events
+
+        Returns:
+            List[FailedEvent]: the events that failed to publish after all the attempts
+        """
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+
+        failed: List[FailedEvent] = []
+        for bus_name, entries in buffers.items():
+            bus_failed: List[FailedEvent] = []
+            for batch in self._split_to_batches(entries):
+                try:
+                    bus_failed.extend(self._put_events(batch))
+                except Exception as e:
+                    # The whole call failed (e.g. throttled), the other batches are still sent
+                    logger.exception(f"Failed to publish a batch of {len(batch)} events to {bus_name=}")
+                    bus_failed.extend(FailedEvent(entry, type(e).__name__, str(e)) for entry in batch)
+            logger.info(f"Published {len(entries) - len(bus_failed)} of {len(entries)} events to {bus_name=}")
+            if bus_failed:
+                error_codes = Counter(failed_event.code for failed_event in bus_failed)
+                logger.warning(f"Failed to publish {len(bus_failed)} events to {bus_name=}, "
+                               f"error codes {dict(error_codes)}")
+            failed.extend(bus_failed)
+
+        if failed:
+            logger.error(f"Failed to publish {len(failed)} events, {failed=}")
+        return failed
+
+
+def get_event_publisher() -> EventBridgePublisher:
+    """
+    The publisher shared by the whole process (and by the warm invocations of a lambda)
+    """
+    from src.lib.clients.registry import registry
+    return registry.event_publisher()
+
+
+def flush_events_after(handler: Handler) -> Handler:
+    """
+    Decorate a lambda handler so the events it buffered in the shared publisher are published before it returns
+    (also when it raises). The failed events are logged, a failure to flush never hides the result or the exception
+    of the handler.
+    """
+    @functools.wraps(handler)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            try:
+                get_event_publisher().flush()
+            except Exception:
+                logger.exception("Failed to flush the buffered events")
+
+    return wrapper  # type: ignore
@@ -1,18 +1,36 @@
-from src.lib.clients.sqs import SQSClient
+from typing import List, Optional
+
+from src.lib.clients.sqs import BufferedSQSSender, FailedMessage, SQSClient
 from src.lib.constants import INITIAL_ITEM, JIT_PLAN, PLAN_SERVICE_INIT_PLANS_QUEUE
 
 
 class PlanService:
-    def __init__(self):
-        self.sqs_client = SQSClient()
+    def __init__(self, sqs_client: Optional[SQSClient] = None):
+        self.sqs_client = sqs_client or SQSClient()
+
+    @staticmethod
+    def _get_initial_plan_message(tenant_id: str, vendor: str) -> dict:
+        return {
+            "tenant_id": tenant_id,
+            "vendor": vendor,
+            "plan_slug": JIT_PLAN,
+            "initial_item": INITIAL_ITEM
+        }
 
     def create_initial_plan(self, tenant_id: str, vendor: str) -> None:
         self.sqs_client.send_message(
             queue_name=PLAN_SERVICE_INIT_PLANS_QUEUE,
-            message={
-                "tenant_id": tenant_id,
-                "vendor": vendor,
-                "plan_slug": JIT_PLAN,
-                "initial_item": INITIAL_ITEM
-            }
+            message=self._get_initial_plan_message(tenant_id, vendor)
         )
+
+    def create_initial_plans(self, tenant_id: str, vendors: List[str]) -> List[FailedMessage]:
+        """
+        Same as create_initial_plan for many vendors, the messages are sent in batches
+
+        Returns:
+            List[FailedMessage]: the messages of the vendors that failed to send
+        """
+        with BufferedSQSSender(self.sqs_client) as sender:
+            for vendor in vendors:
+                sender.send(PLAN_SERVICE_INIT_PLANS_QUEUE, self._get_initial_plan_message(tenant_id, vendor))
+        return sender.failed_messages
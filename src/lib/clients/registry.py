@@ -0,0 +1,139 @@
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, NamedTuple, TypeVar, Union
+
+import boto3
+from botocore.config import Config
+from jit_utils.logger import logger
+from jit_utils.requests import get_session
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from jit_utils.aws_clients.config.aws_config import get_aws_config
+
+if TYPE_CHECKING:
+    from src.asset_service.client import AssetService
+    from src.lib.asset_manager import AssetManager
+    from src.lib.clients.eventbridge import EventBridgePublisher
+    from src.lib.clients.plan_service import PlanService
+    from src.lib.clients.sqs import SQSClient
+
+T = TypeVar("T")
+
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+
+
+class ClientsConfig(NamedTuple):
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS  # Per boto3 client and per host of the http session
+    keep_alive: bool = True  # Reuse the connections (and their TLS sessions) of the http session between requests
+
+
+class ClientRegistry:
+    """
+    Lazily creates the clients of the process once and hands out the same instances afterwards.
+    A lambda container keeps its module state between warm invocations, so warm invocations skip the client
+    construction, the service discovery lookups and the TLS handshakes of new connections.
+
+    Usage:
+        from src.lib.clients.registry import registry
+
+        asset_manager = registry.asset_manager()
+        registry.configure(ClientsConfig(max_pool_connections=50))  # Before the clients are first used
+        registry.reset()  # In tests, so each test gets fresh (or freshly mocked) clients
+    """
+
+    def __init__(self, config: ClientsConfig = ClientsConfig()) -> None:
+        self.config = config
+        self._clients: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+
+    def configure(self, config: ClientsConfig) -> None:
+        """
+        Replace the configuration, the clients created with the previous configuration are dropped
+        """
+        with self._lock:
+            self.config = config
+            self._clients.clear()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+    def get(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """
+        The client registered under key, created with factory on first use
+        """
+        try:
+            return self._clients[key]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if key not in self._clients:
+                logger.info(f"Creating client {key}")
+                self._clients[key] = factory()
+            return self._clients[key]
+
+    def boto3_client(self, service_name: str) -> Any:
+        def create_client() -> Any:
+            client_kwargs: Dict[str, Any] = {"service_name": service_name, **get_aws_config()}
+            pool_config = Config(max_pool_connections=self.config.max_pool_connections)
+            # Merged into the config of get_aws_config (if it has one), the pool size wins
+            aws_config = client_kwargs.get("config")
+            client_kwargs["config"] = aws_config.merge(pool_config) if aws_config else pool_config
+            return boto3.client(**client_kwargs)
+
+        return self.get(("boto3", service_name), create_client)
+
+    def http_session(self) -> Session:
+        def create_session() -> Session:
+            """
+            A session with the configuration of the jit_utils session (headers, auth, hooks, retries...) and
+            connection pools of max_pool_connections
+            """
+            defaults = get_session()
+            session = Session()
+            session.headers.update(defaults.headers)
+            session.auth = defaults.auth
+            session.hooks = {event: list(hooks) for event, hooks in defaults.hooks.items()}
+            session.params = dict(defaults.params)
+            session.proxies = dict(defaults.proxies)
+            session.verify = defaults.verify
+            session.cert = defaults.cert
+            session.trust_env = defaults.trust_env
+            session.max_redirects = defaults.max_redirects
+            for prefix, default_adapter in defaults.adapters.items():
+                max_retries: Union[int, Retry] = 0
+                if isinstance(default_adapter, HTTPAdapter):
+                    max_retries = default_adapter.max_retries
+                session.mount(prefix, HTTPAdapter(pool_maxsize=self.config.max_pool_connections,
+                                                  max_retries=max_retries))
+            if not self.config.keep_alive:
+                session.headers["Connection"] = "close"
+            return session
+
+        return self.get("http_session", create_session)
+
+    def asset_service(self, test_mode: bool = False) -> "AssetService":
+        from src.asset_service.client import AssetService
+        return self.get(("asset_service", test_mode),
+                        lambda: AssetService(test_mode=test_mode, session=self.http_session()))
+
+    def asset_manager(self) -> "AssetManager":
+        from src.lib.asset_manager import AssetManager
+        return self.get("asset_manager", AssetManager)
+
+    def sqs_client(self) -> "SQSClient":
+        from src.lib.clients.sqs import SQSClient
+        return self.get("sqs_client", lambda: SQSClient(client=self.boto3_client("sqs")))
+
+    def plan_service(self) -> "PlanService":
+        from src.lib.clients.plan_service import PlanService
+        return self.get("plan_service", lambda: PlanService(sqs_client=self.sqs_client()))
+
+    def event_publisher(self) -> "EventBridgePublisher":
+        from src.lib.clients.eventbridge import EventBridgePublisher
+        return self.get("event_publisher", lambda: EventBridgePublisher(client=self.boto3_client("events")))
+
+
+registry = ClientRegistry()
@@ -1,23 +1,178 @@
 import json
-from typing import Any
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional
 
 import boto3
+from jit_utils.logger import logger
 from jit_utils.service_discovery import get_queue_url
 
 from jit_utils.aws_clients.config.aws_config import get_aws_config
 
+SEND_MESSAGE_BATCH_MAX_MESSAGES = 10  # The SQS limits of a single SendMessageBatch call
+SEND_MESSAGE_BATCH_MAX_BYTES = 256 * 1024
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_SEND_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 0.1
+
+
+@lru_cache(maxsize=None)
+def get_cached_queue_url(queue_name: str) -> str:
+    """
+    Queue urls never change during the life of the process, so service discovery is queried once per queue
+    """
+    return get_queue_url(queue_name)
+
+
+class FailedMessage(NamedTuple):
+    queue_name: str
+    message: Any
+    code: str
+    error: str
+
 
 class SQSClient:
     """
     A client for connecting to AWS SQS
     """
 
-    def __init__(self) -> None:
-        self.client = boto3.client('sqs', **get_aws_config())
+    def __init__(self, client: Any = None) -> None:
+        self.client = client or boto3.client('sqs', **get_aws_config())
 
     def send_message(self, queue_name: str, message: Any) -> None:
-        queue_url = get_queue_url(queue_name)
+        queue_url = get_cached_queue_url(queue_name)
         self.client.send_message(
             QueueUrl=queue_url,
             MessageBody=json.dumps(message)
         )
+
+    def send_message_batch(self, queue_name: str, messages: List[Any],
+                           max_attempts: int = DEFAULT_SEND_ATTEMPTS) -> List[FailedMessage]:
+        """
+        Send up to SEND_MESSAGE_BATCH_MAX_MESSAGES messages in a single SendMessageBatch call.
+        Entries that failed on the SQS side are retried (only them), entries rejected as the sender's fault are not.
+        A call that raised (e.g. throttled) is retried with the entries it was sending, the entries delivered by the
+        previous attempts are never sent again nor reported as failed.
+
+        Returns:
+            List[FailedMessage]: the messages that were not sent
+        Raises:
+            ValueError: if there are more than SEND_MESSAGE_BATCH_MAX_MESSAGES messages
+        """
+        if len(messages) > SEND_MESSAGE_BATCH_MAX_MESSAGES:
+            raise ValueError(f"Cannot send {len(messages)} messages in a single batch, "
+                             f"the maximum is {SEND_MESSAGE_BATCH_MAX_MESSAGES}")
+        queue_url = get_cached_queue_url(queue_name)
+        pending = {str(index): message for index, message in enumerate(messages)}
+        failed: Dict[str, FailedMessage] = {}
+        for attempt in range(max_attempts):
+            if attempt:
+                time.sleep(RETRY_DELAY_SECONDS * 2 ** (attempt - 1))
+            try:
+                response = self.client.send_message_batch(
+                    QueueUrl=queue_url,
+                    Entries=[{"Id": entry_id, "MessageBody": json.dumps(message)}
+                             for entry_id, message in pending.items()],
+                )
+            except Exception as e:
+                logger.exception(f"Failed to send {len(pending)} messages to {queue_name=}, {attempt=}")
+                failed.update({entry_id: FailedMessage(queue_name, message, type(e).__name__, str(e))
+                               for entry_id, message in pending.items()})
+                continue
+            retryable = {}
+            for failure in response.get("Failed", []):
+                entry_id = failure["Id"]
+                failed[entry_id] = FailedMessage(queue_name, pending[entry_id], failure.get("Code", ""),
+                                                 failure.get("Message", ""))
+                if not failure.get("SenderFault"):
+                    retryable[entry_id] = pending[entry_id]
+            for success in response.get("Successful", []):
+                failed.pop(success["Id"], None)
+
+            pending = retryable
+            if not pending:
+                break
+            logger.warning(f"Retrying {len(pending)} failed messages to {queue_name=}, {attempt=}")
+
+        return list(failed.values())
+
+
+class BufferedSQSSender:
+    """
+    Buffers messages per queue and sends them with as few SendMessageBatch calls as possible.
+    A queue is flushed when its next message would exceed the SQS batch limits (10 messages / 256 KB), when its oldest
+    message waited flush_interval_seconds, on flush() and when the context is exited.
+    There is no timer, the wait is only checked on send(), so a buffer that receives no more messages is sent only by
+    flush() or the context exit: always use the sender as a context manager or call flush() when done.
+
+    Usage:
+        with BufferedSQSSender() as sender:
+            for tenant_id in tenant_ids:
+                sender.send(queue_name, {"tenant_id": tenant_id})
+        failed_messages = sender.failed_messages
+    """
+
+    def __init__(self,
+                 sqs_client: Optional[SQSClient] = None,
+                 flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+                 max_attempts: int = DEFAULT_SEND_ATTEMPTS) -> None:
+        self.sqs_client = sqs_client or SQSClient()
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_attempts = max_attempts
+        self._buffers: Dict[str, List[Any]] = {}
+        self._buffer_bytes: Dict[str, int] = {}
+        self._buffered_at: Dict[str, float] = {}
+        self.failed_messages: List[FailedMessage] = []
+
+    def __enter__(self) -> "BufferedSQSSender":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+    def send(self, queue_name: str, message: Any) -> None:
+        size = len(json.dumps(message).encode())
+        if size > SEND_MESSAGE_BATCH_MAX_BYTES:
+            logger.error(f"Message of {size} bytes exceeds the SQS limit, not sending it to {queue_name=}")
+            self.failed_messages.append(FailedMessage(queue_name, message, "MessageTooLong",
+                                                      f"Message size {size} exceeds {SEND_MESSAGE_BATCH_MAX_BYTES}"))
+            return
+
+        buffer = self._buffers.get(queue_name, [])
+        if len(buffer) == SEND_MESSAGE_BATCH_MAX_MESSAGES or \
+                self._buffer_bytes.get(queue_name, 0) + size > SEND_MESSAGE_BATCH_MAX_BYTES:
+            self._flush_queue(queue_name)
+
+        self._buffers.setdefault(queue_name, []).append(message)
+        self._buffer_bytes[queue_name] = self._buffer_bytes.get(queue_name, 0) + size
+        self._buffered_at.setdefault(queue_name, time.monotonic())
+
+        if time.monotonic() - self._buffered_at[queue_name] >= self.flush_interval_seconds:
+            self._flush_queue(queue_name)
+
+    def _flush_queue(self, queue_name: str) -> None:
+        messages = self._buffers.pop(queue_name, [])
+        self._buffer_bytes.pop(queue_name, None)
+        self._buffered_at.pop(queue_name, None)
+        if not messages:
+            return
+        try:
+            self.failed_messages.extend(self.sqs_client.send_message_batch(queue_name, messages, self.max_attempts))
+        except Exception as e:
+            # The queue url lookup failed, none of the messages was sent
+            logger.exception(f"Failed to send {len(messages)} messages to {queue_name=}")
+            self.failed_messages.extend(FailedMessage(queue_name, message, type(e).__name__, str(e))
+                                        for message in messages)
+
+    def flush(self) -> List[FailedMessage]:
+        """
+        Send all the buffered messages
+
+        Returns:
+            List[FailedMessage]: all the messages that failed to send so far
+        """
+        for queue_name in list(self._buffers):
+            self._flush_queue(queue_name)
+        if self.failed_messages:
+            logger.error(f"Failed to send {len(self.failed_messages)} messages")
+        return self.failed_messages
@@ -1,18 +1,37 @@
 import json
+import random
 import time
+from collections import Counter
 from http import HTTPStatus
-from typing import List, Tuple, Optional
-from src.lib.exceptions import DBException
+from typing import Dict, List, Tuple, Optional
+
 from jit_utils.logger import logger
 from jit_utils.models.teams.entities import TeamsChangedForRepoEvent
 from jit_utils.models.asset.entities import AssetTagsChangedEvent
 from jit_utils.models.tags.entities import Tag
-from jit_utils.aws_clients.events import EventBridgeClient
-from src.asset_service.models import Asset, UpdateAsset
+from src.asset_service.models import TEAM_TAG, Asset, UpdateAsset
 from src.lib.asset_manager import AssetManager
+from src.lib.clients.eventbridge import FailedEvent, PublishEventsException, get_event_publisher
+from src.lib.clients.registry import registry
 from src.lib.constants import ASSET_SERVICE_BUS, ASSET_TAGS_CHANGED_DETAIL_TYPE, \
-    DYNAMO_OPTIMISTIC_LOCKING_RETRY_COUNT, DYNAMO_OPTIMISTIC_LOCKING_RETRY_DELAY, EVENT_SOURCE, TEAM_TAG
-from src.lib.exceptions import ItemNotFound
+    DYNAMO_OPTIMISTIC_LOCKING_RETRY_COUNT, DYNAMO_OPTIMISTIC_LOCKING_RETRY_DELAY, EVENT_SOURCE
+from src.lib.exceptions import DBException, ItemNotFound
+
+OPTIMISTIC_LOCKING_MAX_RETRY_DELAY = 2  # Seconds, the cap of the exponential backoff between update attempts
+
+AssetKey = Tuple[str, str, str, str, str]
+
+# Counts of the tag updates of this process: updates, conflicts (failed conditional writes), retries and failures
+tag_update_metrics: Counter = Counter()
+
+
+def get_retry_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter, so concurrent updaters of the same asset spread their retries
+    instead of colliding again after the same fixed delay
+    """
+    return random.uniform(0, min(OPTIMISTIC_LOCKING_MAX_RETRY_DELAY,
+                                 DYNAMO_OPTIMISTIC_LOCKING_RETRY_DELAY * 2 ** attempt))
 
 
 def get_related_asset(asset_manager: AssetManager, team_change_event: TeamsChangedForRepoEvent) -> Optional[Asset]:
@@ -32,41 +51,61 @@ def get_related_asset(asset_manager: AssetManager, team_change_event: TeamsChang
 
 def generate_update_asset(related_asset: Asset, tags_for_added_teams: List[Tag],
                           tags_for_removed_teams: List[Tag]) -> UpdateAsset:
-    current_tags = related_asset.tags
+    """
+    Applies the team tags delta to the tags the asset has now, the other tags of the asset are kept as they are
+    """
     logger.info(f"Updating asset {related_asset.asset_id} with {tags_for_added_teams=} and {tags_for_removed_teams=}")
-    current_tags.extend(tags_for_added_teams)
-    current_tags = [tag for tag in current_tags if tag not in tags_for_removed_teams]
-    return UpdateAsset(asset_id=related_asset.asset_id, tags=current_tags)
+    tags = [tag for tag in related_asset.tags if tag not in tags_for_removed_teams]
+    tags.extend(tag for tag in tags_for_added_teams if tag not in tags)
+    return UpdateAsset(asset_id=related_asset.asset_id, tags=tags)
 
 
-def update_asset_with_optimistic_locking(asset_manager: AssetManager, related_asset: Asset,
-                                         update_asset: UpdateAsset,
-                                         team_change_event: TeamsChangedForRepoEvent,
-                                         tags_for_added_teams: List[Tag],
-                                         tags_for_removed_teams: List[Tag]) -> None:
+def update_asset_tags_with_retries(asset_manager: AssetManager, related_asset: Asset,
+                                   team_change_event: TeamsChangedForRepoEvent, tags_for_added_teams: List[Tag],
+                                   tags_for_removed_teams: List[Tag]) -> bool:
+    """
+    Applies the team tags delta with a single conditional write of the asset that was read, so an attempt costs one
+    read and one write. A write that lost to a concurrent write of the asset (failed condition) reads the asset again
+    and applies the delta to its new tags, after an exponential backoff with full jitter so concurrent updaters of the
+    asset spread their retries instead of colliding again.
+
+    Returns:
+        bool: whether the asset was updated, False when it no longer exists
+    """
     for attempt in range(DYNAMO_OPTIMISTIC_LOCKING_RETRY_COUNT):
         try:
-            asset_manager.update_asset(related_asset, update_asset)
+            asset_manager.update_asset(related_asset,
+                                       generate_update_asset(related_asset, tags_for_added_teams,
+                                                             tags_for_removed_teams))
+            tag_update_metrics["updates"] += 1
             logger.info(f"Successfully updated asset {related_asset.asset_id}")
-            break
+            return True
         except DBException as e:
-            if e.status == HTTPStatus.NOT_FOUND and attempt < DYNAMO_OPTIMISTIC_LOCKING_RETRY_COUNT - 1:
-                logger.warning("Update failed due to conditional check, retrying...")
-                time.sleep(DYNAMO_OPTIMISTIC_LOCKING_RETRY_DELAY)
-                related_asset = get_related_asset(asset_manager, team_change_event)
-                update_asset = generate_update_asset(related_asset, tags_for_added_teams, tags_for_removed_teams)
-                logger.info(
-                    f"Retrieved asset {related_asset.asset_id} for retry attempt {attempt + 1}. {related_asset=}")
-            else:
-                logger.exception(f"Failed to update asset after {DYNAMO_OPTIMISTIC_LOCKING_RETRY_COUNT} attempts.")
+            if e.status != HTTPStatus.NOT_FOUND or attempt == DYNAMO_OPTIMISTIC_LOCKING_RETRY_COUNT - 1:
+                tag_update_metrics["failures"] += 1
+                logger.exception(f"Failed to update asset after {attempt + 1} attempts.")
                 raise
+            tag_update_metrics["conflicts"] += 1
+            retry_delay = get_retry_delay(attempt)
+            logger.warning(f"Update failed due to conditional check, retrying in {retry_delay:.3f} seconds...")
+            tag_update_metrics["retries"] += 1
+            time.sleep(retry_delay)
+            refreshed_asset = get_related_asset(asset_manager, team_change_event)
+            if refreshed_asset is None:
+                logger.info(f"Asset {related_asset.asset_id} no longer exists, skipping the update")
+                return False
+            related_asset = refreshed_asset
+            logger.info(f"Retrieved asset {related_asset.asset_id} for retry attempt {attempt + 1}. {related_asset=}")
+    return False
 
 
-def publish_asset_change_event(related_asset_id: str,
-                               tenant_id: str,
-                               tags_for_added_teams: List[Tag],
-                               tags_for_removed_teams: List[Tag]) -> None:
-    logger.info(f"Publishing event for the changed tags for asset {related_asset_id}")
+def buffer_asset_change_event(related_asset_id: str,
+                              tenant_id: str,
+                              tags_for_added_teams: List[Tag],
+                              tags_for_removed_teams: List[Tag]) -> None:
+    """
+    Adds the event to the shared publisher, it is sent on the next flush (at the latest when the invocation ends)
+    """
     event = AssetTagsChangedEvent(
         tenant_id=tenant_id,
         asset_id=related_asset_id,
@@ -74,12 +113,39 @@ def publish_asset_change_event(related_asset_id: str,
         added_tags=tags_for_added_teams
     )
     logger.info(f"Publishing event {event=}")
-    events_client = EventBridgeClient()
-    events_client.put_event(source=EVENT_SOURCE,
-                            bus_name=ASSET_SERVICE_BUS,
-                            detail_type=ASSET_TAGS_CHANGED_DETAIL_TYPE,
-                            detail=json.dumps(event.dict()))
-    logger.info(f"Successfully published event {event=}")
+    get_event_publisher().publish(bus_name=ASSET_SERVICE_BUS,
+                                  source=EVENT_SOURCE,
+                                  detail_type=ASSET_TAGS_CHANGED_DETAIL_TYPE,
+                                  detail=json.dumps(event.dict()))
+
+
+def get_event_asset_id(failed_event: FailedEvent) -> Optional[str]:
+    """
+    The asset id of an AssetTagsChangedEvent that failed to publish, None for the other events of the publisher
+    """
+    try:
+        detail = json.loads(failed_event.entry["Detail"])
+    except ValueError:
+        return None
+    return detail.get("asset_id") if isinstance(detail, dict) else None
+
+
+def publish_asset_change_event(related_asset_id: str,
+                               tenant_id: str,
+                               tags_for_added_teams: List[Tag],
+                               tags_for_removed_teams: List[Tag]) -> None:
+    """
+    Raises:
+        PublishEventsException: if the event of the asset failed to publish
+    """
+    logger.info(f"Publishing event for the changed tags for asset {related_asset_id}")
+    buffer_asset_change_event(related_asset_id, tenant_id, tags_for_added_teams, tags_for_removed_teams)
+    # The publisher is shared, the failed events of others were logged by the flush
+    failed_events = [failed_event for failed_event in get_event_publisher().flush()
+                     if get_event_asset_id(failed_event) == related_asset_id]
+    if failed_events:
+        raise PublishEventsException(failed_events)
+    logger.info(f"Successfully published the event of asset {related_asset_id}")
 
 
 def generate_team_tags(current_tags: List[Tag], team_change_event: TeamsChangedForRepoEvent) \
@@ -121,15 +187,17 @@ def generate_team_tags(current_tags: List[Tag], team_change_event: TeamsChangedF
 
 def handle_team_change_event_core(team_change_event: TeamsChangedForRepoEvent) -> None:
     logger.info(f"Handling team change event {team_change_event=}")
-    asset_manager = AssetManager()
+    asset_manager = registry.asset_manager()
     related_asset = get_related_asset(asset_manager, team_change_event)
     if related_asset:
         tags_for_added_teams, tags_for_removed_teams = generate_team_tags(related_asset.tags, team_change_event)
 
         if tags_for_added_teams or tags_for_removed_teams:
-            update_asset = generate_update_asset(related_asset, tags_for_added_teams, tags_for_removed_teams)
-            update_asset_with_optimistic_locking(asset_manager, related_asset, update_asset,
-                                                 team_change_event, tags_for_added_teams, tags_for_removed_teams)
+            is_updated = update_asset_tags_with_retries(asset_manager, related_asset, team_change_event,
+                                                        tags_for_added_teams, tags_for_removed_teams)
+            logger.info(f"Tag update metrics {dict(tag_update_metrics)}")
+            if not is_updated:
+                return
             publish_asset_change_event(related_asset.asset_id, team_change_event.tenant_id,
                                        tags_for_added_teams,
                                        tags_for_removed_teams)
@@ -138,3 +206,97 @@ def handle_team_change_event_core(team_change_event: TeamsChangedForRepoEvent) -
     else:
         logger.info(f"No related asset found for {team_change_event=} finishing gracefully")
         return
+
+
+def get_asset_key(team_change_event: TeamsChangedForRepoEvent) -> AssetKey:
+    return (team_change_event.tenant_id, team_change_event.asset_type, team_change_event.vendor,
+            team_change_event.owner, team_change_event.asset_name)
+
+
+def merge_team_change_events(team_change_events: List[TeamsChangedForRepoEvent]) \
+        -> Dict[AssetKey, TeamsChangedForRepoEvent]:
+    """
+    Coalesces the events of each asset into a single event holding the net team changes.
+
+    The events are applied in order, so a team that is added and later removed ends up only in the removed teams
+    (and vice versa). Removals of a team that was never on the asset are skipped later by generate_team_tags.
+
+    Args:
+        team_change_events (List[TeamsChangedForRepoEvent]): The events, in the order they were received.
+
+    Returns:
+        Dict[AssetKey, TeamsChangedForRepoEvent]: A merged event per asset key, in the order the assets first appeared.
+    """
+    team_changes: Dict[AssetKey, Tuple[TeamsChangedForRepoEvent, Dict[str, bool]]] = {}
+    for team_change_event in team_change_events:
+        first_event, is_added_by_team = team_changes.setdefault(get_asset_key(team_change_event),
+                                                                (team_change_event, {}))
+        for team_name in team_change_event.team_names_added:
+            is_added_by_team.pop(team_name, None)
+            is_added_by_team[team_name] = True
+        for team_name in team_change_event.team_names_removed:
+            is_added_by_team.pop(team_name, None)
+            is_added_by_team[team_name] = False
+
+    return {
+        asset_key: first_event.copy(update={
+            "team_names_added": [team_name for team_name, is_added in is_added_by_team.items() if is_added],
+            "team_names_removed": [team_name for team_name, is_added in is_added_by_team.items() if not is_added],
+        })
+        for asset_key, (first_event, is_added_by_team) in team_changes.items()
+    }
+
+
+def handle_team_change_events_batch(team_change_events: List[TeamsChangedForRepoEvent]) \
+        -> List[TeamsChangedForRepoEvent]:
+    """
+    Handles many team change events at once, e.g. the burst of events of a team reorg.
+
+    The events are grouped by asset and their team changes merged, then each asset is read once and
+    its tags updated once (with the same delta update and retries as a single event), and the AssetTagsChangedEvents
+    of all the updated assets are published with batched PutEvents calls of the shared publisher.
+    An asset whose update or AssetTagsChangedEvent failed is reported as failed.
+
+    Args:
+        team_change_events (List[TeamsChangedForRepoEvent]): The events, in the order they were received.
+
+    Returns:
+        List[TeamsChangedForRepoEvent]: The original events of the assets that failed to update, so the caller can
+        retry them (e.g. report them as batch item failures).
+    """
+    merged_events = merge_team_change_events(team_change_events)
+    logger.info(f"Handling {len(team_change_events)} team change events of {len(merged_events)} assets")
+
+    asset_manager = registry.asset_manager()
+    failed_asset_keys = set()
+    asset_keys_by_asset_id: Dict[str, AssetKey] = {}
+    for asset_key, merged_event in merged_events.items():
+        try:
+            related_asset = get_related_asset(asset_manager, merged_event)
+            if not related_asset:
+                continue
+
+            tags_for_added_teams, tags_for_removed_teams = generate_team_tags(related_asset.tags, merged_event)
+            if not (tags_for_added_teams or tags_for_removed_teams):
+                logger.info(f"No tags to add or remove for {merged_event=}. Skipping.")
+                continue
+
+            if not update_asset_tags_with_retries(asset_manager, related_asset, merged_event, tags_for_added_teams,
+                                                  tags_for_removed_teams):
+                continue
+            buffer_asset_change_event(related_asset.asset_id, merged_event.tenant_id,
+                                      tags_for_added_teams, tags_for_removed_teams)
+            asset_keys_by_asset_id[related_asset.asset_id] = asset_key
+        except Exception:
+            logger.exception(f"Failed to handle the team changes of asset {asset_key=}")
+            failed_asset_keys.add(asset_key)
+
+    for failed_event in get_event_publisher().flush():
+        # The publisher is shared, its failed events may include events buffered by others
+        failed_asset_key = asset_keys_by_asset_id.get(get_event_asset_id(failed_event))
+        if failed_asset_key:
+            failed_asset_keys.add(failed_asset_key)
+
+    logger.info(f"Tag update metrics {dict(tag_update_metrics)}")
+    return [team_change_event for team_change_event in team_change_events
+            if get_asset_key(team_change_event) in failed_asset_keys]
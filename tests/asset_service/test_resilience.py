@@ -0,0 +1,362 @@
+import threading
+from email.utils import formatdate
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+from requests.exceptions import ChunkedEncodingError, ConnectionError as RequestsConnectionError
+
+from src.asset_service import resilience
+from src.asset_service.exceptions import CircuitOpenException
+from src.asset_service.resilience import CircuitBreaker, Resilience, ResiliencePolicy
+
+URL = "https://asset-service/asset/some-id"
+THRESHOLD = 2
+RESET_SECONDS = 10
+BACKOFF_MAX_SECONDS = 5
+HEDGE_AFTER_SECONDS = 0.01
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: Optional[Dict[str, str]] = None) -> None:
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake_clock)
+    return fake_clock
+
+
+@pytest.fixture
+def client_resilience() -> Resilience:
+    return Resilience(ResiliencePolicy(max_attempts=1, circuit_failure_threshold=THRESHOLD,
+                                       circuit_reset_seconds=RESET_SECONDS))
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """
+    The backoffs the retries waited, without waiting them
+    """
+    slept: List[float] = []
+    monkeypatch.setattr(resilience.time, "sleep", slept.append)
+    return slept
+
+
+@pytest.fixture
+def retrying_resilience() -> Resilience:
+    return Resilience(ResiliencePolicy(max_attempts=3, backoff_max_seconds=BACKOFF_MAX_SECONDS,
+                                       circuit_failure_threshold=0))
+
+
+@pytest.fixture
+def hedging_resilience() -> Iterator[Resilience]:
+    hedging_resilience = Resilience(ResiliencePolicy(max_attempts=1, hedge_after_seconds=HEDGE_AFTER_SECONDS,
+                                                     circuit_failure_threshold=0))
+    yield hedging_resilience
+    hedging_resilience.close()
+
+
+def send_returning(*outcomes: Any) -> Any:
+    """
+    A send callable that returns (or raises) the outcomes in order
+    """
+    remaining: List[Any] = list(outcomes)
+
+    def send(timeout: Optional[float]) -> Any:
+        outcome = remaining.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return send
+
+
+def open_circuit(client_resilience: Resilience) -> None:
+    for _ in range(THRESHOLD):
+        client_resilience.call("GET", URL, send_returning(FakeResponse(503)))
+
+
+def test_circuit_breaker__opens_after_threshold_consecutive_failures(clock: FakeClock) -> None:
+    circuit = CircuitBreaker(THRESHOLD, RESET_SECONDS)
+
+    assert circuit.record(success=False) is False
+    assert circuit.allow() is True
+    assert circuit.record(success=False) is True
+
+    assert circuit.allow() is False
+
+
+def test_circuit_breaker__success_resets_the_failure_count(clock: FakeClock) -> None:
+    circuit = CircuitBreaker(THRESHOLD, RESET_SECONDS)
+
+    circuit.record(success=False)
+    circuit.record(success=True)
+    circuit.record(success=False)
+
+    assert circuit.allow() is True
+
+
+def test_circuit_breaker__half_open_lets_a_single_trial_through(clock: FakeClock) -> None:
+    circuit = CircuitBreaker(THRESHOLD, RESET_SECONDS)
+    for _ in range(THRESHOLD):
+        circuit.record(success=False)
+
+    clock.now += RESET_SECONDS
+    assert circuit.allow() is True
+    assert circuit.allow() is False  # The trial is in flight
+
+
+def test_circuit_breaker__successful_trial_closes_the_circuit(clock: FakeClock) -> None:
+    circuit = CircuitBreaker(THRESHOLD, RESET_SECONDS)
+    for _ in range(THRESHOLD):
+        circuit.record(success=False)
+    clock.now += RESET_SECONDS
+    circuit.allow()
+
+    circuit.record(success=True)
+
+    assert circuit.opened_at is None
+    assert circuit.allow() is True
+    assert circuit.allow() is True
+
+
+def test_circuit_breaker__failed_trial_opens_the_circuit_again(clock: FakeClock) -> None:
+    circuit = CircuitBreaker(THRESHOLD, RESET_SECONDS)
+    for _ in range(THRESHOLD):
+        circuit.record(success=False)
+    clock.now += RESET_SECONDS
+    circuit.allow()
+
+    assert circuit.record(success=False) is False  # It was already open
+
+    assert circuit.allow() is False
+    clock.now += RESET_SECONDS
+    assert circuit.allow() is True
+
+
+def test_call__open_circuit_fails_fast(clock: FakeClock, client_resilience: Resilience) -> None:
+    open_circuit(client_resilience)
+
+    with pytest.raises(CircuitOpenException):
+        client_resilience.call("GET", URL, send_returning(FakeResponse(200)))
+
+    assert client_resilience.stats["circuit_opened"] == 1
+    assert client_resilience.stats["circuit_rejected"] == 1
+
+
+def test_call__successful_trial_closes_the_circuit(clock: FakeClock, client_resilience: Resilience) -> None:
+    open_circuit(client_resilience)
+    clock.now += RESET_SECONDS
+
+    response = client_resilience.call("GET", URL, send_returning(FakeResponse(200)))
+
+    assert response.status_code == 200
+    assert client_resilience.call("GET", URL, send_returning(FakeResponse(200))).status_code == 200
+
+
+@pytest.mark.parametrize("error", [RequestsConnectionError("refused"), ChunkedEncodingError("broken body"),
+                                   ValueError("unexpected")])
+def test_call__trial_that_raises_reopens_the_circuit(clock: FakeClock, client_resilience: Resilience,
+                                                     error: Exception) -> None:
+    open_circuit(client_resilience)
+    clock.now += RESET_SECONDS
+
+    with pytest.raises(type(error)):
+        client_resilience.call("GET", URL, send_returning(error))
+
+    # The trial is over, the circuit is open again and lets the next trial through after the reset time
+    with pytest.raises(CircuitOpenException):
+        client_resilience.call("GET", URL, send_returning(FakeResponse(200)))
+    clock.now += RESET_SECONDS
+    assert client_resilience.call("GET", URL, send_returning(FakeResponse(200))).status_code == 200
+
+
+def test_call__throttling_does_not_open_the_circuit(clock: FakeClock, client_resilience: Resilience) -> None:
+    for _ in range(THRESHOLD * 2):
+        response = client_resilience.call("GET", URL, send_returning(FakeResponse(429)))
+        assert response.status_code == 429
+
+    assert client_resilience.call("GET", URL, send_returning(FakeResponse(200))).status_code == 200
+    assert client_resilience.stats["circuit_opened"] == 0
+
+
+def test_call__throttling_does_not_reset_the_failure_count(clock: FakeClock, client_resilience: Resilience) -> None:
+    client_resilience.call("GET", URL, send_returning(FakeResponse(503)))
+    client_resilience.call("GET", URL, send_returning(FakeResponse(429)))
+    client_resilience.call("GET", URL, send_returning(FakeResponse(503)))
+
+    assert client_resilience.stats["circuit_opened"] == 1
+
+
+def test_call__throttled_trial_keeps_the_circuit_open(clock: FakeClock, client_resilience: Resilience) -> None:
+    open_circuit(client_resilience)
+    clock.now += RESET_SECONDS
+
+    assert client_resilience.call("GET", URL, send_returning(FakeResponse(429))).status_code == 429
+
+    circuit = client_resilience._circuits["GET /asset"]
+    assert circuit.opened_at is not None
+    assert circuit.allow() is True  # The next trial is let through
+
+
+def test_call__circuits_are_per_endpoint(clock: FakeClock, client_resilience: Resilience) -> None:
+    open_circuit(client_resilience)
+
+    response = client_resilience.call("GET", "https://asset-service/assets", send_returning(FakeResponse(200)))
+
+    assert response.status_code == 200
+
+
+def test_close__shuts_down_the_bounded_hedge_pool() -> None:
+    client_resilience = Resilience(ResiliencePolicy(hedge_after_seconds=1, hedge_max_workers=3))
+    client_resilience.call("GET", URL, send_returning(FakeResponse(200)))
+    hedge_executor = client_resilience._hedge_executor
+
+    client_resilience.close()
+
+    assert hedge_executor is not None and hedge_executor._max_workers == 3
+    assert hedge_executor._shutdown
+    assert client_resilience._hedge_executor is None
+    assert client_resilience.call("GET", URL, send_returning(FakeResponse(200))).status_code == 200
+
+
+def test_call__retries_an_idempotent_call_until_it_succeeds(sleeps: List[float],
+                                                            retrying_resilience: Resilience) -> None:
+    send = send_returning(FakeResponse(503), RequestsConnectionError("refused"), FakeResponse(200))
+
+    response = retrying_resilience.call("GET", URL, send)
+
+    assert response.status_code == 200
+    assert retrying_resilience.stats["attempts"] == 3
+    assert retrying_resilience.stats["retries"] == 2
+    assert len(sleeps) == 2 and all(0 <= backoff <= BACKOFF_MAX_SECONDS for backoff in sleeps)
+
+
+def test_call__returns_the_last_response_when_the_attempts_are_exhausted(sleeps: List[float],
+                                                                         retrying_resilience: Resilience) -> None:
+    send = send_returning(FakeResponse(503), FakeResponse(502), FakeResponse(504))
+
+    response = retrying_resilience.call("GET", URL, send)
+
+    assert response.status_code == 504
+    assert retrying_resilience.stats["retries"] == 2
+
+
+def test_call__raises_the_connection_error_of_the_last_attempt(sleeps: List[float],
+                                                               retrying_resilience: Resilience) -> None:
+    send = send_returning(*[RequestsConnectionError("refused")] * 3)
+
+    with pytest.raises(RequestsConnectionError):
+        retrying_resilience.call("GET", URL, send)
+
+    assert retrying_resilience.stats["attempts"] == 3
+
+
+def test_call__does_not_retry_a_non_idempotent_call(sleeps: List[float], retrying_resilience: Resilience) -> None:
+    response = retrying_resilience.call("POST", URL, send_returning(FakeResponse(503)))
+
+    assert response.status_code == 503
+    assert retrying_resilience.stats["retries"] == 0
+    assert sleeps == []
+
+
+def test_call__does_not_retry_a_client_error(sleeps: List[float], retrying_resilience: Resilience) -> None:
+    response = retrying_resilience.call("GET", URL, send_returning(FakeResponse(404)))
+
+    assert response.status_code == 404
+    assert retrying_resilience.stats["attempts"] == 1
+
+
+@pytest.mark.parametrize("retry_after", ["3", formatdate(resilience.time.time() + 4, usegmt=True)])
+def test_call__waits_the_retry_after_of_the_response(sleeps: List[float], retrying_resilience: Resilience,
+                                                     retry_after: str) -> None:
+    send = send_returning(FakeResponse(429, {"Retry-After": retry_after}), FakeResponse(200))
+
+    assert retrying_resilience.call("GET", URL, send).status_code == 200
+
+    assert 2 <= sleeps[0] <= BACKOFF_MAX_SECONDS
+
+
+def test_call__returns_a_retry_after_longer_than_the_max_backoff(sleeps: List[float],
+                                                                 retrying_resilience: Resilience) -> None:
+    send = send_returning(FakeResponse(503, {"Retry-After": str(BACKOFF_MAX_SECONDS * 10)}), FakeResponse(200))
+
+    response = retrying_resilience.call("GET", URL, send)
+
+    assert response.status_code == 503
+    assert sleeps == []
+    assert retrying_resilience.stats["retries"] == 0
+
+
+def test_call__fast_response_is_not_hedged(hedging_resilience: Resilience) -> None:
+    response = hedging_resilience.call("GET", URL, send_returning(FakeResponse(200)))
+
+    assert response.status_code == 200
+    assert hedging_resilience.stats["hedges"] == 0
+
+
+def test_call__slow_response_is_hedged_and_the_first_response_wins(hedging_resilience: Resilience) -> None:
+    release_first = threading.Event()
+    calls: List[int] = []
+
+    def send(timeout: Optional[float]) -> FakeResponse:
+        calls.append(len(calls))
+        if len(calls) == 1:
+            release_first.wait(5)
+            return FakeResponse(500)
+        return FakeResponse(200)
+
+    response = hedging_resilience.call("GET", URL, send)
+    release_first.set()
+
+    assert response.status_code == 200
+    assert len(calls) == 2
+    assert hedging_resilience.stats["hedges"] == 1
+    assert hedging_resilience.stats["hedge_wins"] == 1
+
+
+def test_call__failed_hedge_waits_for_the_slow_response(hedging_resilience: Resilience) -> None:
+    hedge_sent = threading.Event()
+    calls: List[int] = []
+
+    def send(timeout: Optional[float]) -> FakeResponse:
+        calls.append(len(calls))
+        if len(calls) == 1:
+            hedge_sent.wait(5)
+            return FakeResponse(200)
+        hedge_sent.set()
+        raise RequestsConnectionError("refused")
+
+    response = hedging_resilience.call("GET", URL, send)
+
+    assert response.status_code == 200
+    assert hedging_resilience.stats["hedges"] == 1
+    assert hedging_resilience.stats["hedge_wins"] == 0
+
+
+@pytest.mark.parametrize("method, hedge", [("POST", True), ("GET", False)])
+def test_call__only_hedges_hedgeable_gets(hedging_resilience: Resilience, method: str, hedge: bool) -> None:
+    calling_thread = threading.current_thread()
+    threads: List[threading.Thread] = []
+
+    def send(timeout: Optional[float]) -> FakeResponse:
+        threads.append(threading.current_thread())
+        return FakeResponse(200)
+
+    hedging_resilience.call(method, URL, send, hedge=hedge)
+
+    assert threads == [calling_thread]  # Sent directly, not through the hedge pool